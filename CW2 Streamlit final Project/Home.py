@@ -1,5 +1,6 @@
 """This is the main page for my Multi-Domain Intelligence Platform"""
 import streamlit as st
+from utils.session import current_session, end_session
 
 # Page configuration
 st.set_page_config(
@@ -115,8 +116,8 @@ def show_dashboard():
 
 # Main application flow
 def main():
-    # Check if user is logged in
-    if not st.session_state.logged_in:
+    # Check if user is logged in (an expired or revoked session counts as logged out)
+    if current_session() is None:
         show_landing_page()
     else:
         # When logged in, show a welcome page with option to go to dashboard
@@ -182,10 +183,7 @@ def main():
         # Logout button
         st.divider()
         if st.button("Logout", type="secondary"):
-            st.session_state.logged_in = False
-            st.session_state.username = ""
-            st.session_state.user_role = "user"
-            st.session_state.user_obj = None
+            end_session()
             st.success("You have been logged out successfully!")
             st.rerun()
 
@@ -0,0 +1,161 @@
+"""Login throughput benchmark for the bcrypt hashing pool
+
+Usage (from the project folder):
+    python benchmarks/login_throughput.py --workers 1 2 4 8 --clients 32 --logins 64
+    python benchmarks/login_throughput.py --rounds 12 --output logins.json
+    python benchmarks/login_throughput.py --workers 1 --burst 1000
+
+Seeds a temporary database with users hashed at --rounds, then runs --logins logins from
+--clients concurrent threads (like Streamlit sessions at a shift change) against an
+AuthManager backed by a HashingPool of each --workers size. Reports logins/sec and the
+pool's queue depth and wait times, so scaling with cores is visible.
+
+--burst replays a credential-stuffing burst (wrong passwords against one account, then
+against many accounts from one source) and reports how many attempts the login throttle
+rejected, how many still reached bcrypt, and the cost of a rejection.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+#Run from anywhere: the project folder holds the services and models packages
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.insert(0, str(PROJECT_DIR))
+
+import bcrypt
+from services.database_manager import DatabaseManager
+from services.auth_manager import AuthManager, HashingPool
+from services.login_throttle import LoginThrottle
+
+PASSWORD = "benchmark"
+#Lower than the default cost of 12 so a sweep finishes quickly; relative scaling is the same
+DEFAULT_ROUNDS = 10
+DEFAULT_CLIENTS = 32
+DEFAULT_LOGINS = 64
+
+
+def seed_users(db: DatabaseManager, count: int, rounds: int) -> List[str]:
+    """Add `count` users sharing one password hash and return their usernames."""
+    password_hash = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+    usernames = [f"analyst{i:04d}" for i in range(count)]
+    db.execute_many(
+        "INSERT INTO users (username, password_hash, role) VALUES (?, ?, 'analyst')",
+        [(username, password_hash) for username in usernames]
+    )
+    return usernames
+
+
+def run_workers(db: DatabaseManager, usernames: List[str], workers: int,
+                clients: int, logins: int) -> Dict[str, Any]:
+    """Time `logins` concurrent logins against a pool of `workers` threads."""
+    pool = HashingPool(workers=workers, max_pending=max(clients, workers))
+    auth = AuthManager(db, hashing_pool=pool)
+    names = [usernames[i % len(usernames)] for i in range(logins)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as sessions:
+        results = list(sessions.map(lambda name: auth.login_user(name, PASSWORD), names))
+    seconds = time.perf_counter() - start
+    stats = pool.stats()
+    pool.shutdown()
+    failed = sum(1 for user in results if user is None)
+    result = {
+        "workers": workers,
+        "seconds": seconds,
+        "logins_per_sec": logins / seconds if seconds > 0 else float(logins),
+        "failed": failed,
+        "peak_queued": stats["peak_queued"],
+        "avg_wait_ms": stats["avg_wait_ms"],
+        "avg_run_ms": stats["avg_run_ms"],
+    }
+    print(f"  {workers:>3} workers {result['logins_per_sec']:>9.1f} logins/s  "
+          f"peak queue {result['peak_queued']:>4}  wait {result['avg_wait_ms']:>8.1f} ms  "
+          f"bcrypt {result['avg_run_ms']:>7.1f} ms" + (f"  ({failed} failed)" if failed else ""))
+    return result
+
+
+def run_burst(db: DatabaseManager, usernames: List[str], attempts: int) -> Dict[str, Any]:
+    """Time `attempts` bad logins on one account, then spread across accounts from one source."""
+    results = {}
+    scenarios = {
+        "one_account": lambda i: (usernames[0], f"10.0.0.{i % 250}"),
+        "one_source": lambda i: (usernames[i % len(usernames)], "10.0.0.1"),
+    }
+    for name, attempt in scenarios.items():
+        db.execute_query("DELETE FROM login_failures")
+        throttle = LoginThrottle(db)
+        pool = HashingPool(workers=1)
+        auth = AuthManager(db, hashing_pool=pool, throttle=throttle)
+        rejected_seconds = 0.0
+        start = time.perf_counter()
+        for i in range(attempts):
+            username, source = attempt(i)
+            locked = throttle.retry_after(username, source) > 0
+            tried = time.perf_counter()
+            auth.login_user(username, "wrong-password", source)
+            if locked:
+                rejected_seconds += time.perf_counter() - tried
+        seconds = time.perf_counter() - start
+        throttle.flush()
+        stats = throttle.stats()
+        bcrypt_calls = pool.stats()["submitted"]
+        pool.shutdown()
+        results[name] = {
+            "attempts": attempts,
+            "rejected": stats["blocked"],
+            "bcrypt_calls": bcrypt_calls,
+            "seconds": seconds,
+            "rejection_us": rejected_seconds / stats["blocked"] * 1e6 if stats["blocked"] else 0.0,
+            "rows_written": stats["rows_written"],
+            "flushes": stats["flushes"],
+        }
+        print(f"  {name:<12} {attempts} attempts: {stats['blocked']} rejected, {bcrypt_calls} reached bcrypt, "
+              f"{seconds:.2f} s total, {results[name]['rejection_us']:.1f} us per rejection, "
+              f"{stats['rows_written']} rows in {stats['flushes']} flushes")
+    return results
+
+
+def main(argv: List[str] = None) -> int:
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Measure concurrent login throughput per hashing pool size.")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, cores, cores * 2}), help="pool sizes to try")
+    parser.add_argument("--clients", type=int, default=DEFAULT_CLIENTS, help="concurrent login threads")
+    parser.add_argument("--logins", type=int, default=DEFAULT_LOGINS, help="logins per pool size")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="bcrypt cost of the seeded hashes")
+    parser.add_argument("--burst", type=int, default=0, help="also replay this many bad logins per attack scenario")
+    parser.add_argument("--output", type=Path, help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    print(f"== {args.logins} logins from {args.clients} clients, bcrypt cost {args.rounds}, {cores} cores ==")
+    with tempfile.TemporaryDirectory(prefix="cw2-logins-") as temp_dir:
+        db = DatabaseManager(str(Path(temp_dir) / "logins.db"))
+        usernames = seed_users(db, min(args.logins, 100), args.rounds)
+        runs = [run_workers(db, usernames, workers, args.clients, args.logins) for workers in args.workers]
+        burst = None
+        if args.burst:
+            print(f"== attack bursts of {args.burst} bad logins ==")
+            burst = run_burst(db, usernames, args.burst)
+
+    if args.output:
+        results = {
+            "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                     "cores": cores, "rounds": args.rounds, "clients": args.clients, "logins": args.logins},
+            "runs": runs,
+        }
+        if burst:
+            results["burst"] = burst
+        args.output.write_text(json.dumps(results, indent=2, sort_keys=True))
+        print(f"\nResults written to {args.output}")
+    return 1 if any(run["failed"] for run in runs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
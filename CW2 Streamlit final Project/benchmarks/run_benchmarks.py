@@ -0,0 +1,335 @@
+"""Data layer and page data-prep benchmarks
+
+Usage (from the project folder):
+    python benchmarks/run_benchmarks.py --sizes 10000 100000 --output results.json
+    python benchmarks/run_benchmarks.py --baseline results.json --threshold 0.25
+
+Every run builds a fresh synthetic database per size in a temporary folder, times each
+benchmark (median of --repeat runs) and writes the results as JSON. With --baseline, any
+tracked benchmark that got slower by more than --threshold fails the run (exit code 1).
+"""
+import argparse
+import json
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+#Run from anywhere: the project folder holds the services and models packages
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.insert(0, str(PROJECT_DIR))
+
+import pandas as pd
+from services.database_manager import DatabaseManager
+from services.statistics_engine import StatisticsEngine
+from services.semantic_index import SemanticIndex
+from services.analytics_engine import AnalyticsEngine
+from models.security_incident import SecurityIncident
+from models.dataset import Dataset
+from models.it_ticket import ITTicket
+from models.entity_collections import IncidentCollection
+from benchmarks.synthetic_data import populate
+
+DEFAULT_SIZES = [10000, 100000]
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.25
+#Differences below this many seconds are treated as timer noise, never as regressions
+NOISE_FLOOR = 0.002
+#Single-row CRUD benchmarks run this many operations per timing
+CRUD_OPERATIONS = 200
+
+
+#Legacy page paths (the dict -> entity object -> DataFrame loops the pages used to run)
+def legacy_incident_objects(rows: List[Dict]) -> List[SecurityIncident]:
+    """Cybersecurity page: build one SecurityIncident per row."""
+    return [SecurityIncident(
+        incident_id=data["id"],
+        title=data["title"],
+        severity=data["severity"],
+        status=data["status"],
+        date=data["date"]
+    ) for data in rows]
+
+
+def legacy_dataset_objects(rows: List[Dict]) -> List[Dataset]:
+    """Cybersecurity page: build one Dataset per row."""
+    return [Dataset(
+        dataset_id=data["id"],
+        name=data["name"],
+        source=data["source"],
+        category=data["category"],
+        size=data["size"]
+    ) for data in rows]
+
+
+def legacy_ticket_objects(rows: List[Dict]) -> List[ITTicket]:
+    """Cybersecurity page: build one ITTicket per row."""
+    return [ITTicket(
+        ticket_id=data["id"],
+        title=data["title"],
+        priority=data["priority"],
+        status=data["status"],
+        created_date=data["created_date"]
+    ) for data in rows]
+
+
+def legacy_incidents_dataframe(db: DatabaseManager) -> pd.DataFrame:
+    """Data Science page (before typed frames): fetch dicts, build objects, then a DataFrame."""
+    incidents = legacy_incident_objects(db.fetch_all("SELECT * FROM cyber_incidents ORDER BY id DESC"))
+    frame = pd.DataFrame([{
+        "ID": inc.get_id(),
+        "Title": inc.get_title(),
+        "Severity": inc.get_severity(),
+        "Status": inc.get_status(),
+        "Date": inc.get_date(),
+        "Severity_Level": inc.get_severity_level()
+    } for inc in incidents])
+    frame["Date"] = pd.to_datetime(frame["Date"])
+    return frame
+
+
+def legacy_ticket_breakdowns(db: DatabaseManager) -> Dict[str, Any]:
+    """Data Science page (before the analytics engine): value_counts and a crosstab per rerun."""
+    frame = db.get_tickets_frame()
+    return {
+        "by_priority": frame["Priority"].value_counts(),
+        "by_status": frame["Status"].value_counts(),
+        "priority_status": pd.crosstab(frame["Priority"], frame["Status"]),
+    }
+
+
+#Timing helpers
+def time_call(func: Callable[[], Any], repeat: int, setup: Callable[[], Any] = None) -> Dict[str, float]:
+    """Time func `repeat` times (running setup untimed before each) and summarize."""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {
+        "seconds": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples),
+    }
+
+
+class BenchmarkSuite:
+    """Runs every benchmark against one populated database."""
+
+    def __init__(self, db: DatabaseManager, rows: int, repeat: int):
+        self._db = db
+        self._rows = rows
+        self._repeat = repeat
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, name: str, func: Callable[[], Any], tracked: bool = True,
+               cold: bool = True, operations: int = 1, setup: Callable[[], Any] = None) -> None:
+        """Time one benchmark; cold runs clear the query cache first (unless setup is given)."""
+        if setup is None and cold:
+            setup = self._db.clear_cache
+        if not cold:
+            func()
+        result = time_call(func, self._repeat, setup)
+        result["tracked"] = tracked
+        result["operations"] = operations
+        result["per_op_us"] = result["seconds"] / operations * 1e6
+        self.results[name] = result
+        print(f"  {name:<36} {result['seconds'] * 1000:>10.2f} ms")
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        """Run every benchmark and return the results keyed by name."""
+        db = self._db
+        self.run_crud()
+
+        #Dashboard header (counters as setup_db.py enables them, and the full aggregate)
+        self.record("get_statistics", db.get_statistics)
+        self.record("statistics_compute", StatisticsEngine(db).compute)
+        self.record("get_statistics_cached", db.get_statistics, cold=False)
+
+        #Full table loads
+        self.record("get_all_incidents", db.get_all_incidents)
+        self.record("get_all_tickets", db.get_all_tickets)
+        self.record("get_all_datasets", db.get_all_datasets)
+        self.record("get_all_users", db.get_all_users)
+        self.record("get_all_incidents_cached", db.get_all_incidents, cold=False)
+
+        #Paging as the Cybersecurity and IT Operations pages do it
+        self.record("fetch_incidents_page_filtered",
+                    lambda: db.fetch_incidents_page(limit=50, severity=["High", "Critical"], status=["open"]))
+
+        #Object-conversion loops from the pages (rows fetched once, outside the timing)
+        incidents = db.fetch_all("SELECT * FROM cyber_incidents")
+        tickets = db.fetch_all("SELECT * FROM it_tickets")
+        datasets = db.fetch_all("SELECT * FROM datasets_metadata")
+        self.record("legacy_incident_objects", lambda: legacy_incident_objects(incidents), cold=False)
+        self.record("legacy_ticket_objects", lambda: legacy_ticket_objects(tickets), cold=False)
+        self.record("legacy_dataset_objects", lambda: legacy_dataset_objects(datasets), cold=False)
+        self.record("incident_collection_from_rows", lambda: IncidentCollection.from_rows(incidents), cold=False)
+        del incidents, tickets, datasets
+
+        #Data Science page DataFrame construction
+        self.record("legacy_incidents_dataframe", lambda: legacy_incidents_dataframe(db), tracked=False)
+        self.record("get_incidents_frame", db.get_incidents_frame)
+        self.record("get_tickets_frame", db.get_tickets_frame)
+        self.record("get_datasets_frame", db.get_datasets_frame)
+        #Same frame after a one-row write: only that row is refetched from the change log
+        target = db.fetch_one("SELECT MIN(id) AS id FROM cyber_incidents")["id"]
+        self.record("get_incidents_frame_delta", db.get_incidents_frame, cold=False, setup=lambda: db.execute_query(
+            "UPDATE cyber_incidents SET status = status WHERE id = ?", (target,)
+        ))
+
+        #Data Science trend charts: rollup reads vs. the old parse-and-group path
+        self.record("incident_trend_month", lambda: db.get_incident_trend("month", by="severity"))
+        self.record("ticket_trend_week", lambda: db.get_ticket_trend("week"))
+        self.record("legacy_monthly_incident_counts",
+                    lambda: db.get_incidents_frame()["Date"].dt.to_period("M").value_counts(), tracked=False)
+
+        #Data Science breakdowns: one NumPy load per process, then a cached bundle per rerun
+        engine = AnalyticsEngine(db)
+        self.record("analytics_bundle_load", lambda: (engine.reload(), engine.bundle()))
+        self.record("analytics_bundle_cached", engine.bundle, cold=False)
+        self.record("legacy_ticket_breakdowns", lambda: legacy_ticket_breakdowns(db), tracked=False)
+
+        #Cybersecurity page search (built once per process, then queried per keystroke)
+        index = SemanticIndex(db)
+        self.record("semantic_index_build", index.build)
+        self.record("semantic_search", lambda: index.search("unauthorized login attempt", limit=20), cold=False)
+        self.record("fts_search_common", lambda: db.search("unauthorized login", limit=20))
+        self.record("fts_search_prefix", lambda: db.search("ranso", domains=["incident"], limit=20))
+        return self.results
+
+    def run_crud(self) -> None:
+        """Time single-row insert, read, update and delete through DatabaseManager."""
+        db = self._db
+        created: List[int] = []
+
+        def insert():
+            created.clear()
+            for i in range(CRUD_OPERATIONS):
+                created.append(db.insert_incident(f"Benchmark {i}", "High", "open", "2024-06-01"))
+
+        def read():
+            for incident_id in created:
+                db.get_incident(incident_id)
+
+        def update():
+            for incident_id in created:
+                db.update_incident(incident_id, "Benchmark updated", "Low", "closed", "2024-06-02")
+
+        def delete():
+            for incident_id in created:
+                db.delete_incident(incident_id)
+
+        timings = {"insert": [], "read": [], "update": [], "delete": []}
+        for _ in range(self._repeat):
+            for name, func in (("insert", insert), ("read", read), ("update", update), ("delete", delete)):
+                start = time.perf_counter()
+                func()
+                timings[name].append(time.perf_counter() - start)
+
+        for name, samples in timings.items():
+            seconds = statistics.median(samples)
+            self.results[f"crud_{name}_incident"] = {
+                "seconds": seconds,
+                "min": min(samples),
+                "max": max(samples),
+                "tracked": True,
+                "operations": CRUD_OPERATIONS,
+                "per_op_us": seconds / CRUD_OPERATIONS * 1e6,
+            }
+            print(f"  {'crud_' + name + '_incident':<36} {seconds * 1000:>10.2f} ms "
+                  f"({seconds / CRUD_OPERATIONS * 1e6:.1f} us/op)")
+
+
+def run_size(rows: int, repeat: int, work_dir: Path) -> Dict[str, Any]:
+    """Build a synthetic database with `rows` per table and benchmark it."""
+    db_path = work_dir / f"bench_{rows}.db"
+    db = DatabaseManager(str(db_path))
+    print(f"\n== {rows:,} rows per table ==")
+    load = populate(db, rows)
+    StatisticsEngine(db).enable_counters()
+    for table, report in load.items():
+        print(f"  load {table:<31} {report['seconds'] * 1000:>10.2f} ms "
+              f"({report['rows_per_sec']:,.0f} rows/s)")
+    results = BenchmarkSuite(db, rows, repeat).run()
+    return {"load": load, "benchmarks": results}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return a message for each tracked benchmark that regressed beyond the threshold."""
+    regressions = []
+    for size, run in current["sizes"].items():
+        base_run = baseline.get("sizes", {}).get(size)
+        if not base_run:
+            continue
+        for name, result in run["benchmarks"].items():
+            base = base_run["benchmarks"].get(name)
+            if not base or not result.get("tracked") or not base.get("tracked"):
+                continue
+            if result["seconds"] - base["seconds"] < NOISE_FLOOR:
+                continue
+            change = result["seconds"] / base["seconds"] - 1 if base["seconds"] > 0 else float("inf")
+            if change > threshold:
+                regressions.append(
+                    f"{name} @ {size} rows: {base['seconds'] * 1000:.2f} ms -> "
+                    f"{result['seconds'] * 1000:.2f} ms (+{change:.0%})"
+                )
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the data layer and page data-prep paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="rows per table for each synthetic database (e.g. 10000 100000 1000000)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per benchmark")
+    parser.add_argument("--output", type=Path, help="write JSON results to this file")
+    parser.add_argument("--baseline", type=Path, help="JSON results from a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction (0.25 = 25%%)")
+    parser.add_argument("--work-dir", type=Path, help="folder for the synthetic databases (default: temp)")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "sizes": {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="cw2-bench-") as temp_dir:
+        work_dir = args.work_dir or Path(temp_dir)
+        work_dir.mkdir(parents=True, exist_ok=True)
+        for rows in args.sizes:
+            results["sizes"][str(rows)] = run_size(rows, args.repeat, work_dir)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2, sort_keys=True))
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"\nNo tracked benchmark regressed beyond {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Synthetic data generator for benchmarks"""
+import random
+from datetime import date, timedelta
+from typing import Dict, Iterator, Tuple
+
+SEVERITIES = ("Low", "Medium", "High", "Critical")
+PRIORITIES = ("Low", "Medium", "High", "Critical")
+STATUSES = ("open", "in progress", "resolved", "closed")
+SOURCES = ("MITRE ATT&CK", "Internal Systems", "OpenCTI", "Zeek", "Kaggle")
+CATEGORIES = ("Cybersecurity", "Analytics", "Threat Intel", "Logs", "Finance")
+INCIDENT_TITLES = ("Phishing attack", "Ransomware attempt", "Unauthorized login", "Data breach", "Malware")
+TICKET_TITLES = ("Laptop won't start", "VPN not connecting", "Email not syncing", "Printer offline", "Password reset")
+ROLES = ("user", "user", "user", "analyst", "admin")
+
+#A real bcrypt hash (of "benchmark") so seeded users look like registered ones
+PASSWORD_HASH = "$2b$12$tcYq1tIgRxEAo8nonpEljOcLNXS9nK70AVwhj4V5RZPEYOYTYl58q"
+
+START_DATE = date(2023, 1, 1)
+DATE_SPAN_DAYS = 730
+BATCH_SIZE = 50000
+
+
+def _day(rng: random.Random) -> str:
+    """Random ISO date inside the benchmark window."""
+    return (START_DATE + timedelta(days=rng.randrange(DATE_SPAN_DAYS))).isoformat()
+
+
+def incident_rows(count: int, rng: random.Random) -> Iterator[Tuple]:
+    """Yield (title, severity, status, date) rows."""
+    for i in range(count):
+        yield (f"{rng.choice(INCIDENT_TITLES)} #{i}", rng.choice(SEVERITIES), rng.choice(STATUSES), _day(rng))
+
+
+def ticket_rows(count: int, rng: random.Random) -> Iterator[Tuple]:
+    """Yield (title, priority, status, created_date) rows."""
+    for i in range(count):
+        yield (f"{rng.choice(TICKET_TITLES)} #{i}", rng.choice(PRIORITIES), rng.choice(STATUSES), _day(rng))
+
+
+def dataset_rows(count: int, rng: random.Random) -> Iterator[Tuple]:
+    """Yield (name, source, category, size) rows."""
+    for i in range(count):
+        yield (f"Dataset {i}", rng.choice(SOURCES), rng.choice(CATEGORIES), rng.randint(1, 5000))
+
+
+def user_rows(count: int, rng: random.Random) -> Iterator[Tuple]:
+    """Yield (username, password_hash, role) rows."""
+    for i in range(count):
+        yield (f"user{i:07d}", PASSWORD_HASH, rng.choice(ROLES))
+
+
+def _batches(rows: Iterator[Tuple], size: int = BATCH_SIZE) -> Iterator[list]:
+    """Group a row stream into lists so memory stays flat at 1M rows."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def populate(db, rows: int, seed: int = 42) -> Dict[str, Dict[str, float]]:
+    """Fill an empty database with `rows` incidents, tickets, datasets and users.
+
+    Returns the bulk insert report (rows, seconds, rows_per_sec) for each table.
+    """
+    rng = random.Random(seed)
+    loaders = {
+        "cyber_incidents": (db.bulk_insert_incidents, incident_rows),
+        "it_tickets": (db.bulk_insert_tickets, ticket_rows),
+        "datasets_metadata": (db.bulk_insert_datasets, dataset_rows),
+        "users": (lambda batch: db.execute_many(
+            "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)", batch
+        ), user_rows),
+    }
+
+    reports = {}
+    for table, (insert, generate) in loaders.items():
+        with db.transaction() as report:
+            for batch in _batches(generate(rows, rng)):
+                insert(batch)
+        reports[table] = {
+            "rows": report["rows"],
+            "seconds": report["seconds"],
+            "rows_per_sec": report["rows_per_sec"],
+        }
+    return reports
@@ -3,6 +3,9 @@
 class Dataset:
     """Represents a data science dataset in the platform."""
     
+    #Slots
+    __slots__ = ("__id", "__name", "__source", "__category", "__size")
+    
     def __init__(self, dataset_id: int, name: str, source: str, 
                  category: str, size: int):
         self.__id = dataset_id
@@ -0,0 +1,169 @@
+"""Columnar entity collection classes"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from models.security_incident import SecurityIncident
+from models.it_ticket import ITTicket
+from models.dataset import Dataset
+
+#Column kinds
+NUMERIC = "numeric"
+CATEGORY = "category"
+TEXT = "text"
+
+
+class EntityCollection:
+    """Stores entity fields in parallel NumPy columns and builds entity objects on demand.
+
+    Subclasses set entity_class and fields as (constructor argument, row key, kind) tuples.
+    Category columns are integer codes into a shared list of labels.
+    """
+
+    entity_class = None
+    fields: Tuple[Tuple[str, str, str], ...] = ()
+
+    def __init__(self, columns: Dict[str, np.ndarray], categories: Dict[str, List[str]]):
+        self._columns = columns
+        self._categories = categories
+        self._kinds = {key: kind for _, key, kind in self.fields}
+        self._length = len(next(iter(columns.values()))) if columns else 0
+
+    #Constructors
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "EntityCollection":
+        """Build a collection from database rows (dicts keyed by column name)."""
+        buffers: Dict[str, list] = {key: [] for _, key, _ in cls.fields}
+        for row in rows:
+            for key, buffer in buffers.items():
+                buffer.append(row.get(key))
+
+        columns, categories = {}, {}
+        for _, key, kind in cls.fields:
+            values = buffers[key]
+            if kind == NUMERIC:
+                columns[key] = np.array([0 if v is None else v for v in values], dtype=np.int64)
+            elif kind == CATEGORY:
+                labels: Dict[str, int] = {}
+                codes = [labels.setdefault("" if v is None else v, len(labels)) for v in values]
+                columns[key] = np.array(codes, dtype=np.int32)
+                categories[key] = list(labels)
+            else:
+                column = np.empty(len(values), dtype=object)
+                column[:] = ["" if v is None else v for v in values]
+                columns[key] = column
+        return cls(columns, categories)
+
+    #Sequence protocol
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Any]:
+        for position in range(self._length):
+            yield self._build(position)
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            if item < 0:
+                item += self._length
+            if not 0 <= item < self._length:
+                raise IndexError("collection index out of range")
+            return self._build(int(item))
+        #Slices, index arrays and boolean masks return a smaller collection
+        return self._subset(np.arange(self._length)[item])
+
+    def _value(self, key: str, position: int) -> Any:
+        """Return one field as a plain Python value."""
+        kind = self._kinds[key]
+        raw = self._columns[key][position]
+        if kind == NUMERIC:
+            return int(raw)
+        if kind == CATEGORY:
+            return self._categories[key][raw]
+        return raw
+
+    def _build(self, position: int) -> Any:
+        """Create the entity object for one row."""
+        kwargs = {arg: self._value(key, position) for arg, key, _ in self.fields}
+        return self.entity_class(**kwargs)
+
+    def _subset(self, positions: np.ndarray) -> "EntityCollection":
+        """Return a collection holding only the given row positions."""
+        columns = {key: column[positions] for key, column in self._columns.items()}
+        return type(self)(columns, self._categories)
+
+    #Vectorized operations
+    def column(self, key: str) -> np.ndarray:
+        """Return a column as an array of values (labels for category columns)."""
+        if self._kinds[key] == CATEGORY:
+            labels = np.array(self._categories[key], dtype=object)
+            return labels[self._columns[key]] if self._length else np.empty(0, dtype=object)
+        return self._columns[key]
+
+    def filter(self, mask: Optional[np.ndarray] = None, **criteria) -> "EntityCollection":
+        """Keep rows matching a boolean mask and/or field=value (or field=[values]) criteria."""
+        keep = np.ones(self._length, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        for key, wanted in criteria.items():
+            if key not in self._kinds:
+                raise KeyError(f"Unknown field: {key}")
+            values = list(wanted) if isinstance(wanted, (list, tuple, set)) else [wanted]
+            column = self._columns[key]
+            if self._kinds[key] == CATEGORY:
+                lookup = {label: code for code, label in enumerate(self._categories[key])}
+                values = [lookup[v] for v in values if v in lookup]
+            keep &= np.isin(column, values)
+        return self._subset(np.flatnonzero(keep))
+
+    def count_by(self, key: str) -> Dict[Any, int]:
+        """Count rows per distinct value of a field."""
+        column = self._columns[key]
+        if self._kinds[key] == CATEGORY:
+            counts = np.bincount(column, minlength=len(self._categories[key]))
+            return {label: int(n) for label, n in zip(self._categories[key], counts) if n}
+        values, counts = np.unique(column, return_counts=True)
+        return {value: int(n) for value, n in zip(values.tolist(), counts)}
+
+    def sum(self, key: str) -> int:
+        """Sum a numeric field."""
+        if self._kinds[key] != NUMERIC:
+            raise TypeError(f"Cannot sum non-numeric field: {key}")
+        return int(self._columns[key].sum())
+
+
+class IncidentCollection(EntityCollection):
+    """Columnar collection of SecurityIncident rows."""
+
+    entity_class = SecurityIncident
+    fields = (
+        ("incident_id", "id", NUMERIC),
+        ("title", "title", TEXT),
+        ("severity", "severity", CATEGORY),
+        ("status", "status", CATEGORY),
+        ("date", "date", TEXT),
+        ("description", "description", TEXT),
+    )
+
+
+class TicketCollection(EntityCollection):
+    """Columnar collection of ITTicket rows."""
+
+    entity_class = ITTicket
+    fields = (
+        ("ticket_id", "id", NUMERIC),
+        ("title", "title", TEXT),
+        ("priority", "priority", CATEGORY),
+        ("status", "status", CATEGORY),
+        ("created_date", "created_date", TEXT),
+        ("assigned_to", "assigned_to", TEXT),
+    )
+
+
+class DatasetCollection(EntityCollection):
+    """Columnar collection of Dataset rows."""
+
+    entity_class = Dataset
+    fields = (
+        ("dataset_id", "id", NUMERIC),
+        ("name", "name", TEXT),
+        ("source", "source", CATEGORY),
+        ("category", "category", CATEGORY),
+        ("size", "size", NUMERIC),
+    )
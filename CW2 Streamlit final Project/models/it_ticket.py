@@ -3,6 +3,9 @@
 class ITTicket:
     """Represents an IT support ticket."""
     
+    #Slots
+    __slots__ = ("__id", "__title", "__priority", "__status", "__created_date", "__assigned_to")
+    
     def __init__(self, ticket_id: int, title: str, priority: str, 
                  status: str, created_date: str, assigned_to: str = ""):
         
@@ -1,8 +1,19 @@
 """Security Incident entity class"""
 
+#Integer level for each severity name (unknown severities map to 0)
+SEVERITY_LEVELS = {
+    "low": 1,
+    "medium": 2,
+    "high": 3,
+    "critical": 4,
+}
+
 class SecurityIncident:
     """Represents a cybersecurity incident in the platform."""
     
+    #Slots
+    __slots__ = ("__id", "__title", "__severity", "__status", "__date", "__description")
+    
     def __init__(self, incident_id: int, title: str, severity: str, 
                  status: str, date: str, description: str = ""):
         """Initialize SecurityIncident instance."""
@@ -45,13 +56,7 @@ class SecurityIncident:
     
     def get_severity_level(self) -> int:
         """Return an integer severity level ."""
-        mapping = {
-            "low": 1,
-            "medium": 2,
-            "high": 3,
-            "critical": 4,
-        }
-        return mapping.get(self.__severity.lower(), 0)
+        return SEVERITY_LEVELS.get(self.__severity.lower(), 0)
     
     #String representation
     def __str__(self) -> str:
@@ -4,6 +4,9 @@ from typing import Optional
 class User:
     """Represents a user in the Multi-Domain Intelligence Platform."""
     
+    #Slots
+    __slots__ = ("__username", "__password_hash", "__role", "__id", "__created_at")
+    
     def __init__(self, username: str, password_hash: str, role: str, user_id: Optional[int] = None, created_at: str = None):
         """Initialize User instance."""
         self.__username = username
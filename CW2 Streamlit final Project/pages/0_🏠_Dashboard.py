@@ -8,17 +8,13 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 from services.database_manager import DatabaseManager
-from services.ai_assistant import AIAssistant
-from models.security_incident import SecurityIncident
-from models.dataset import Dataset
-from models.it_ticket import ITTicket
+from services.ai_assistant import AIAssistant, ANALYSIS_TEMPERATURE
+from services.response_cache import ResponseCache
+from services.context_builder import ContextBuilder, rows_from_frame
+from utils.session import require_login
 
 # Authentication check
-if "logged_in" not in st.session_state or not st.session_state.logged_in:
-    st.error("You must be logged in to view this page")
-    if st.button("Go to login"):
-        st.switch_page("pages/1_🔐_Login.py")
-    st.stop()
+require_login()
 
 # Page configuration
 st.set_page_config(
@@ -47,81 +43,69 @@ except:
     openai_api_key = None
     ai_available = False
 
-# Get all data function
-def load_all_data():
-    """Load all data from database"""
-    incident_data = db.get_all_incidents()
-    dataset_data = db.get_all_datasets()
-    ticket_data = db.get_all_tickets()
-    
-    # Convert to objects
-    incidents = []
-    for data in incident_data:
-        incidents.append(SecurityIncident(
-            incident_id=data["id"],
-            title=data["title"],
-            severity=data["severity"],
-            status=data["status"],
-            date=data["date"]
-        ))
-    
-    datasets = []
-    for data in dataset_data:
-        datasets.append(Dataset(
-            dataset_id=data["id"],
-            name=data["name"],
-            source=data["source"],
-            category=data["category"],
-            size=data["size"]
-        ))
-    
-    tickets = []
-    for data in ticket_data:
-        tickets.append(ITTicket(
-            ticket_id=data["id"],
-            title=data["title"],
-            priority=data["priority"],
-            status=data["status"],
-            created_date=data["created_date"]
-        ))
-    
-    return incidents, datasets, tickets
-
-# Load the data
-incidents, datasets, tickets = load_all_data()
+# Load typed DataFrames straight from the database (no intermediate dicts or objects)
+df_incidents = db.get_incidents_frame()
+df_datasets = db.get_datasets_frame()
+df_tickets = db.get_tickets_frame()
 
 #Overview 
 st.header("📊 Overview")
 
 col1, col2, col3, col4 = st.columns(4)
 
+# Header counters come from one statistics query instead of scanning the loaded lists
+try:
+    stats = db.get_statistics()
+except Exception:
+    stats = {
+        "incidents": {"total": 0, "open": 0},
+        "datasets": {"total": 0, "total_size": 0},
+        "tickets": {"total": 0, "open": 0},
+        "users": {"total": 0}
+    }
+
 with col1:
     st.metric(
         "Cyber Incidents",
-        len(incidents),
-        f"{len([i for i in incidents if i.get_status() in ['open', 'in progress']])} open"
+        stats["incidents"]["total"],
+        f"{stats['incidents']['open']} open"
     )
 
 with col2:
     st.metric(
         "Datasets",
-        len(datasets),
-        f"{sum([d.get_size() for d in datasets]):,} MB" if datasets else "0 MB"
+        stats["datasets"]["total"],
+        f"{stats['datasets']['total_size']:,} MB"
     )
 
 with col3:
     st.metric(
         "IT Tickets",
-        len(tickets),
-        f"{len([t for t in tickets if t.get_status() in ['open', 'in progress']])} open"
+        stats["tickets"]["total"],
+        f"{stats['tickets']['open']} open"
     )
 
 with col4:
-    try:
-        users = db.get_all_users()
-        st.metric("Users", len(users))
-    except:
-        st.metric("Users", 0)
+    st.metric("Users", stats["users"]["total"])
+
+st.markdown("---")
+
+#Keyword search (SQLite FTS5, ranked by BM25)
+st.header("🔍 Search")
+
+search_query = st.text_input("Search incidents, tickets, datasets and users",
+                             placeholder="e.g., phish, vpn, critical", key="dashboard_search")
+if search_query.strip():
+    #User accounts are only searchable by admins
+    search_domains = ["incident", "ticket", "dataset"]
+    if st.session_state.user_role == "admin":
+        search_domains.append("user")
+    search_results = db.search(search_query, domains=search_domains, limit=20)
+    if search_results:
+        for result in search_results:
+            st.markdown(f"**{result['domain'].title()} #{result['id']}** · {result['highlight']} · {result['snippet']}")
+    else:
+        st.info("No matches found.")
 
 st.markdown("---")
 
@@ -132,11 +116,8 @@ viz_col1, viz_col2 = st.columns(2)
 
 with viz_col1:
     # Incident Severity Distribution
-    if incidents:
-        severity_counts = {}
-        for inc in incidents:
-            severity = inc.get_severity()
-            severity_counts[severity] = severity_counts.get(severity, 0) + 1
+    if not df_incidents.empty:
+        severity_counts = df_incidents["Severity"].value_counts().to_dict()
         
         if severity_counts:
             fig = px.pie(
@@ -159,11 +140,8 @@ with viz_col1:
 
 with viz_col2:
     # Ticket Priority Distribution
-    if tickets:
-        priority_counts = {}
-        for ticket in tickets:
-            priority = ticket.get_priority()
-            priority_counts[priority] = priority_counts.get(priority, 0) + 1
+    if not df_tickets.empty:
+        priority_counts = df_tickets["Priority"].value_counts().to_dict()
         
         if priority_counts:
             fig = px.pie(
@@ -185,9 +163,9 @@ with viz_col2:
         st.info("No tickets to visualize")
 
 # Dataset Size Distribution
-if datasets:
-    dataset_names = [d.get_name()[:20] + "..." if len(d.get_name()) > 20 else d.get_name() for d in datasets]
-    dataset_sizes = [d.get_size() for d in datasets]
+if not df_datasets.empty:
+    dataset_names = [name[:20] + "..." if len(name) > 20 else name for name in df_datasets["Name"]]
+    dataset_sizes = df_datasets["Size_MB"].tolist()
     
     fig = px.bar(
         x=dataset_names,
@@ -239,57 +217,67 @@ else:
     if st.button("Generate AI Analysis", type="primary", use_container_width=True):
         with st.spinner("AI is analyzing data..."):
             try:
-                ai = AIAssistant(api_key=openai_api_key)
+                ai = AIAssistant(api_key=openai_api_key, cache=ResponseCache(db))
                 
-                # Prepare data based on domain
+                # Prepare data based on domain (ranked, deduplicated and fitted to the token budget)
+                builder = ContextBuilder()
                 analysis_data = ""
+                packed = None
                 
                 if analysis_domain == "Cyber Incidents":
                     ai.set_system_prompt("You are a senior cybersecurity analyst.")
-                    filtered_incidents = incidents
+                    filtered_incidents = df_incidents
                     
                     if scope == "Critical/High Priority Only":
-                        filtered_incidents = [i for i in incidents 
-                                            if i.get_severity() in ["Critical", "High"]]
+                        filtered_incidents = df_incidents[df_incidents["Severity"].isin(["Critical", "High"])]
                     
-                    analysis_data = "\n".join([
-                        f"{i+1}. {inc.get_title()} | Severity: {inc.get_severity()} | Status: {inc.get_status()} | Date: {inc.get_date()}"
-                        for i, inc in enumerate(filtered_incidents)
-                    ])
+                    packed = builder.pack("incident", rows_from_frame(filtered_incidents, {
+                        "Title": "title", "Severity": "severity", "Status": "status", "Date": "date"
+                    }))
                 
                 elif analysis_domain == "Datasets":
                     ai.set_system_prompt("You are a data management and governance expert.")
-                    filtered_datasets = datasets
+                    filtered_datasets = df_datasets
                     
                     if scope == "Critical/High Priority Only":
-                        filtered_datasets = [d for d in datasets if d.get_size() > 1000]  
+                        filtered_datasets = df_datasets[df_datasets["Size_MB"] > 1000]
                     
-                    analysis_data = "\n".join([
-                        f"{i+1}. {ds.get_name()} | Source: {ds.get_source()} | Category: {ds.get_category()} | Size: {ds.get_size()}MB"
-                        for i, ds in enumerate(filtered_datasets)
-                    ])
+                    packed = builder.pack("dataset", rows_from_frame(filtered_datasets, {
+                        "Name": "name", "Source": "source", "Category": "category", "Size_MB": "size"
+                    }))
                 
                 elif analysis_domain == "IT Tickets":
                     ai.set_system_prompt("You are an IT service management expert.")
-                    filtered_tickets = tickets
+                    filtered_tickets = df_tickets
                     
                     if scope == "Critical/High Priority Only":
-                        filtered_tickets = [t for t in tickets 
-                                          if t.get_priority() in ["Critical", "High"]]
+                        filtered_tickets = df_tickets[df_tickets["Priority"].isin(["Critical", "High"])]
                     
-                    analysis_data = "\n".join([
-                        f"{i+1}. {t.get_title()} | Priority: {t.get_priority()} | Status: {t.get_status()} | Created: {t.get_created_date()}"
-                        for i, t in enumerate(filtered_tickets)
-                    ])
+                    packed = builder.pack("ticket", rows_from_frame(filtered_tickets, {
+                        "Title": "title", "Priority": "priority", "Status": "status", "Created_Date": "created_date"
+                    }))
                 
                 else:  # Cross-Domain Analysis
                     ai.set_system_prompt("You are a multi-domain intelligence analyst expert in cybersecurity, data, and IT operations.")
                     
-                    inc_summary = f"Incidents ({len(incidents)}): " + ", ".join([f"{i.get_severity()}:{i.get_status()}" for i in incidents[:3]])
-                    ds_summary = f"Datasets ({len(datasets)}): " + ", ".join([f"{d.get_category()}:{d.get_size()}MB" for d in datasets[:3]])
-                    tk_summary = f"Tickets ({len(tickets)}): " + ", ".join([f"{t.get_priority()}:{t.get_status()}" for t in tickets[:3]])
-                    
-                    analysis_data = f"Cross-Domain Summary:\n- {inc_summary}\n- {ds_summary}\n- {tk_summary}"
+                    #Whole-table briefing via map-reduce summaries (checkpointed, so reruns resume)
+                    summary = ai.summarize_database(db)
+                    analysis_data = "Cross-Domain Summary:\n" + "\n\n".join(
+                        f"{kind.title()}s ({count:,} rows):\n{summary['tables'][kind]}"
+                        for kind, count in (("incident", len(df_incidents)), ("ticket", len(df_tickets)),
+                                            ("dataset", len(df_datasets)))
+                    ) + f"\n\nBriefing:\n{summary['briefing']}"
+                    st.caption(
+                        f"Summarized every row with {summary['metrics']['calls']} model calls "
+                        f"in {summary['metrics']['seconds']:.1f}s"
+                    )
+                
+                if packed is not None:
+                    analysis_data = packed["text"]
+                    st.caption(
+                        f"Listed {packed['included']:,} of {packed['rows']:,} rows "
+                        f"(~{packed['tokens']:,} tokens, {packed['omitted']:,} summarized)"
+                    )
                 
                 # Generate prompt
                 prompt = f"""As an expert in {analysis_domain.lower()}, analyze the following data:
@@ -308,7 +296,8 @@ Please provide:
 
 Format with clear sections, bullet points, and prioritize by impact."""
                 
-                ai_output = ai.send_message(prompt)
+                #Identical analyses (same data, type and scope) are served from the response cache
+                ai_output = ai.send_message(prompt, temperature=ANALYSIS_TEMPERATURE, use_cache=True)
                 
                 # Display results
                 st.subheader("AI Analysis Report")
@@ -329,18 +318,9 @@ with tab_incidents:
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        if incidents:
-            incident_rows = []
-            for inc in incidents[:5]:  
-                incident_rows.append({
-                    "ID": inc.get_id(),
-                    "Title": inc.get_title(),
-                    "Severity": inc.get_severity(),
-                    "Status": inc.get_status(),
-                    "Date": inc.get_date()
-                })
-            df_incidents = pd.DataFrame(incident_rows)
-            st.dataframe(df_incidents, use_container_width=True, hide_index=True)
+        if not df_incidents.empty:
+            recent_incidents = df_incidents.head(5)[["ID", "Title", "Severity", "Status", "Date"]]
+            st.dataframe(recent_incidents, use_container_width=True, hide_index=True)
         else:
             st.info("No incidents found")
     
@@ -348,7 +328,7 @@ with tab_incidents:
         st.subheader("Quick Actions")
         if st.button("➕ Add Incident", key="quick_add_incident"):
             st.switch_page("pages/2_🛡_Cybersecurity.py")
-        if incidents and st.button("✏️ Edit Incident", key="quick_edit_incident"):
+        if not df_incidents.empty and st.button("✏️ Edit Incident", key="quick_edit_incident"):
             st.switch_page("pages/2_🛡_Cybersecurity.py")
         if st.button("📊 View All", key="quick_view_incidents"):
             st.switch_page("pages/2_🛡_Cybersecurity.py")
@@ -357,18 +337,9 @@ with tab_datasets:
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        if datasets:
-            dataset_rows = []
-            for ds in datasets[:5]:  
-                dataset_rows.append({
-                    "ID": ds.get_id(),
-                    "Name": ds.get_name(),
-                    "Source": ds.get_source(),
-                    "Category": ds.get_category(),
-                    "Size (MB)": ds.get_size()
-                })
-            df_datasets = pd.DataFrame(dataset_rows)
-            st.dataframe(df_datasets, use_container_width=True, hide_index=True)
+        if not df_datasets.empty:
+            recent_datasets = df_datasets.head(5).rename(columns={"Size_MB": "Size (MB)"})
+            st.dataframe(recent_datasets, use_container_width=True, hide_index=True)
         else:
             st.info("No datasets found")
     
@@ -376,7 +347,7 @@ with tab_datasets:
         st.subheader("Quick Actions")
         if st.button("➕ Add Dataset", key="quick_add_dataset"):
             st.switch_page("pages/2_🛡_Cybersecurity.py")
-        if datasets and st.button("✏️ Edit Dataset", key="quick_edit_dataset"):
+        if not df_datasets.empty and st.button("✏️ Edit Dataset", key="quick_edit_dataset"):
             st.switch_page("pages/2_🛡_Cybersecurity.py")
         if st.button("📊 View All", key="quick_view_datasets"):
             st.switch_page("pages/2_🛡_Cybersecurity.py")
@@ -385,18 +356,9 @@ with tab_tickets:
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        if tickets:
-            ticket_rows = []
-            for t in tickets[:5]: 
-                ticket_rows.append({
-                    "ID": t.get_id(),
-                    "Title": t.get_title(),
-                    "Priority": t.get_priority(),
-                    "Status": t.get_status(),
-                    "Created": t.get_created_date()
-                })
-            df_tickets = pd.DataFrame(ticket_rows)
-            st.dataframe(df_tickets, use_container_width=True, hide_index=True)
+        if not df_tickets.empty:
+            recent_tickets = df_tickets.head(5).rename(columns={"Created_Date": "Created"})
+            st.dataframe(recent_tickets, use_container_width=True, hide_index=True)
         else:
             st.info("No tickets found")
     
@@ -404,7 +366,7 @@ with tab_tickets:
         st.subheader("Quick Actions")
         if st.button("➕ Add Ticket", key="quick_add_ticket"):
             st.switch_page("pages/4_💻_IT_Operations.py")
-        if tickets and st.button("✏️ Edit Ticket", key="quick_edit_ticket"):
+        if not df_tickets.empty and st.button("✏️ Edit Ticket", key="quick_edit_ticket"):
             st.switch_page("pages/4_💻_IT_Operations.py")
         if st.button("📊 View All", key="quick_view_tickets"):
             st.switch_page("pages/4_💻_IT_Operations.py")
@@ -2,6 +2,7 @@
 import streamlit as st
 from services.database_manager import DatabaseManager
 from services.auth_manager import AuthManager
+from utils.session import client_source, current_session, start_session
 
 # Initialize session state variables if they don't exist
 if "logged_in" not in st.session_state:
@@ -23,7 +24,7 @@ st.set_page_config(
 st.title(" My Security Intelligence Platform")
 
 # Redirect if already logged in
-if st.session_state.logged_in:
+if current_session() is not None:
     st.success(f"Welcome back, **{st.session_state.username}**!")
     if st.button("Go to Dashboard"):
         st.switch_page("Home.py")
@@ -53,21 +54,17 @@ with tab_login:
                 st.error("Please enter both username and password.")
             else:
                 # Use authentication manager to authenticate the user
-                user = auth.login_user(login_username, login_password)
+                source = client_source()
+                user = auth.login_user(login_username, login_password, source)
                 if user:
-                    st.session_state.logged_in = True
-                    st.session_state.username = user.get_username()
-                    st.session_state.user_role = user.get_role()
-                    st.session_state.user_obj = user
+                    start_session(user.get_username(), user.get_role(), user)
                     st.success("Login was successful!")
                     st.switch_page("Home.py")
                 else:
-                    # Check session users 
-                    if "users" in st.session_state and login_username in st.session_state.users and st.session_state.users[login_username] == login_password:
-                        st.session_state.logged_in = True
-                        st.session_state.username = login_username
-                        st.success("Login was successful)!")
-                        st.switch_page("Home.py")
+                    #Locked accounts get the lockout message, whether or not this attempt tripped it
+                    locked_for = auth.lockout_remaining(login_username, source)
+                    if locked_for > 0:
+                        st.error(f"Too many failed login attempts. Try again in {int(locked_for) + 1} seconds.")
                     else:
                         st.error("Invalid username or password.")
 
@@ -91,13 +88,7 @@ with tab_register:
         else:
             # Use AuthManager to register
             if auth.register_user(new_username, new_password):
-                # Initialize session users dict if not exists
-                if "users" not in st.session_state:
-                    st.session_state.users = {}
-                
-                # Add to session for immediate login
-                st.session_state.users[new_username] = new_password
-                
+                #The account is in the database, so it logs in through AuthManager like any other
                 st.success("Account created successfully!")
                 st.info("You can now log in with your credentials.")
                 st.rerun()
@@ -4,17 +4,14 @@ import pandas as pd
 import datetime
 from services.database_manager import DatabaseManager
 from services.auth_manager import AuthManager
-from models.security_incident import SecurityIncident
-from models.dataset import Dataset
-from models.it_ticket import ITTicket
+from services.semantic_index import SEARCH_SOURCES, get_semantic_index
+from models.entity_collections import IncidentCollection, DatasetCollection, TicketCollection
+from utils.pagination import PAGE_SIZE_OPTIONS, load_page, render_pager, select_entity
+from utils.session import end_session, require_login, session_store
 
 #Protect the page
 #Make sure only logged-in users can access the dashboard
-if "logged_in" not in st.session_state or not st.session_state.logged_in:
-    st.error("You must be logged in to view this page")
-    if st.button("Go to login"):
-        st.switch_page("pages/1_🔐_Login.py")
-    st.stop()
+session = require_login()
 
 #Page configuration
 st.set_page_config(page_title="Cybersecurity Dashboard", page_icon="🛡️", layout="wide")
@@ -59,21 +56,56 @@ except Exception as e:
     with col4:
         st.metric("Users", 0)
 
+# Search
+st.header("🔎 Search Incidents and Tickets")
+
+search_col1, search_col2 = st.columns([3, 1])
+with search_col1:
+    search_query = st.text_input("Search titles", placeholder="e.g., phishing email, VPN outage",
+                                 key="semantic_search_query")
+with search_col2:
+    search_kinds = st.multiselect("Search in", list(SEARCH_SOURCES), default=list(SEARCH_SOURCES),
+                                  format_func=lambda kind: f"{kind.title()}s", key="semantic_search_kinds")
+
+if search_query.strip() and search_kinds:
+    #The index is shared by every session and built on the first search
+    search_index = get_semantic_index(db)
+    with st.spinner("Searching..."):
+        search_results = search_index.search(search_query, kinds=search_kinds, limit=20)
+    if search_results:
+        df_results = pd.DataFrame([{
+            "Type": result["kind"].title(),
+            "ID": result["id"],
+            "Title": result["text"],
+            "Match": round(result["score"], 3)
+        } for result in search_results])
+        st.dataframe(df_results, use_container_width=True, hide_index=True)
+    else:
+        st.info("No matching incidents or tickets.")
+    search_metrics = search_index.last_search_metrics
+    st.caption(f"Searched {search_metrics['rows']:,} rows in {search_metrics['seconds'] * 1000:.1f} ms")
+
+#Rows per page for every table on this page
+page_size = st.sidebar.selectbox("Rows per page", PAGE_SIZE_OPTIONS, index=1, key="cyber_page_size")
+
 # Cyber Incidents
 st.header("🔒 Cyber Incidents")
 
-incident_data = db.get_all_incidents()
+#Filters are applied in SQL, and only the current page is loaded
+filter_col1, filter_col2 = st.columns(2)
+with filter_col1:
+    incident_severity_filter = st.multiselect("Filter by severity", ["Low", "Medium", "High", "Critical"],
+                                              key="incident_severity_filter")
+with filter_col2:
+    incident_status_filter = st.multiselect("Filter by status", ["open", "in progress", "closed", "resolved"],
+                                            key="incident_status_filter")
+
+incident_page = load_page("incidents", db.fetch_incidents_page, page_size,
+                          severity=incident_severity_filter, status=incident_status_filter)
+incident_data = incident_page["rows"]
 
-# Convert to Security Incident objects
-incidents = []
-for data in incident_data:
-    incidents.append(SecurityIncident(
-        incident_id=data["id"],
-        title=data["title"],
-        severity=data["severity"],
-        status=data["status"],
-        date=data["date"]
-    ))
+# Columnar collection of Security Incident objects
+incidents = IncidentCollection.from_rows(incident_data)
 
 # Show the incidents using object methods
 if incidents:
@@ -92,6 +124,7 @@ if incidents:
     st.dataframe(df_incidents, use_container_width=True, hide_index=True)
 else:
     st.info("No incidents in the database.")
+render_pager("incidents", incident_page)
 
 # CRUD Operations for Incidents (add incident, edit incident, and delete incident)
 tab1, tab2, tab3 = st.tabs(["➕ Add Incident", "✏️ Edit Incident", "🗑️ Delete Incident"])
@@ -115,60 +148,48 @@ with tab1:
 
 #Edit Incident
 with tab2:
-    if incidents:
-        st.subheader("Edit Existing Incident")
-        incident_options = {f"{incident.get_id()}: {incident.get_title()}": incident for incident in incidents}
-        selected_incident_key = st.selectbox("Select Incident to Edit", list(incident_options.keys()))
-        
-        if selected_incident_key:
-            incident = incident_options[selected_incident_key]
+    st.subheader("Edit Existing Incident")
+    incident = select_entity("edit_incident", "incident", "Edit", incidents, db.get_incident,
+                             lambda incident: f"{incident.get_id()}: {incident.get_title()}")
+    
+    if incident is not None:
+        with st.form("edit_incident_form"):
+            new_title = st.text_input("Title", value=incident.get_title())
+            new_severity = st.selectbox("Severity", ["Low", "Medium", "High", "Critical"], 
+                                      index=["Low", "Medium", "High", "Critical"].index(incident.get_severity()) 
+                                      if incident.get_severity() in ["Low", "Medium", "High", "Critical"] else 0)
+            new_status = st.selectbox("Status", ["open", "in progress", "closed", "resolved"], 
+                                    index=["open", "in progress", "closed", "resolved"].index(incident.get_status()) 
+                                    if incident.get_status() in ["open", "in progress", "closed", "resolved"] else 0)
+            new_date = st.text_input("Date (YYYY-MM-DD)", value=incident.get_date())
             
-            with st.form("edit_incident_form"):
-                new_title = st.text_input("Title", value=incident.get_title())
-                new_severity = st.selectbox("Severity", ["Low", "Medium", "High", "Critical"], 
-                                          index=["Low", "Medium", "High", "Critical"].index(incident.get_severity()) 
-                                          if incident.get_severity() in ["Low", "Medium", "High", "Critical"] else 0)
-                new_status = st.selectbox("Status", ["open", "in progress", "closed", "resolved"], 
-                                        index=["open", "in progress", "closed", "resolved"].index(incident.get_status()) 
-                                        if incident.get_status() in ["open", "in progress", "closed", "resolved"] else 0)
-                new_date = st.text_input("Date (YYYY-MM-DD)", value=incident.get_date())
-                
-                submitted = st.form_submit_button("Update Incident")
-                if submitted:
-                    db.update_incident(incident.get_id(), new_title, new_severity, new_status, new_date)
-                    st.success("Incident updated successfully!")
-                    st.rerun()
-    else:
-        st.info("No incidents to edit.")
+            submitted = st.form_submit_button("Update Incident")
+            if submitted:
+                db.update_incident(incident.get_id(), new_title, new_severity, new_status, new_date)
+                st.success("Incident updated successfully!")
+                st.rerun()
 
 #Delete incident
 with tab3:
-    if incidents:
-        st.subheader("Delete Incident")
-        delete_options = [f"{incident.get_id()}: {incident.get_title()}" for incident in incidents]
-        incident_to_delete = st.selectbox("Select Incident to Delete", delete_options)
-        
-        if incident_to_delete and st.button("Delete Incident", type="primary"):
-            incident_id = int(incident_to_delete.split(":")[0])
-            db.delete_incident(incident_id)
-            st.success("Incident deleted successfully!")
-            st.rerun()
-    else:
-        st.info("No incidents to delete.")
+    st.subheader("Delete Incident")
+    incident = select_entity("delete_incident", "incident", "Delete", incidents, db.get_incident,
+                             lambda incident: f"{incident.get_id()}: {incident.get_title()}")
+    
+    if incident is not None and st.button("Delete Incident", type="primary"):
+        db.delete_incident(incident.get_id())
+        st.success("Incident deleted successfully!")
+        st.rerun()
 
 # Datasets Section
 st.header("📁 Datasets")
 
-dataset_data = db.get_all_datasets()
-datasets = []
-for data in dataset_data:
-    datasets.append(Dataset(
-        dataset_id=data["id"],
-        name=data["name"],
-        source=data["source"],
-        category=data["category"],
-        size=data["size"]
-    ))
+dataset_category_filter = st.multiselect("Filter by category",
+                                         ["Cybersecurity", "Analytics", "Threat Intel", "Logs", "Other"],
+                                         key="dataset_category_filter")
+
+dataset_page = load_page("datasets", db.fetch_datasets_page, page_size, category=dataset_category_filter)
+dataset_data = dataset_page["rows"]
+datasets = DatasetCollection.from_rows(dataset_data)
 
 #Display datasets
 if datasets:
@@ -187,6 +208,7 @@ if datasets:
     st.dataframe(df_datasets, use_container_width=True, hide_index=True)
 else:
     st.info("No datasets found.")
+render_pager("datasets", dataset_page)
 
 # CRUD Operations for Datasets (Add Dataset, Edit Dataset, Delete Dataset)
 tab4, tab5, tab6 = st.tabs(["➕ Add Dataset", "✏️ Edit Dataset", "🗑️ Delete Dataset"])
@@ -209,57 +231,50 @@ with tab4:
                 st.rerun()
 
 with tab5:
-    if datasets:
-        st.subheader("Edit Existing Dataset")
-        dataset_options = {f"{dataset.get_id()}: {dataset.get_name()}": dataset for dataset in datasets}
-        selected_dataset_key = st.selectbox("Select Dataset to Edit", list(dataset_options.keys()))
-        
-        if selected_dataset_key:
-            dataset = dataset_options[selected_dataset_key]
+    st.subheader("Edit Existing Dataset")
+    dataset = select_entity("edit_dataset", "dataset", "Edit", datasets, db.get_dataset,
+                            lambda dataset: f"{dataset.get_id()}: {dataset.get_name()}")
+    
+    if dataset is not None:
+        with st.form("edit_dataset_form"):
+            new_name = st.text_input("Name", value=dataset.get_name())
+            new_source = st.text_input("Source", value=dataset.get_source())
+            new_category = st.selectbox("Category", ["Cybersecurity", "Analytics", "Threat Intel", "Logs", "Other"],
+                                      index=["Cybersecurity", "Analytics", "Threat Intel", "Logs", "Other"].index(dataset.get_category())
+                                      if dataset.get_category() in ["Cybersecurity", "Analytics", "Threat Intel", "Logs", "Other"] else 0)
+            new_size = st.number_input("Size (MB)", min_value=1, value=dataset.get_size())
             
-            with st.form("edit_dataset_form"):
-                new_name = st.text_input("Name", value=dataset.get_name())
-                new_source = st.text_input("Source", value=dataset.get_source())
-                new_category = st.selectbox("Category", ["Cybersecurity", "Analytics", "Threat Intel", "Logs", "Other"],
-                                          index=["Cybersecurity", "Analytics", "Threat Intel", "Logs", "Other"].index(dataset.get_category())
-                                          if dataset.get_category() in ["Cybersecurity", "Analytics", "Threat Intel", "Logs", "Other"] else 0)
-                new_size = st.number_input("Size (MB)", min_value=1, value=dataset.get_size())
-                
-                submitted = st.form_submit_button("Update Dataset")
-                if submitted:
-                    db.update_dataset(dataset.get_id(), new_name, new_source, new_category, new_size)
-                    st.success("Dataset updated successfully!")
-                    st.rerun()
-    else:
-        st.info("No datasets to edit.")
+            submitted = st.form_submit_button("Update Dataset")
+            if submitted:
+                db.update_dataset(dataset.get_id(), new_name, new_source, new_category, new_size)
+                st.success("Dataset updated successfully!")
+                st.rerun()
 
 with tab6:
-    if datasets:
-        st.subheader("Delete Dataset")
-        delete_options = [f"{dataset.get_id()}: {dataset.get_name()}" for dataset in datasets]
-        dataset_to_delete = st.selectbox("Select Dataset to Delete", delete_options)
-        
-        if dataset_to_delete and st.button("Delete Dataset", type="primary"):
-            dataset_id = int(dataset_to_delete.split(":")[0])
-            db.delete_dataset(dataset_id)
-            st.success("Dataset deleted successfully!")
-            st.rerun()
-    else:
-        st.info("No datasets to delete.")
+    st.subheader("Delete Dataset")
+    dataset = select_entity("delete_dataset", "dataset", "Delete", datasets, db.get_dataset,
+                            lambda dataset: f"{dataset.get_id()}: {dataset.get_name()}")
+    
+    if dataset is not None and st.button("Delete Dataset", type="primary"):
+        db.delete_dataset(dataset.get_id())
+        st.success("Dataset deleted successfully!")
+        st.rerun()
 
 # IT Tickets Section
 st.header("IT Tickets")
 
-ticket_data = db.get_all_tickets()
-tickets = []
-for data in ticket_data:
-    tickets.append(ITTicket(
-        ticket_id=data["id"],
-        title=data["title"],
-        priority=data["priority"],
-        status=data["status"],
-        created_date=data["created_date"]
-    ))
+filter_col1, filter_col2 = st.columns(2)
+with filter_col1:
+    ticket_priority_filter = st.multiselect("Filter by priority", ["Low", "Medium", "High", "Critical"],
+                                            key="ticket_priority_filter")
+with filter_col2:
+    ticket_status_filter = st.multiselect("Filter by status", ["open", "in progress", "closed", "resolved"],
+                                          key="ticket_status_filter")
+
+ticket_page = load_page("tickets", db.fetch_tickets_page, page_size,
+                        priority=ticket_priority_filter, status=ticket_status_filter)
+ticket_data = ticket_page["rows"]
+tickets = TicketCollection.from_rows(ticket_data)
 
 if tickets:
     ticket_rows = []
@@ -276,6 +291,7 @@ if tickets:
     st.dataframe(df_tickets, use_container_width=True, hide_index=True)
 else:
     st.info("No tickets found.")
+render_pager("tickets", ticket_page)
 
 # CRUD Operations for Tickets (Add Ticket, Edit Ticket, Delete Ticket)
 tab7, tab8, tab9 = st.tabs(["➕ Add Ticket", "✏️ Edit Ticket", "🗑️ Delete Ticket"])
@@ -298,49 +314,39 @@ with tab7:
                 st.rerun()
 
 with tab8:
-    if tickets:
-        st.subheader("Edit Existing Ticket")
-        ticket_options = {f"{ticket.get_id()}: {ticket.get_title()}": ticket for ticket in tickets}
-        selected_ticket_key = st.selectbox("Select Ticket to Edit", list(ticket_options.keys()))
-        
-        if selected_ticket_key:
-            ticket = ticket_options[selected_ticket_key]
+    st.subheader("Edit Existing Ticket")
+    ticket = select_entity("edit_ticket", "ticket", "Edit", tickets, db.get_ticket,
+                           lambda ticket: f"{ticket.get_id()}: {ticket.get_title()}")
+    
+    if ticket is not None:
+        with st.form("edit_ticket_form"):
+            new_title = st.text_input("Title", value=ticket.get_title())
+            new_priority = st.selectbox("Priority", ["Low", "Medium", "High", "Critical"],
+                                      index=["Low", "Medium", "High", "Critical"].index(ticket.get_priority())
+                                      if ticket.get_priority() in ["Low", "Medium", "High", "Critical"] else 0)
+            new_status = st.selectbox("Status", ["open", "in progress", "closed", "resolved"],
+                                    index=["open", "in progress", "closed", "resolved"].index(ticket.get_status())
+                                    if ticket.get_status() in ["open", "in progress", "closed", "resolved"] else 0)
+            new_date = st.text_input("Created Date (YYYY-MM-DD)", value=ticket.get_created_date())
             
-            with st.form("edit_ticket_form"):
-                new_title = st.text_input("Title", value=ticket.get_title())
-                new_priority = st.selectbox("Priority", ["Low", "Medium", "High", "Critical"],
-                                          index=["Low", "Medium", "High", "Critical"].index(ticket.get_priority())
-                                          if ticket.get_priority() in ["Low", "Medium", "High", "Critical"] else 0)
-                new_status = st.selectbox("Status", ["open", "in progress", "closed", "resolved"],
-                                        index=["open", "in progress", "closed", "resolved"].index(ticket.get_status())
-                                        if ticket.get_status() in ["open", "in progress", "closed", "resolved"] else 0)
-                new_date = st.text_input("Created Date (YYYY-MM-DD)", value=ticket.get_created_date())
-                
-                submitted = st.form_submit_button("Update Ticket")
-                if submitted:
-                    db.update_ticket(ticket.get_id(), new_title, new_priority, new_status, new_date)
-                    st.success("Ticket updated successfully!")
-                    st.rerun()
-    else:
-        st.info("No tickets to edit.")
+            submitted = st.form_submit_button("Update Ticket")
+            if submitted:
+                db.update_ticket(ticket.get_id(), new_title, new_priority, new_status, new_date)
+                st.success("Ticket updated successfully!")
+                st.rerun()
 
 with tab9:
-    if tickets:
-        st.subheader("Delete Ticket")
-        delete_options = [f"{ticket.get_id()}: {ticket.get_title()}" for ticket in tickets]
-        ticket_to_delete = st.selectbox("Select Ticket to Delete", delete_options)
-        
-        if ticket_to_delete and st.button("Delete Ticket", type="primary"):
-            ticket_id = int(ticket_to_delete.split(":")[0])
-            db.delete_ticket(ticket_id)
-            st.success("Ticket deleted successfully!")
-            st.rerun()
-    else:
-        st.info("No tickets to delete.")
+    st.subheader("Delete Ticket")
+    ticket = select_entity("delete_ticket", "ticket", "Delete", tickets, db.get_ticket,
+                           lambda ticket: f"{ticket.get_id()}: {ticket.get_title()}")
+    
+    if ticket is not None and st.button("Delete Ticket", type="primary"):
+        db.delete_ticket(ticket.get_id())
+        st.success("Ticket deleted successfully!")
+        st.rerun()
 
-# User Management Section
-current_user_data = db.get_user(st.session_state.username)
-if current_user_data and current_user_data["role"] == "admin":
+# User Management Section (role claims come from the session, not a per-rerun user lookup)
+if "manage_users" in session["permissions"]:
     st.header("User Management")
     
     users = auth.get_all_users()
@@ -364,6 +370,7 @@ if current_user_data and current_user_data["role"] == "admin":
                                       if user_data["role"] in ["user", "admin", "editor"] else 0)
                 if st.button("Update Role"):
                     auth.update_user_role(user_id, new_role)
+                    session_store().update_role(user_id, new_role)
                     st.success("User role updated!")
                     st.rerun()
             
@@ -371,17 +378,17 @@ if current_user_data and current_user_data["role"] == "admin":
                 if user_data["username"] != st.session_state.username:  
                     if st.button("Delete User", type="secondary"):
                         auth.delete_user(user_id)
+                        session_store().revoke_user(user_id)
                         st.success("User deleted!")
                         st.rerun()
                 else:
                     st.warning("You cannot delete your own account while logged in.")
 else:
     # Show current user info for non-admins
-    if current_user_data:
-        with st.expander("My personal Account Info"):
-            st.write(f"**Username:** {current_user_data['username']}")
-            st.write(f"**Role:** {current_user_data['role']}")
-            st.write(f"**Member Since:** {current_user_data.get('created_at', 'N/A')}")
+    with st.expander("My personal Account Info"):
+        st.write(f"**Username:** {session['username']}")
+        st.write(f"**Role:** {session['role']}")
+        st.write(f"**Member Since:** {session['member_since'] or 'N/A'}")
 
 # Navigation
 st.divider()
@@ -402,9 +409,6 @@ with col4:
 # Logout button
 st.divider()
 if st.button("Log out"):
-    st.session_state.logged_in = False
-    st.session_state.username = ""
-    st.session_state.user_role = ""
-    st.session_state.user_obj = None
+    end_session()
     st.info("You have been logged out")
     st.switch_page("Home.py")
\ No newline at end of file
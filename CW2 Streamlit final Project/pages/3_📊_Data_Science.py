@@ -4,16 +4,11 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from services.database_manager import DatabaseManager
-from models.security_incident import SecurityIncident
-from models.dataset import Dataset
-from models.it_ticket import ITTicket
+from services.analytics_engine import get_analytics_engine, crosstab_frame
+from utils.session import require_login
 
 # Authentication check
-if "logged_in" not in st.session_state or not st.session_state.logged_in:
-    st.error("You must be logged in to view this page")
-    if st.button("Go to login"):
-        st.switch_page("pages/1_🔐_Login.py")
-    st.stop()
+require_login()
 
 st.set_page_config(page_title="Data Science Analytics", page_icon="📊", layout="wide")
 st.title("📊 Data Science Analytics")
@@ -21,67 +16,32 @@ st.title("📊 Data Science Analytics")
 # Initialize services
 db = DatabaseManager()
 
-# Get data and convert to objects
-incident_data = db.get_all_incidents()
-dataset_data = db.get_all_datasets()
-ticket_data = db.get_all_tickets()
+# Every count, crosstab and size statistic comes from one shared, incrementally updated bundle
+analytics = get_analytics_engine(db).bundle()
+dataset_stats = analytics["datasets"]
+incident_stats = analytics["incidents"]
+ticket_stats = analytics["tickets"]
 
-# Convert to objects
-incidents = []
-for data in incident_data:
-    incidents.append(SecurityIncident(
-        incident_id=data["id"],
-        title=data["title"],
-        severity=data["severity"],
-        status=data["status"],
-        date=data["date"]
-    ))
+# Raw data expanders only load the most recent rows
+RAW_PREVIEW_ROWS = 1000
 
-datasets = []
-for data in dataset_data:
-    datasets.append(Dataset(
-        dataset_id=data["id"],
-        name=data["name"],
-        source=data["source"],
-        category=data["category"],
-        size=data["size"]
-    ))
+# The size chart shows only the largest datasets
+TOP_DATASETS = 20
 
-tickets = []
-for data in ticket_data:
-    tickets.append(ITTicket(
-        ticket_id=data["id"],
-        title=data["title"],
-        priority=data["priority"],
-        status=data["status"],
-        created_date=data["created_date"]
-    ))
+# Trend chart intervals (labels -> rollup grains)
+TREND_GRAINS = {"Daily": "day", "Weekly": "week", "Monthly": "month"}
 
-# Create DataFrames from objects
-df_incidents = pd.DataFrame([{
-    "ID": inc.get_id(),
-    "Title": inc.get_title(),
-    "Severity": inc.get_severity(),
-    "Status": inc.get_status(),
-    "Date": inc.get_date(),
-    "Severity_Level": inc.get_severity_level()
-} for inc in incidents]) if incidents else pd.DataFrame()
 
-df_datasets = pd.DataFrame([{
-    "ID": ds.get_id(),
-    "Name": ds.get_name(),
-    "Source": ds.get_source(),
-    "Category": ds.get_category(),
-    "Size_MB": ds.get_size()
-} for ds in datasets]) if datasets else pd.DataFrame()
+def count_series(counts):
+    """Label -> count dict as a Series, largest first (like value_counts)."""
+    return pd.Series(counts, dtype="int64").sort_values(ascending=False)
 
-df_tickets = pd.DataFrame([{
-    "ID": t.get_id(),
-    "Title": t.get_title(),
-    "Priority": t.get_priority(),
-    "Status": t.get_status(),
-    "Created_Date": t.get_created_date()
-} for t in tickets]) if tickets else pd.DataFrame()
+
+def raw_preview(table, total):
+    """Show the newest rows of a table without loading the rest."""
+    if total > RAW_PREVIEW_ROWS:
+        st.caption(f"Showing the latest {RAW_PREVIEW_ROWS:,} of {total:,} rows")
+    st.dataframe(db.get_preview_frame(table, RAW_PREVIEW_ROWS), use_container_width=True)
 
 # Tabs for different analytics
 tab1, tab2, tab3 = st.tabs(["📁 Datasets", "🔒 Incidents", "Tickets"])
@@ -89,203 +49,230 @@ tab1, tab2, tab3 = st.tabs(["📁 Datasets", "🔒 Incidents", "Tickets"])
 with tab1:
     st.header("Dataset Analytics")
     
-    if not df_datasets.empty:
+    if dataset_stats["total"]:
         col1, col2 = st.columns(2)
         
         with col1:
             # Dataset by Category
-            if 'Category' in df_datasets.columns:
-                category_counts = df_datasets['Category'].value_counts()
-                fig1 = px.pie(
-                    values=category_counts.values,
-                    names=category_counts.index,
-                    title="Datasets by Category",
-                    hole=0.3
-                )
-                st.plotly_chart(fig1, use_container_width=True)
+            category_counts = count_series(dataset_stats["by_category"])
+            fig1 = px.pie(
+                values=category_counts.values,
+                names=category_counts.index,
+                title="Datasets by Category",
+                hole=0.3
+            )
+            st.plotly_chart(fig1, use_container_width=True)
         
         with col2:
-            # Dataset sizes
-            if 'Size_MB' in df_datasets.columns:
-                fig2 = px.bar(
-                    df_datasets,
-                    x='Name',
-                    y='Size_MB',
-                    title="Dataset Sizes (MB)",
-                    color='Category'
-                )
-                fig2.update_layout(xaxis_title="Dataset", yaxis_title="Size (MB)")
-                st.plotly_chart(fig2, use_container_width=True)
+            # Largest datasets (one bar per dataset would not scale with the table)
+            largest = db.get_preview_frame("datasets_metadata", TOP_DATASETS, order_by="size")
+            fig2 = px.bar(
+                largest,
+                x='Name',
+                y='Size_MB',
+                title=f"Top {min(TOP_DATASETS, dataset_stats['total'])} Largest Datasets (MB)",
+                color='Category'
+            )
+            fig2.update_layout(xaxis_title="Dataset", yaxis_title="Size (MB)")
+            st.plotly_chart(fig2, use_container_width=True)
         
         # Source distribution
-        if 'Source' in df_datasets.columns:
-            st.subheader("Dataset Sources")
-            source_counts = df_datasets['Source'].value_counts()
-            fig3 = px.bar(
-                x=source_counts.index,
-                y=source_counts.values,
-                title="Datasets by Source"
-            )
-            fig3.update_layout(xaxis_title="Source", yaxis_title="Count")
-            st.plotly_chart(fig3, use_container_width=True)
+        st.subheader("Dataset Sources")
+        source_counts = count_series(dataset_stats["by_source"])
+        fig3 = px.bar(
+            x=source_counts.index,
+            y=source_counts.values,
+            title="Datasets by Source"
+        )
+        fig3.update_layout(xaxis_title="Source", yaxis_title="Count")
+        st.plotly_chart(fig3, use_container_width=True)
         
         # Size statistics
         st.subheader("Size Statistics")
-        if 'Size_MB' in df_datasets.columns:
-            col3, col4, col5 = st.columns(3)
-            with col3:
-                st.metric("Total Size", f"{df_datasets['Size_MB'].sum():,} MB")
-            with col4:
-                st.metric("Average Size", f"{df_datasets['Size_MB'].mean():.1f} MB")
-            with col5:
-                st.metric("Largest Dataset", f"{df_datasets['Size_MB'].max():,} MB")
+        col3, col4, col5 = st.columns(3)
+        with col3:
+            st.metric("Total Size", f"{dataset_stats['size']['total']:,} MB")
+        with col4:
+            st.metric("Average Size", f"{dataset_stats['size']['mean']:.1f} MB")
+        with col5:
+            st.metric("Largest Dataset", f"{dataset_stats['size']['max']:,} MB")
         
         # Display raw data
         with st.expander("View Raw Dataset Data"):
-            st.dataframe(df_datasets, use_container_width=True)
+            raw_preview("datasets_metadata", dataset_stats["total"])
     else:
         st.info("No dataset metadata available.")
 
 with tab2:
     st.header("Incident Analytics")
     
-    if not df_incidents.empty:
+    if incident_stats["total"]:
         col1, col2 = st.columns(2)
         
         with col1:
             #Incidents by Severity
-            if 'Severity' in df_incidents.columns:
-                severity_counts = df_incidents['Severity'].value_counts()
-                fig1 = px.pie(
-                    values=severity_counts.values,
-                    names=severity_counts.index,
-                    title="Incidents by Severity",
-                    color=severity_counts.index,
-                    color_discrete_map={
-                        'Critical': 'red',
-                        'High': 'orange',
-                        'Medium': 'yellow',
-                        'Low': 'green'
-                    }
-                )
-                st.plotly_chart(fig1, use_container_width=True)
+            severity_counts = count_series(incident_stats["by_severity"])
+            fig1 = px.pie(
+                values=severity_counts.values,
+                names=severity_counts.index,
+                title="Incidents by Severity",
+                color=severity_counts.index,
+                color_discrete_map={
+                    'Critical': 'red',
+                    'High': 'orange',
+                    'Medium': 'yellow',
+                    'Low': 'green'
+                }
+            )
+            st.plotly_chart(fig1, use_container_width=True)
         
         with col2:
             # Incidents by Status
-            if 'Status' in df_incidents.columns:
-                status_counts = df_incidents['Status'].value_counts()
-                fig2 = px.bar(
-                    x=status_counts.index,
-                    y=status_counts.values,
-                    title="Incidents by Status",
-                    color=status_counts.index
-                )
-                st.plotly_chart(fig2, use_container_width=True)
+            status_counts = count_series(incident_stats["by_status"])
+            fig2 = px.bar(
+                x=status_counts.index,
+                y=status_counts.values,
+                title="Incidents by Status",
+                color=status_counts.index
+            )
+            st.plotly_chart(fig2, use_container_width=True)
         
-        # Monthly trend
-        if 'Date' in df_incidents.columns and not df_incidents.empty:
-            st.subheader("Incident Trends Over Time")
-            try:
-                df_incidents['Date'] = pd.to_datetime(df_incidents['Date'], errors='coerce')
-                df_incidents_clean = df_incidents.dropna(subset=['Date'])
-                if not df_incidents_clean.empty:
-                    df_incidents_clean['month'] = df_incidents_clean['Date'].dt.strftime('%Y-%m')
-                    monthly_counts = df_incidents_clean.groupby('month').size().reset_index(name='count')
-                    
-                    fig3 = px.line(
-                        monthly_counts,
-                        x='month',
-                        y='count',
-                        title="Monthly Incident Count",
-                        markers=True
-                    )
-                    fig3.update_layout(xaxis_title="Month", yaxis_title="Number of Incidents")
-                    st.plotly_chart(fig3, use_container_width=True)
-            except Exception as e:
-                st.warning(f"Could not generate time trend: {e}")
+        # Trend over time, read from the rollup tables (cost grows with buckets, not rows)
+        st.subheader("Incident Trends Over Time")
+        trend_col1, trend_col2 = st.columns(2)
+        with trend_col1:
+            incident_grain = st.radio("Interval", list(TREND_GRAINS), index=2, horizontal=True,
+                                      key="incident_trend_grain")
+        with trend_col2:
+            incident_breakdown = st.checkbox("Break down by severity", key="incident_trend_by_severity")
+        try:
+            incident_trend = pd.DataFrame(db.get_incident_trend(
+                TREND_GRAINS[incident_grain], by="severity" if incident_breakdown else None
+            ))
+            if not incident_trend.empty:
+                fig3 = px.line(
+                    incident_trend,
+                    x='bucket',
+                    y='count',
+                    color='severity' if incident_breakdown else None,
+                    title=f"{incident_grain} Incident Count",
+                    markers=True
+                )
+                fig3.update_layout(xaxis_title=TREND_GRAINS[incident_grain].title(),
+                                   yaxis_title="Number of Incidents")
+                st.plotly_chart(fig3, use_container_width=True)
+            else:
+                st.info("No dated incidents to chart.")
+        except Exception as e:
+            st.warning(f"Could not generate time trend: {e}")
         
         # Severity level distribution
         st.subheader("Severity Level Distribution")
-        if 'Severity_Level' in df_incidents.columns:
-            severity_level_counts = df_incidents['Severity_Level'].value_counts().sort_index()
-            fig4 = px.bar(
-                x=severity_level_counts.index,
-                y=severity_level_counts.values,
-                title="Incidents by Severity Level",
-                labels={'x': 'Severity Level', 'y': 'Count'}
-            )
-            st.plotly_chart(fig4, use_container_width=True)
+        severity_level_counts = pd.Series(incident_stats["by_severity_level"], dtype="int64")
+        fig4 = px.bar(
+            x=severity_level_counts.index,
+            y=severity_level_counts.values,
+            title="Incidents by Severity Level",
+            labels={'x': 'Severity Level', 'y': 'Count'}
+        )
+        st.plotly_chart(fig4, use_container_width=True)
         
         # Display raw data
         with st.expander("View Raw Incident Data"):
-            st.dataframe(df_incidents, use_container_width=True)
+            raw_preview("cyber_incidents", incident_stats["total"])
     else:
         st.info("No incidents data available.")
 
 with tab3:
     st.header("Ticket Analytics")
     
-    if not df_tickets.empty:
+    if ticket_stats["total"]:
         col1, col2 = st.columns(2)
         
         with col1:
             # Tickets by Priority
-            if 'Priority' in df_tickets.columns:
-                priority_counts = df_tickets['Priority'].value_counts()
-                fig1 = px.pie(
-                    values=priority_counts.values,
-                    names=priority_counts.index,
-                    title="Tickets by Priority",
-                    color=priority_counts.index,
-                    color_discrete_map={
-                        'Critical': 'red',
-                        'High': 'orange',
-                        'Medium': 'yellow',
-                        'Low': 'green'
-                    }
-                )
-                st.plotly_chart(fig1, use_container_width=True)
+            priority_counts = count_series(ticket_stats["by_priority"])
+            fig1 = px.pie(
+                values=priority_counts.values,
+                names=priority_counts.index,
+                title="Tickets by Priority",
+                color=priority_counts.index,
+                color_discrete_map={
+                    'Critical': 'red',
+                    'High': 'orange',
+                    'Medium': 'yellow',
+                    'Low': 'green'
+                }
+            )
+            st.plotly_chart(fig1, use_container_width=True)
         
         with col2:
             # Tickets by Status
-            if 'Status' in df_tickets.columns:
-                status_counts = df_tickets['Status'].value_counts()
-                fig2 = px.bar(
-                    x=status_counts.index,
-                    y=status_counts.values,
-                    title="Tickets by Status",
-                    color=status_counts.index
-                )
-                st.plotly_chart(fig2, use_container_width=True)
+            status_counts = count_series(ticket_stats["by_status"])
+            fig2 = px.bar(
+                x=status_counts.index,
+                y=status_counts.values,
+                title="Tickets by Status",
+                color=status_counts.index
+            )
+            st.plotly_chart(fig2, use_container_width=True)
         
         st.subheader("Ticket Overview")
         
         # Summary metrics
         col3, col4, col5 = st.columns(3)
         with col3:
-            st.metric("Total Tickets", len(df_tickets))
+            st.metric("Total Tickets", ticket_stats["total"])
         with col4:
-            open_tickets = len(df_tickets[df_tickets['Status'] == 'open']) if 'Status' in df_tickets.columns else 0
+            open_tickets = ticket_stats["by_status"].get("open", 0)
             st.metric("Open Tickets", open_tickets)
         with col5:
-            closed_tickets = len(df_tickets[df_tickets['Status'] == 'closed']) if 'Status' in df_tickets.columns else 0
+            closed_tickets = ticket_stats["by_status"].get("closed", 0)
             st.metric("Closed Tickets", closed_tickets)
         
+        # Trend over time, read from the rollup tables
+        st.subheader("Ticket Trends Over Time")
+        trend_col1, trend_col2 = st.columns(2)
+        with trend_col1:
+            ticket_grain = st.radio("Interval", list(TREND_GRAINS), index=2, horizontal=True,
+                                    key="ticket_trend_grain")
+        with trend_col2:
+            ticket_breakdown = st.checkbox("Break down by priority", key="ticket_trend_by_priority")
+        try:
+            ticket_trend = pd.DataFrame(db.get_ticket_trend(
+                TREND_GRAINS[ticket_grain], by="priority" if ticket_breakdown else None
+            ))
+            if not ticket_trend.empty:
+                fig_trend = px.line(
+                    ticket_trend,
+                    x='bucket',
+                    y='count',
+                    color='priority' if ticket_breakdown else None,
+                    title=f"{ticket_grain} Ticket Count",
+                    markers=True
+                )
+                fig_trend.update_layout(xaxis_title=TREND_GRAINS[ticket_grain].title(),
+                                        yaxis_title="Number of Tickets")
+                st.plotly_chart(fig_trend, use_container_width=True)
+            else:
+                st.info("No dated tickets to chart.")
+        except Exception as e:
+            st.warning(f"Could not generate time trend: {e}")
+        
         # Priority vs Status heatmap
         st.subheader("Priority vs Status Distribution")
-        if 'Priority' in df_tickets.columns and 'Status' in df_tickets.columns:
-            pivot_table = pd.crosstab(df_tickets['Priority'], df_tickets['Status'])
-            fig3 = px.imshow(
-                pivot_table,
-                text_auto=True,
-                title="Priority vs Status Heatmap",
-                color_continuous_scale='Blues'
-            )
-            st.plotly_chart(fig3, use_container_width=True)
+        pivot_table = crosstab_frame(ticket_stats["priority_status"])
+        fig3 = px.imshow(
+            pivot_table,
+            text_auto=True,
+            title="Priority vs Status Heatmap",
+            color_continuous_scale='Blues'
+        )
+        st.plotly_chart(fig3, use_container_width=True)
         
         # Display raw data
         with st.expander("View Raw Ticket Data"):
-            st.dataframe(df_tickets, use_container_width=True)
+            raw_preview("it_tickets", ticket_stats["total"])
     else:
         st.info("No tickets data available.")
 
@@ -293,26 +280,23 @@ with tab3:
 st.divider()
 st.header("Summary Statistics")
 
-if not df_datasets.empty and not df_incidents.empty and not df_tickets.empty:
+if dataset_stats["total"] and incident_stats["total"] and ticket_stats["total"]:
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Total Incidents", len(df_incidents))
-        if 'Severity' in df_incidents.columns:
-            critical = len(df_incidents[df_incidents['Severity'] == 'Critical'])
-            st.metric("Critical Incidents", critical)
+        st.metric("Total Incidents", incident_stats["total"])
+        critical = incident_stats["by_severity"].get("Critical", 0)
+        st.metric("Critical Incidents", critical)
     
     with col2:
-        st.metric("Total Datasets", len(df_datasets))
-        if 'Size_MB' in df_datasets.columns:
-            total_size = df_datasets['Size_MB'].sum()
-            st.metric("Total Data Size", f"{total_size:,} MB")
+        st.metric("Total Datasets", dataset_stats["total"])
+        total_size = dataset_stats["size"]["total"]
+        st.metric("Total Data Size", f"{total_size:,} MB")
     
     with col3:
-        st.metric("Total Tickets", len(df_tickets))
-        if 'Priority' in df_tickets.columns:
-            high_priority = len(df_tickets[df_tickets['Priority'] == 'High'])
-            st.metric("High Priority Tickets", high_priority)
+        st.metric("Total Tickets", ticket_stats["total"])
+        high_priority = ticket_stats["by_priority"].get("High", 0)
+        st.metric("High Priority Tickets", high_priority)
 
 # Navigation to different pages
 st.divider()
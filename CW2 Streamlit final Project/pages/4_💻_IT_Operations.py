@@ -1,17 +1,16 @@
 """IT Operations and AI Analyzer using OOP"""
 import streamlit as st
 from services.database_manager import DatabaseManager
-from services.ai_assistant import AIAssistant
-from models.security_incident import SecurityIncident
-from models.dataset import Dataset
-from models.it_ticket import ITTicket
+from services.ai_assistant import AIAssistant, ANALYSIS_TEMPERATURE
+from services.async_ai_assistant import AsyncAIAssistant
+from services.response_cache import ResponseCache
+from services.context_builder import ContextBuilder
+from models.entity_collections import IncidentCollection, DatasetCollection, TicketCollection
+from utils.pagination import PAGE_SIZE_OPTIONS, load_page, page_widget_key, render_pager
+from utils.session import require_login
 
 # Authentication 
-if "logged_in" not in st.session_state or not st.session_state.logged_in:
-    st.error("You must be logged in to view this page")
-    if st.button("Go to login"):
-        st.switch_page("pages/1_🔐_Login.py")
-    st.stop()
+require_login()
 
 st.set_page_config(page_title="IT Operations & AI Analyzer", page_icon="🔍", layout="wide")
 st.title("IT Operations & AI Multi-Table Analyzer")
@@ -19,36 +18,21 @@ st.title("IT Operations & AI Multi-Table Analyzer")
 # Initialize services
 db = DatabaseManager()
 
-# Get data and convert to objects
-incident_data = db.get_all_incidents()
-dataset_data = db.get_all_datasets()
-ticket_data = db.get_all_tickets()
+# Get one page of each table and convert to objects
+page_size = st.sidebar.selectbox("Rows per page", PAGE_SIZE_OPTIONS, index=1, key="itops_page_size")
+
+incident_page = load_page("itops_incidents", db.fetch_incidents_page, page_size)
+dataset_page = load_page("itops_datasets", db.fetch_datasets_page, page_size)
+ticket_page = load_page("itops_tickets", db.fetch_tickets_page, page_size)
+incident_data = incident_page["rows"]
+dataset_data = dataset_page["rows"]
+ticket_data = ticket_page["rows"]
 user_data = db.get_all_users()
 
-# Convert raw data to model objects
-incidents = [SecurityIncident(
-    incident_id=data["id"],
-    title=data["title"],
-    severity=data["severity"],
-    status=data["status"],
-    date=data["date"]
-) for data in incident_data]
-
-datasets = [Dataset(
-    dataset_id=data["id"],
-    name=data["name"],
-    source=data["source"],
-    category=data["category"],
-    size=data["size"]
-) for data in dataset_data]
-
-tickets = [ITTicket(
-    ticket_id=data["id"],
-    title=data["title"],
-    priority=data["priority"],
-    status=data["status"],
-    created_date=data["created_date"]
-) for data in ticket_data]
+# Columnar collections build model objects only when an item is accessed
+incidents = IncidentCollection.from_rows(incident_data)
+datasets = DatasetCollection.from_rows(dataset_data)
+tickets = TicketCollection.from_rows(ticket_data)
 
 # Check for OpenAI API key
 try:
@@ -63,6 +47,25 @@ except:
     openai_api_key = None
     ai_available = False
 
+def render_per_item_analysis(system_prompt, prompts, labels, heading):
+    """Analyze each item with its own prompt concurrently and show one report per item."""
+    assistant = AsyncAIAssistant(api_key=openai_api_key, cache=ResponseCache(db))
+    assistant.set_system_prompt(system_prompt)
+    results = assistant.run_many(prompts, temperature=ANALYSIS_TEMPERATURE, use_cache=True)
+    metrics = assistant.last_batch_metrics
+    
+    st.subheader(heading)
+    if metrics:
+        st.caption(f"{metrics['succeeded']}/{metrics['count']} analyses in {metrics['seconds']:.1f}s "
+                   f"(slowest call {metrics['slowest']:.1f}s, {metrics['retries']} retries, "
+                   f"{metrics['cached']} from cache)")
+    for label, result in zip(labels, results):
+        with st.expander(label, expanded=len(results) <= 3):
+            if result["error"]:
+                st.error(result["error"])
+            else:
+                st.markdown(result["response"])
+
 # Tab for different table analyses
 tab1, tab2, tab3, tab4 = st.tabs(["🔒 Cyber Incidents", "📁 Datasets", "IT Tickets", "Users"])
 
@@ -73,6 +76,8 @@ with tab1:
     if not incidents:
         st.info("No incidents to analyze.")
     else:
+        render_pager("itops_incidents", incident_page)
+        
         #Format incident display list
         incident_list = [f"{inc.get_id()}: {inc.get_title()} ({inc.get_severity()}, {inc.get_status()})" for inc in incidents]
         
@@ -80,12 +85,18 @@ with tab1:
         
         with col1:
             #Multi-select for incidents
-            selected_indices = st.multiselect(
+            #Per-item mode sends one prompt per incident, all in parallel
+            per_item = st.checkbox("Analyze each incident separately", key="per_item_incidents")
+            
+            #Options are row ids, so a selection always means the same rows
+            positions = {row["id"]: i for i, row in enumerate(incident_data)}
+            selected_ids = st.multiselect(
                 "Select incidents to analyze",
-                options=list(range(len(incidents))),
-                format_func=lambda i: incident_list[i],
-                max_selections=5
+                options=list(positions),
+                format_func=lambda row_id: incident_list[positions[row_id]],
+                key=page_widget_key("itops_incidents", "selected")
             )
+            selected_indices = [positions[row_id] for row_id in selected_ids]
             
             #Choose analysis type
             analysis_type = st.selectbox(
@@ -116,23 +127,19 @@ with tab1:
             if generate_report and selected_indices and ai_available:
                 with st.spinner("AI is analyzing incidents..."):
                     try:
-                        ai = AIAssistant(api_key=openai_api_key)
-                        ai.set_system_prompt("You are a senior cybersecurity analyst. Provide detailed, actionable insights.")
-                        
                         selected_incidents = [incidents[idx] for idx in selected_indices]
                         
-                        incidents_text = "\n\n".join([
-                            f"Incident {i+1}:\n"
+                        incident_details = [
                             f"- Title: {inc.get_title()}\n"
                             f"- Severity: {inc.get_severity()}\n"
                             f"- Status: {inc.get_status()}\n"
                             f"- Date: {inc.get_date()}"
-                            for i, inc in enumerate(selected_incidents)
-                        ])
+                            for inc in selected_incidents
+                        ]
                         
-                        prompt = f"""As a cybersecurity expert, analyze the following incidents:
+                        prompt_template = """As a cybersecurity expert, analyze the following incidents:
 
-{incidents_text}
+{items}
 
 Analysis Type: {analysis_type}
 
@@ -145,10 +152,28 @@ Please provide a detailed analysis including:
 
 Format the response with clear sections and bullet points."""
                         
-                        ai_output = ai.send_message(prompt)
-                        
-                        st.subheader("AI Analysis Report")
-                        st.markdown(ai_output)
+                        if per_item:
+                            render_per_item_analysis(
+                                "You are a senior cybersecurity analyst. Provide detailed, actionable insights.",
+                                [prompt_template.format(items=f"Incident 1:\n{details}", analysis_type=analysis_type)
+                                 for details in incident_details],
+                                [f"{inc.get_id()}: {inc.get_title()}" for inc in selected_incidents],
+                                "AI Analysis Report"
+                            )
+                        else:
+                            ai = AIAssistant(api_key=openai_api_key, cache=ResponseCache(db))
+                            ai.set_system_prompt("You are a senior cybersecurity analyst. Provide detailed, actionable insights.")
+                            
+                            #Rank, merge and trim the selection so the prompt stays within budget
+                            packed = ContextBuilder().pack("incident", [incident_data[idx] for idx in selected_indices])
+                            incidents_text = packed["text"]
+                            ai_output = ai.send_message(
+                                prompt_template.format(items=incidents_text, analysis_type=analysis_type),
+                                temperature=ANALYSIS_TEMPERATURE, use_cache=True
+                            )
+                            
+                            st.subheader("AI Analysis Report")
+                            st.markdown(ai_output)
                         
                     except Exception as e:
                         st.error(f"Error generating analysis: {str(e)}")
@@ -161,17 +186,24 @@ with tab2:
     if not datasets:
         st.info("No datasets to analyze.")
     else:
+        render_pager("itops_datasets", dataset_page)
+        
         dataset_list = [f"{ds.get_id()}: {ds.get_name()} ({ds.get_category()}, {ds.get_size()}MB)" for ds in datasets]
         
         col1, col2 = st.columns([1, 2])
         
         with col1:
-            selected_indices = st.multiselect(
+            #Per-item mode sends one prompt per dataset, all in parallel
+            per_item = st.checkbox("Analyze each dataset separately", key="per_item_datasets")
+            
+            positions = {row["id"]: i for i, row in enumerate(dataset_data)}
+            selected_ids = st.multiselect(
                 "Select datasets to analyze",
-                options=list(range(len(datasets))),
-                format_func=lambda i: dataset_list[i],
-                max_selections=5
+                options=list(positions),
+                format_func=lambda row_id: dataset_list[positions[row_id]],
+                key=page_widget_key("itops_datasets", "selected")
             )
+            selected_indices = [positions[row_id] for row_id in selected_ids]
             
             analysis_type = st.selectbox(
                 "Analysis Type",
@@ -198,23 +230,19 @@ with tab2:
             if generate_report and selected_indices and ai_available:
                 with st.spinner("AI is analyzing datasets..."):
                     try:
-                        ai = AIAssistant(api_key=openai_api_key)
-                        ai.set_system_prompt("You are a data analytics, architecture, and governance expert.")
-                        
                         selected_datasets = [datasets[idx] for idx in selected_indices]
                         
-                        datasets_text = "\n\n".join([
-                            f"Dataset {i+1}:\n"
+                        dataset_details = [
                             f"- Name: {ds.get_name()}\n"
                             f"- Source: {ds.get_source()}\n"
                             f"- Category: {ds.get_category()}\n"
                             f"- Size: {ds.get_size()}MB"
-                            for i, ds in enumerate(selected_datasets)
-                        ])
+                            for ds in selected_datasets
+                        ]
                         
-                        prompt = f"""As a data management expert, analyze the following datasets:
+                        prompt_template = """As a data management expert, analyze the following datasets:
 
-{datasets_text}
+{items}
 
 Analysis Type: {analysis_type}
 
@@ -227,10 +255,28 @@ Provide insights on:
 
 Format with clear sections and actionable insights."""
                         
-                        ai_output = ai.send_message(prompt)
-                        
-                        st.subheader("Dataset Analysis Report")
-                        st.markdown(ai_output)
+                        if per_item:
+                            render_per_item_analysis(
+                                "You are a data analytics, architecture, and governance expert.",
+                                [prompt_template.format(items=f"Dataset 1:\n{details}", analysis_type=analysis_type)
+                                 for details in dataset_details],
+                                [f"{ds.get_id()}: {ds.get_name()}" for ds in selected_datasets],
+                                "Dataset Analysis Report"
+                            )
+                        else:
+                            ai = AIAssistant(api_key=openai_api_key, cache=ResponseCache(db))
+                            ai.set_system_prompt("You are a data analytics, architecture, and governance expert.")
+                            
+                            #Rank, merge and trim the selection so the prompt stays within budget
+                            packed = ContextBuilder().pack("dataset", [dataset_data[idx] for idx in selected_indices])
+                            datasets_text = packed["text"]
+                            ai_output = ai.send_message(
+                                prompt_template.format(items=datasets_text, analysis_type=analysis_type),
+                                temperature=ANALYSIS_TEMPERATURE, use_cache=True
+                            )
+                            
+                            st.subheader("Dataset Analysis Report")
+                            st.markdown(ai_output)
                         
                     except Exception as e:
                         st.error(f"Error generating analysis: {str(e)}")
@@ -242,17 +288,24 @@ with tab3:
     if not tickets:
         st.info("No tickets to analyze.")
     else:
+        render_pager("itops_tickets", ticket_page)
+        
         ticket_list = [f"{t.get_id()}: {t.get_title()} ({t.get_priority()}, {t.get_status()})" for t in tickets]
         
         col1, col2 = st.columns([1, 2])
         
         with col1:
-            selected_indices = st.multiselect(
+            #Per-item mode sends one prompt per ticket, all in parallel
+            per_item = st.checkbox("Analyze each ticket separately", key="per_item_tickets")
+            
+            positions = {row["id"]: i for i, row in enumerate(ticket_data)}
+            selected_ids = st.multiselect(
                 "Select tickets to analyze",
-                options=list(range(len(tickets))),
-                format_func=lambda i: ticket_list[i],
-                max_selections=5
+                options=list(positions),
+                format_func=lambda row_id: ticket_list[positions[row_id]],
+                key=page_widget_key("itops_tickets", "selected")
             )
+            selected_indices = [positions[row_id] for row_id in selected_ids]
             
             analysis_type = st.selectbox(
                 "Analysis Type",
@@ -279,23 +332,19 @@ with tab3:
             if generate_report and selected_indices and ai_available:
                 with st.spinner("AI is analyzing tickets..."):
                     try:
-                        ai = AIAssistant(api_key=openai_api_key)
-                        ai.set_system_prompt("You are an IT management expert.")
-                        
                         selected_tickets = [tickets[idx] for idx in selected_indices]
                         
-                        tickets_text = "\n\n".join([
-                            f"Ticket {i+1}:\n"
+                        ticket_details = [
                             f"- Title: {ticket.get_title()}\n"
                             f"- Priority: {ticket.get_priority()}\n"
                             f"- Status: {ticket.get_status()}\n"
                             f"- Created: {ticket.get_created_date()}"
-                            for i, ticket in enumerate(selected_tickets)
-                        ])
+                            for ticket in selected_tickets
+                        ]
                         
-                        prompt = f"""As an IT service management expert, analyze the following support tickets:
+                        prompt_template = """As an IT service management expert, analyze the following support tickets:
 
-{tickets_text}
+{items}
 
 Analysis Type: {analysis_type}
 
@@ -308,10 +357,28 @@ Provide analysis covering:
 
 Format with clear sections and actionable recommendations."""
                         
-                        ai_output = ai.send_message(prompt)
-                        
-                        st.subheader("Ticket Analysis Report")
-                        st.markdown(ai_output)
+                        if per_item:
+                            render_per_item_analysis(
+                                "You are an IT management expert.",
+                                [prompt_template.format(items=f"Ticket 1:\n{details}", analysis_type=analysis_type)
+                                 for details in ticket_details],
+                                [f"{ticket.get_id()}: {ticket.get_title()}" for ticket in selected_tickets],
+                                "Ticket Analysis Report"
+                            )
+                        else:
+                            ai = AIAssistant(api_key=openai_api_key, cache=ResponseCache(db))
+                            ai.set_system_prompt("You are an IT management expert.")
+                            
+                            #Rank, merge and trim the selection so the prompt stays within budget
+                            packed = ContextBuilder().pack("ticket", [ticket_data[idx] for idx in selected_indices])
+                            tickets_text = packed["text"]
+                            ai_output = ai.send_message(
+                                prompt_template.format(items=tickets_text, analysis_type=analysis_type),
+                                temperature=ANALYSIS_TEMPERATURE, use_cache=True
+                            )
+                            
+                            st.subheader("Ticket Analysis Report")
+                            st.markdown(ai_output)
                         
                     except Exception as e:
                         st.error(f"Error generating analysis: {str(e)}")
@@ -328,12 +395,17 @@ with tab4:
         col1, col2 = st.columns([1, 2])
         
         with col1:
-            selected_indices = st.multiselect(
+            #Per-item mode sends one prompt per user, all in parallel
+            per_item = st.checkbox("Analyze each user separately", key="per_item_users")
+            
+            positions = {row["id"]: i for i, row in enumerate(user_data)}
+            selected_ids = st.multiselect(
                 "Select users to analyze",
-                options=list(range(len(user_data))),
-                format_func=lambda i: user_list[i],
-                max_selections=10
+                options=list(positions),
+                format_func=lambda row_id: user_list[positions[row_id]],
+                key="selected_users"
             )
+            selected_indices = [positions[row_id] for row_id in selected_ids]
             
             analysis_type = st.selectbox(
                 "Analysis Type",
@@ -359,22 +431,18 @@ with tab4:
             if generate_report and selected_indices and ai_available:
                 with st.spinner("AI is analyzing users..."):
                     try:
-                        ai = AIAssistant(api_key=openai_api_key)
-                        ai.set_system_prompt("You are a cybersecurity expert.")
-                        
                         selected_users = [user_data[idx] for idx in selected_indices]
                         
-                        users_text = "\n\n".join([
-                            f"User {i+1}:\n"
+                        user_details = [
                             f"- Username: {user['username']}\n"
                             f"- Role: {user['role']}\n"
                             f"- Created: {user.get('created_at', 'N/A')}"
-                            for i, user in enumerate(selected_users)
-                        ])
+                            for user in selected_users
+                        ]
                         
-                        prompt = f"""As a security and user management expert, analyze the following user accounts:
+                        prompt_template = """As a security and user management expert, analyze the following user accounts:
 
-{users_text}
+{items}
 
 Analysis Type: {analysis_type}
 
@@ -387,10 +455,28 @@ Provide analysis covering:
 
 Format with clear sections and actionable insights."""
                         
-                        ai_output = ai.send_message(prompt)
-                        
-                        st.subheader("User Analysis Report")
-                        st.markdown(ai_output)
+                        if per_item:
+                            render_per_item_analysis(
+                                "You are a cybersecurity expert.",
+                                [prompt_template.format(items=f"User 1:\n{details}", analysis_type=analysis_type)
+                                 for details in user_details],
+                                [f"{user['id']}: {user['username']}" for user in selected_users],
+                                "User Analysis Report"
+                            )
+                        else:
+                            ai = AIAssistant(api_key=openai_api_key, cache=ResponseCache(db))
+                            ai.set_system_prompt("You are a cybersecurity expert.")
+                            
+                            #Rank, merge and trim the selection so the prompt stays within budget
+                            packed = ContextBuilder().pack("user", [user_data[idx] for idx in selected_indices])
+                            users_text = packed["text"]
+                            ai_output = ai.send_message(
+                                prompt_template.format(items=users_text, analysis_type=analysis_type),
+                                temperature=ANALYSIS_TEMPERATURE, use_cache=True
+                            )
+                            
+                            st.subheader("User Analysis Report")
+                            st.markdown(ai_output)
                         
                     except Exception as e:
                         st.error(f"Error generating analysis: {str(e)}")
@@ -3,13 +3,10 @@ import streamlit as st
 from services.ai_assistant import AIAssistant
 import json
 from datetime import datetime
+from utils.session import require_login
 
 #Authentication
-if "logged_in" not in st.session_state or not st.session_state.logged_in:
-    st.error("You must be logged in to view this page")
-    if st.button("Go to login"):
-        st.switch_page("pages/1_🔐_Login.py")
-    st.stop()
+require_login()
 
 # Page configuration
 st.set_page_config(
@@ -251,37 +248,33 @@ if prompt:
     # Call AI Assistant
     if client and ai_available:
         try:
-            # Set the system prompt
+            # Set the system prompt and restore earlier turns (minus the message just added)
             client.set_system_prompt(system_prompts[domain])
-            
-            # Call with streaming enabled 
-            with st.spinner("🤔 Analyzing..."):
-                response_generator = client.send_message(
-                    user_message=prompt,
-                    temperature=temperature,
-                    stream=True
-                )
+            client.load_history(st.session_state.messages[:-1])
             
             # Display assistant message with streaming 
             with st.chat_message("assistant"):
                 container = st.empty() 
                 full_reply = "" 
                 
-                # Process each chunk as it arrives
+                # Process each text delta as it arrives (history is committed when the stream completes)
                 try:
-                    for chunk in response_generator:
-                        if chunk.choices[0].delta.content:
-                            delta_content = chunk.choices[0].delta.content
-                            full_reply += delta_content
-                            # Update display with cursor effect
-                            container.markdown(full_reply + "▌")
-                except:
-                    # If streaming fails, try non-streaming
-                    full_reply = client.send_message(prompt, temperature=temperature, stream=False)
-                    container.markdown(full_reply)
+                    for delta_content in client.stream_message(prompt, temperature=temperature):
+                        full_reply += delta_content
+                        # Update display with cursor effect
+                        container.markdown(full_reply + "▌")
+                except Exception as e:
+                    st.error(f"Streaming stopped: {str(e)}")
                 
                 # Remove cursor and show final response
                 container.markdown(full_reply)
+                
+                metrics = client.last_stream_metrics
+                if metrics.get("ttft") is not None:
+                    st.caption(
+                        f"First token in {metrics['ttft']:.2f}s · "
+                        f"{metrics['tokens_per_sec']:.0f} tokens/s · {metrics['seconds']:.1f}s total"
+                    )
             
             # Add assistant response to session state 
             st.session_state.messages.append({
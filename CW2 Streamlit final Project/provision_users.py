@@ -0,0 +1,61 @@
+"""Bulk user provisioning script"""
+
+"""Here, I onboard many accounts at once from a CSV or JSON Lines file (username, password or password_hash, role).
+
+Usage:
+    python provision_users.py new_staff.csv
+    python provision_users.py accounts.jsonl --rounds 10 --workers 4 --batch-size 2000
+"""
+import argparse
+import sys
+from typing import List
+from services.database_manager import DatabaseManager
+from services.auth_manager import HashingPool, DEFAULT_HASH_WORKERS, IMPORT_MIN_ROUNDS, MAX_ROUNDS
+from services.user_provisioning import DEFAULT_BATCH_SIZE, UserProvisioner, read_records
+
+
+def print_progress(report):
+    """One line per committed batch."""
+    print(f"  batch {report['batches']:>4}: {report['created']:>7} created, "
+          f"{report['skipped_existing'] + report['duplicates']:>6} skipped, {report['invalid']:>5} invalid "
+          f"({report['users_per_sec']:.0f} users/s)")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Create users in bulk from a CSV or JSON Lines file.")
+    parser.add_argument("path", help="input file (.csv/.txt with a header row, or .jsonl)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="input format (default: from the file extension)")
+    parser.add_argument("--db", default="DATA/intelligence.db", help="database file")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="users per transaction")
+    parser.add_argument("--workers", type=int, default=DEFAULT_HASH_WORKERS, help="bcrypt worker threads")
+    parser.add_argument("--rounds", type=int, choices=range(IMPORT_MIN_ROUNDS, MAX_ROUNDS + 1), metavar="N",
+                        help="bcrypt cost for plain passwords (default: calibrated; lower costs are "
+                             "upgraded on first login)")
+    parser.add_argument("--role", default="user", help="role for records without one")
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(db_path=args.db)
+    pool = HashingPool(workers=args.workers, max_pending=args.workers * 4)
+    provisioner = UserProvisioner(db, hashing_pool=pool, batch_size=args.batch_size,
+                                  rounds=args.rounds, default_role=args.role)
+    print(f"Provisioning users from {args.path} (bcrypt cost {provisioner.rounds}, {pool.workers} workers)")
+    try:
+        report = provisioner.provision(read_records(args.path, args.format), on_batch=print_progress)
+    finally:
+        pool.shutdown()
+        db.close()
+
+    print(f"Read {report['read']} records: {report['created']} created "
+          f"({report['hashed']} hashed, {report['prehashed']} pre-hashed), "
+          f"{report['skipped_existing']} already existed, {report['duplicates']} duplicates, "
+          f"{report['invalid']} invalid")
+    if report["malformed_hashes"]:
+        print(f"Malformed bcrypt hashes skipped: {report['malformed_hashes']} "
+              f"(values starting with $2 must be complete $2a/$2b/$2y hashes)")
+    print(f"Finished in {report['seconds']:.1f} s ({report['users_per_sec']:.0f} users/s; "
+          f"waiting on hashes {report['hash_wait_seconds']:.1f} s, writing {report['write_seconds']:.1f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,31 @@
 """AI Assistant service class"""
-from typing import List, Dict, Optional
+import threading
+import time
+from typing import Any, Iterator, List, Dict, Optional, Sequence
 import openai
+from services.response_cache import ResponseCache
+from services.context_builder import DEFAULT_HISTORY_TOKENS, estimate_tokens, fit_history
+from services.async_ai_assistant import AsyncAIAssistant
+from services.summarization_pipeline import SummarizationPipeline
+
+#Domain analyses run deterministically so repeats can be served from the response cache
+ANALYSIS_TEMPERATURE = 0.0
 
 class AIAssistant:
     """Wrapper around OpenAI API for AI assistant functionality."""
     
-    def __init__(self, api_key: str = None, model: str = "gpt-4o-mini"):
+    def __init__(self, api_key: str = None, model: str = "gpt-4o-mini",
+                 cache: Optional[ResponseCache] = None):
         self.api_key = api_key
         self.model = model
+        self.cache = cache
+        #Token budget for the conversation history sent with each message
+        self.history_token_budget = DEFAULT_HISTORY_TOKENS
         self._history: List[Dict[str, str]] = []
         self._system_prompt = "You are a helpful assistant for my Multi-Domain Intelligence Platform."
         self.client = None
+        #Timing of the most recent stream_message call (time to first token, tokens/sec)
+        self.last_stream_metrics: Dict[str, Any] = {}
         
         if api_key:
             self.set_api_key(api_key)
@@ -27,10 +42,29 @@ class AIAssistant:
     
     #Messaging Methods
     def send_message(self, user_message: str, context: str = "", 
-                    temperature: float = 0.7, stream: bool = False):
-        """Send a message to the AI and get response."""
+                    temperature: float = 0.7, stream: bool = False, use_cache: bool = False):
+        """Send a message to the AI and get response.
+        
+        With use_cache (and a cache configured), identical requests are answered from the
+        response cache. stream=True returns stream_message()'s text deltas instead, which
+        are never cached and reach the history only once the stream completes.
+        """
         if not self.client:
             return "Error: OpenAI client not configured."
+        if stream:
+            return self.stream_message(user_message, context, temperature)
+        
+        history = fit_history(self._history, self.history_token_budget)
+        cache_key = None
+        if use_cache and self.cache is not None:
+            cache_key = ResponseCache.make_key(
+                self.model, self._system_prompt, temperature, user_message, context, history
+            )
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self._history.append({"role": "user", "content": user_message})
+                self._history.append({"role": "assistant", "content": cached})
+                return cached
         
         try:
             # Prepare messages
@@ -41,42 +75,96 @@ class AIAssistant:
             if context:
                 messages.append({"role": "system", "content": f"Context: {context}"})
             
-            # Add conversation history (last 10 messages)
-            for msg in self._history[-10:]:
+            # Add conversation history (last 10 messages that fit the token budget)
+            for msg in history:
                 messages.append(msg)
             
             # Add current message
             messages.append({"role": "user", "content": user_message})
             
-            if stream:
-                # For streaming responses
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=temperature,
-                    stream=True
-                )
-                return response
-            else:
-                # For regular responses
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=500
-                )
-                
-                ai_response = response.choices[0].message.content
-                
-                # Update history
-                self._history.append({"role": "user", "content": user_message})
-                self._history.append({"role": "assistant", "content": ai_response})
-                
-                return ai_response
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=500
+            )
+            
+            ai_response = response.choices[0].message.content
+            
+            if cache_key is not None and ai_response:
+                self.cache.put(cache_key, ai_response, self.model)
+            
+            # Update history
+            self._history.append({"role": "user", "content": user_message})
+            self._history.append({"role": "assistant", "content": ai_response})
+            
+            return ai_response
                 
         except Exception as e:
             return f"Error: {str(e)}"
     
+    def stream_message(self, user_message: str, context: str = "", temperature: float = 0.7,
+                       cancel_event: Optional[threading.Event] = None) -> Iterator[str]:
+        """Stream a reply as text deltas.
+        
+        The exchange is added to the history only when the stream completes. Setting
+        cancel_event (or closing the generator) stops the request early without
+        committing it. Timings are stored in last_stream_metrics.
+        """
+        if not self.client:
+            raise RuntimeError("OpenAI client not configured.")
+        
+        history = fit_history(self._history, self.history_token_budget)
+        messages = [{"role": "system", "content": self._system_prompt}]
+        if context:
+            messages.append({"role": "system", "content": f"Context: {context}"})
+        messages.extend(history)
+        messages.append({"role": "user", "content": user_message})
+        
+        metrics = {"ttft": None, "seconds": 0.0, "chunks": 0, "tokens": 0,
+                   "tokens_per_sec": 0.0, "completed": False, "cancelled": False}
+        self.last_stream_metrics = metrics
+        start = time.perf_counter()
+        parts: List[str] = []
+        
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            stream=True
+        )
+        try:
+            for chunk in response:
+                if cancel_event is not None and cancel_event.is_set():
+                    metrics["cancelled"] = True
+                    break
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if metrics["ttft"] is None:
+                    metrics["ttft"] = time.perf_counter() - start
+                metrics["chunks"] += 1
+                parts.append(delta)
+                yield delta
+            else:
+                metrics["completed"] = True
+        except GeneratorExit:
+            metrics["cancelled"] = True
+            raise
+        finally:
+            response.close()
+            reply = "".join(parts)
+            metrics["seconds"] = time.perf_counter() - start
+            metrics["tokens"] = estimate_tokens(reply)
+            generating = metrics["seconds"] - (metrics["ttft"] or 0.0)
+            if generating > 0:
+                metrics["tokens_per_sec"] = metrics["tokens"] / generating
+            if metrics["completed"]:
+                self._history.append({"role": "user", "content": user_message})
+                self._history.append({"role": "assistant", "content": reply})
+    
     #Domain-specific Analysis Methods
     def analyze_security_incident(self, incident_description: str) -> str:
         """Analyze a security incident."""
@@ -92,7 +180,7 @@ Please provide:
 5. Incident response bottlenecks by identifying phishing surges and analyzing resolution times.
 
 Format with clear sections and bullet points."""
-        return self.send_message(prompt)
+        return self.send_message(prompt, temperature=ANALYSIS_TEMPERATURE, use_cache=True)
     
     def analyze_dataset(self, dataset_info: str) -> str:
         """Analyze a dataset for data science insights."""
@@ -107,7 +195,7 @@ Provide insights on:
 4. Provide integration opportunities
 
 Format with clear sections and actionable insights."""
-        return self.send_message(prompt)
+        return self.send_message(prompt, temperature=ANALYSIS_TEMPERATURE, use_cache=True)
     
     def analyze_it_ticket(self, ticket_info: str) -> str:
         """Generate a response for an IT ticket."""
@@ -122,7 +210,7 @@ Provide analysis covering:
 4. Process bottlenecks
 
 Format with clear sections and actionable recommendations."""
-        return self.send_message(prompt)
+        return self.send_message(prompt, temperature=ANALYSIS_TEMPERATURE, use_cache=True)
     
     def analyze_users(self, users_info: str) -> str:
         """Analyze user accounts."""
@@ -138,13 +226,37 @@ Provide analysis covering:
 5. Compliance considerations
 
 Format with clear sections and actionable insights."""
-        return self.send_message(prompt)
+        return self.send_message(prompt, temperature=ANALYSIS_TEMPERATURE, use_cache=True)
+    
+    def summarize_database(self, db_manager, kinds: Sequence[str] = ("incident", "ticket", "dataset"),
+                           max_concurrency: int = 8, **pipeline_options) -> Dict[str, Any]:
+        """Brief on whole tables with the map-reduce summarization pipeline.
+        
+        Returns per-table summaries, the merged briefing and run metrics.
+        """
+        if not self.client:
+            raise RuntimeError("OpenAI client not configured.")
+        assistant = AsyncAIAssistant(
+            api_key=self.api_key, model=self.model, max_concurrency=max_concurrency, cache=self.cache
+        )
+        assistant.set_system_prompt(self._system_prompt)
+        pipeline = SummarizationPipeline(db_manager, assistant, **pipeline_options)
+        result = pipeline.briefing(kinds)
+        result["metrics"] = pipeline.last_run_metrics
+        return result
     
     #History Methods
     def clear_history(self):
         """Clear conversation history."""
         self._history.clear()
     
+    def load_history(self, messages: Sequence[Dict[str, str]]):
+        """Replace the conversation history (e.g. from Streamlit session state)."""
+        self._history = [
+            {"role": m["role"], "content": m["content"]}
+            for m in messages if m.get("role") in ("user", "assistant")
+        ]
+    
     def get_history(self) -> List[Dict[str, str]]:
         """Get conversation history."""
         return self._history.copy()
\ No newline at end of file
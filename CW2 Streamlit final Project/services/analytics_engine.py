@@ -0,0 +1,257 @@
+"""Vectorized analytics engine service class"""
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from models.security_incident import SEVERITY_LEVELS
+from services.snapshot_manager import DELTA_BATCH, FULL_RELOAD_RATIO, change_log_head, changed_ids
+
+#Tables the engine loads: two category columns crossed into one count matrix, plus numeric columns
+ANALYTICS_TABLES = {
+    "incidents": {"table": "cyber_incidents", "dims": ("severity", "status"), "numeric": ()},
+    "tickets": {"table": "it_tickets", "dims": ("priority", "status"), "numeric": ()},
+    "datasets": {"table": "datasets_metadata", "dims": ("category", "source"), "numeric": ("size",)},
+}
+_SECTIONS = {spec["table"]: name for name, spec in ANALYTICS_TABLES.items()}
+
+
+class _Columns:
+    """One table held as NumPy columns: sorted ids, category codes, numeric values and a live mask."""
+
+    def __init__(self, spec: Dict[str, Any], frame: pd.DataFrame):
+        self.spec = spec
+        self.size = len(frame)
+        self.ids = frame["id"].to_numpy(dtype=np.int64)
+        self.alive = np.ones(self.size, dtype=bool)
+        self.codes: Dict[str, np.ndarray] = {}
+        self.labels: Dict[str, List[str]] = {}
+        for column in spec["dims"]:
+            codes, uniques = pd.factorize(frame[column].fillna(""), sort=True)
+            self.codes[column] = codes.astype(np.int32)
+            self.labels[column] = [str(label) for label in uniques]
+        self.numeric = {column: frame[column].fillna(0).to_numpy(dtype=np.int64) for column in spec["numeric"]}
+        self.counts = self._crosstab()
+        self.sums = {column: int(values.sum()) for column, values in self.numeric.items()}
+        self.maxima = {column: int(values.max()) if self.size else 0 for column, values in self.numeric.items()}
+
+    def _crosstab(self) -> np.ndarray:
+        """Count live rows per (first dim, second dim) pair with one bincount."""
+        first, second = self.spec["dims"]
+        width = len(self.labels[second])
+        combined = self.codes[first][:self.size].astype(np.int64) * width + self.codes[second][:self.size]
+        counts = np.bincount(combined[self.alive[:self.size]], minlength=len(self.labels[first]) * width)
+        return counts.reshape(len(self.labels[first]), width)
+
+    #Single-row changes
+    def _code(self, column: str, value: Any) -> int:
+        """Code for a label, adding the label (and a count matrix row/column) if it is new."""
+        label = "" if value is None else str(value)
+        labels = self.labels[column]
+        if label in labels:
+            return labels.index(label)
+        labels.append(label)
+        axis = self.spec["dims"].index(column)
+        pad = [(0, 0), (0, 0)]
+        pad[axis] = (0, 1)
+        self.counts = np.pad(self.counts, pad)
+        return len(labels) - 1
+
+    def position(self, row_id: int) -> Optional[int]:
+        """Position of a live row, or None."""
+        position = int(np.searchsorted(self.ids[:self.size], row_id))
+        if position < self.size and self.ids[position] == row_id and self.alive[position]:
+            return position
+        return None
+
+    def remove(self, position: int) -> None:
+        """Take a row out of every aggregate and mark it dead."""
+        first, second = self.spec["dims"]
+        self.counts[self.codes[first][position], self.codes[second][position]] -= 1
+        self.alive[position] = False
+        for column, values in self.numeric.items():
+            self.sums[column] -= int(values[position])
+            if values[position] >= self.maxima[column]:
+                live = values[:self.size][self.alive[:self.size]]
+                self.maxima[column] = int(live.max()) if len(live) else 0
+
+    def put(self, row: Dict[str, Any], position: Optional[int] = None) -> None:
+        """Add a row (appended if new, rewritten in place if it exists)."""
+        if position is None:
+            if self.size and row["id"] < self.ids[self.size - 1]:
+                raise ValueError("rows must be appended in id order")
+            position = self.size
+            self._grow(position + 1)
+            self.size += 1
+            self.ids[position] = row["id"]
+        first, second = self.spec["dims"]
+        for column in (first, second):
+            self.codes[column][position] = self._code(column, row.get(column))
+        self.counts[self.codes[first][position], self.codes[second][position]] += 1
+        self.alive[position] = True
+        for column, values in self.numeric.items():
+            values[position] = row.get(column) or 0
+            self.sums[column] += int(values[position])
+            self.maxima[column] = max(self.maxima[column], int(values[position]))
+
+    def _grow(self, needed: int) -> None:
+        """Make room for appended rows (capacity doubles)."""
+        if needed <= len(self.ids):
+            return
+        capacity = max(needed, len(self.ids) * 2, 64)
+
+        def grown(array: np.ndarray) -> np.ndarray:
+            new = np.zeros(capacity, dtype=array.dtype)
+            new[:len(array)] = array
+            return new
+
+        self.ids = grown(self.ids)
+        self.alive = grown(self.alive)
+        self.codes = {column: grown(codes) for column, codes in self.codes.items()}
+        self.numeric = {column: grown(values) for column, values in self.numeric.items()}
+
+
+class AnalyticsEngine:
+    """Computes every Data Science page breakdown from NumPy columns and caches the result.
+
+    Each table is loaded once with category columns coded as integers. A single bincount
+    per table gives the (dim1 x dim2) count matrix that every count and crosstab is read
+    from. Each bundle() reads the change log head: rows changed since a table was loaded
+    are refetched and patched into the matrices in place, and large deltas reload the
+    table. Writes from other processes are seen too, since the log lives in the database.
+    """
+
+    def __init__(self, db_manager):
+        self._db = db_manager
+        self._lock = threading.RLock()
+        self._tables: Dict[str, _Columns] = {}
+        #Change log version each loaded table reflects
+        self._versions: Dict[str, int] = {}
+        self._bundle: Optional[Dict[str, Any]] = None
+        self.last_refresh_metrics: Dict[str, Any] = {}
+
+    #Loading
+    def _load(self, name: str) -> _Columns:
+        """Load one table's analytic columns straight into a typed frame."""
+        spec = ANALYTICS_TABLES[name]
+        columns = ("id",) + spec["dims"] + spec["numeric"]
+        frame = self._db.fetch_frame(f"SELECT {', '.join(columns)} FROM {spec['table']} ORDER BY id")
+        return _Columns(spec, frame)
+
+    def _patch(self, columns: _Columns, ids: List[int]) -> None:
+        """Refetch changed rows into the columns (ids that no longer exist were deleted)."""
+        spec = columns.spec
+        select = f"SELECT id, {', '.join(spec['dims'] + spec['numeric'])} FROM {spec['table']}"
+        found: Dict[int, Dict[str, Any]] = {}
+        for start in range(0, len(ids), DELTA_BATCH):
+            batch = ids[start:start + DELTA_BATCH]
+            for row in self._db.fetch_all(f"{select} WHERE id IN ({', '.join('?' * len(batch))})", batch):
+                found[row["id"]] = row
+        for row_id in sorted(ids):
+            position = columns.position(row_id)
+            if position is not None:
+                columns.remove(position)
+            if row_id in found:
+                columns.put(found[row_id], position)
+
+    def _sync(self, name: str, head: int) -> Dict[str, int]:
+        """Bring one table up to the change log head; returns how many rows were patched/reloaded."""
+        columns = self._tables.get(name)
+        if columns is not None and self._versions[name] == head:
+            return {"patched": 0, "reloaded": 0}
+        ids = None
+        if columns is not None:
+            ids = changed_ids(self._db, ANALYTICS_TABLES[name]["table"], self._versions[name], head)
+        if ids is not None and len(ids) <= max(1, columns.size) * FULL_RELOAD_RATIO:
+            try:
+                self._patch(columns, ids)
+                self._versions[name] = head
+                return {"patched": len(ids), "reloaded": 0}
+            except ValueError:
+                #A row came back below the last id (an explicit id); reload instead
+                pass
+        self._tables[name] = self._load(name)
+        self._versions[name] = head
+        return {"patched": 0, "reloaded": 1}
+
+    #Results
+    @staticmethod
+    def _breakdown(columns: _Columns) -> Dict[str, Any]:
+        """Read every count for one table off its count matrix."""
+        first, second = columns.spec["dims"]
+        counts = columns.counts
+        by_first, by_second = counts.sum(axis=1), counts.sum(axis=0)
+        keep_rows, keep_cols = by_first > 0, by_second > 0
+        result = {
+            "total": int(counts.sum()),
+            f"by_{first}": {label: int(n) for label, n in zip(columns.labels[first], by_first) if n},
+            f"by_{second}": {label: int(n) for label, n in zip(columns.labels[second], by_second) if n},
+            f"{first}_{second}": {
+                "names": [first.title(), second.title()],
+                "index": [label for label, keep in zip(columns.labels[first], keep_rows) if keep],
+                "columns": [label for label, keep in zip(columns.labels[second], keep_cols) if keep],
+                "counts": counts[keep_rows][:, keep_cols].tolist(),
+            },
+        }
+        for column in columns.numeric:
+            total = result["total"]
+            result[column] = {
+                "total": columns.sums[column],
+                "mean": columns.sums[column] / total if total else 0.0,
+                "max": columns.maxima[column] if total else 0,
+            }
+        return result
+
+    def bundle(self) -> Dict[str, Any]:
+        """Return every breakdown, loading on first use and applying logged writes.
+
+        The bundle is shared between sessions and rebuilt only after a change, so treat it as read-only.
+        """
+        with self._lock:
+            start = time.perf_counter()
+            applied = {"patched": 0, "reloaded": 0}
+            #Read the head before the rows: a change racing the load is applied again next call
+            head = change_log_head(self._db)
+            for name in ANALYTICS_TABLES:
+                for key, value in self._sync(name, head).items():
+                    applied[key] += value
+            if self._bundle is None or applied["patched"] or applied["reloaded"]:
+                bundle = {name: self._breakdown(columns) for name, columns in self._tables.items()}
+                incidents = bundle["incidents"]
+                levels: Dict[int, int] = {}
+                for label, n in incidents["by_severity"].items():
+                    level = SEVERITY_LEVELS.get(label.lower(), 0)
+                    levels[level] = levels.get(level, 0) + n
+                incidents["by_severity_level"] = dict(sorted(levels.items()))
+                self._bundle = bundle
+            self.last_refresh_metrics = dict(applied, seconds=time.perf_counter() - start)
+            return self._bundle
+
+    def reload(self) -> None:
+        """Drop the loaded columns so the next bundle() reads every table again."""
+        with self._lock:
+            self._tables = {}
+            self._versions = {}
+            self._bundle = None
+
+
+def crosstab_frame(crosstab: Dict[str, Any]) -> pd.DataFrame:
+    """Turn a bundle crosstab into a DataFrame (index x columns) for charts."""
+    frame = pd.DataFrame(crosstab["counts"], index=crosstab["index"], columns=crosstab["columns"])
+    return frame.rename_axis(index=crosstab["names"][0], columns=crosstab["names"][1])
+
+
+#Process-wide registry so every session shares one engine per database file
+_engines: Dict[str, AnalyticsEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_analytics_engine(db_manager) -> AnalyticsEngine:
+    """Return the shared engine for a database (it reads through its own DatabaseManager)."""
+    key = str(Path(db_manager._db_path).resolve())
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = _engines[key] = AnalyticsEngine(type(db_manager)(db_manager._db_path))
+        return engine
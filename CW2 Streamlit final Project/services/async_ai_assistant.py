@@ -0,0 +1,202 @@
+"""Asynchronous AI assistant service class"""
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+import openai
+from services.response_cache import ResponseCache
+
+#Errors worth retrying (network trouble, rate limits, server-side failures)
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class AsyncAIAssistant:
+    """Runs many OpenAI chat completions concurrently with timeouts and retries.
+
+    Each batch opens its own AsyncOpenAI client, so run_many can be called from a plain
+    (synchronous) Streamlit script.
+    """
+
+    def __init__(self, api_key: str = None, model: str = "gpt-4o-mini", base_url: Optional[str] = None,
+                 max_concurrency: int = 8, timeout: float = 30.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 cache: Optional[ResponseCache] = None):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.timeout = timeout
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache = cache
+        self._system_prompt = "You are a helpful assistant for my Multi-Domain Intelligence Platform."
+        self.last_batch_metrics: Dict[str, Any] = {}
+
+    #Configuration methods
+    def set_system_prompt(self, prompt: str):
+        """Set the system prompt for every request."""
+        self._system_prompt = prompt
+
+    def _new_client(self) -> "openai.AsyncOpenAI":
+        """Create a client for one batch; retries are handled here, not by the SDK."""
+        return openai.AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            timeout=self.timeout,
+            max_retries=0
+        )
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt (1-based)."""
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def _messages(self, prompt: str, context: str = "") -> List[Dict[str, str]]:
+        """Build the chat messages for one prompt."""
+        messages = [{"role": "system", "content": self._system_prompt}]
+        if context:
+            messages.append({"role": "system", "content": f"Context: {context}"})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    #Messaging methods
+    async def complete(self, client: "openai.AsyncOpenAI", prompt: str, context: str = "",
+                       temperature: float = 0.7, max_tokens: int = 500,
+                       semaphore: Optional[asyncio.Semaphore] = None,
+                       use_cache: bool = False) -> Dict[str, Any]:
+        """Run one prompt with a per-attempt timeout and jittered retries.
+
+        Returns a result dict (response, error, attempts, seconds, cached); errors are not raised.
+        """
+        start = time.perf_counter()
+        cache_key = None
+        if use_cache and self.cache is not None:
+            cache_key = ResponseCache.make_key(self.model, self._system_prompt, temperature, prompt, context)
+            #The cache is SQLite-backed: keep its blocking reads and writes off the event loop (it
+            #serializes calls on its own DatabaseManager, so many worker threads may share it)
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                return {"response": cached, "error": None, "attempts": 0,
+                        "seconds": time.perf_counter() - start, "cached": True}
+
+        attempts = 0
+        error = None
+        while attempts <= self.max_retries:
+            attempts += 1
+            try:
+                if semaphore is not None:
+                    async with semaphore:
+                        response = await self._create(client, prompt, context, temperature, max_tokens)
+                else:
+                    response = await self._create(client, prompt, context, temperature, max_tokens)
+                content = response.choices[0].message.content
+                if cache_key is not None and content:
+                    await asyncio.to_thread(self.cache.put, cache_key, content, self.model)
+                return {
+                    "response": content,
+                    "error": None,
+                    "attempts": attempts,
+                    "seconds": time.perf_counter() - start,
+                    "cached": False,
+                }
+            except RETRYABLE_ERRORS as e:
+                error = e
+                if attempts <= self.max_retries:
+                    #Sleep outside the semaphore so waiting retries don't block other prompts
+                    await asyncio.sleep(self._backoff(attempts))
+            except Exception as e:
+                error = e
+                break
+
+        message = "request timed out" if isinstance(error, asyncio.TimeoutError) else str(error)
+        return {
+            "response": None,
+            "error": f"Error: {message}",
+            "attempts": attempts,
+            "seconds": time.perf_counter() - start,
+            "cached": False,
+        }
+
+    async def _create(self, client, prompt, context, temperature, max_tokens):
+        """Send one chat completion request, bounded by the per-request timeout."""
+        return await asyncio.wait_for(
+            client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(prompt, context),
+                temperature=temperature,
+                max_tokens=max_tokens
+            ),
+            timeout=self.timeout
+        )
+
+    async def analyze_many(self, prompts: Sequence[str], context: str = "", temperature: float = 0.7,
+                           max_tokens: int = 500, use_cache: bool = False) -> List[Dict[str, Any]]:
+        """Run every prompt concurrently (at most max_concurrency in flight).
+
+        Results come back in the same order as the prompts, one dict per prompt.
+        """
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        client = self._new_client()
+        try:
+            results = await asyncio.gather(*(
+                self.complete(client, prompt, context, temperature, max_tokens, semaphore, use_cache)
+                for prompt in prompts
+            ))
+        finally:
+            await client.close()
+
+        for index, (prompt, result) in enumerate(zip(prompts, results)):
+            result["index"] = index
+            result["prompt"] = prompt
+        failed = sum(1 for result in results if result["error"])
+        self.last_batch_metrics = {
+            "count": len(results),
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "retries": sum(max(result["attempts"] - 1, 0) for result in results),
+            "cached": sum(1 for result in results if result["cached"]),
+            "seconds": time.perf_counter() - start,
+            "slowest": max((result["seconds"] for result in results), default=0.0),
+        }
+        return list(results)
+
+    def run_many(self, prompts: Sequence[str], context: str = "", temperature: float = 0.7,
+                 max_tokens: int = 500, use_cache: bool = False) -> List[Dict[str, Any]]:
+        """Synchronous wrapper around analyze_many for Streamlit pages and scripts."""
+        if not self.api_key:
+            return [{
+                "index": index, "prompt": prompt, "response": None,
+                "error": "Error: OpenAI client not configured.", "attempts": 0, "seconds": 0.0,
+                "cached": False
+            } for index, prompt in enumerate(prompts)]
+
+        coroutine = self.analyze_many(prompts, context, temperature, max_tokens, use_cache)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+
+        #Already inside an event loop: run the batch on a helper thread with its own loop
+        outcome: Dict[str, Any] = {}
+
+        def runner():
+            try:
+                outcome["results"] = asyncio.run(coroutine)
+            except BaseException as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=runner, daemon=True)
+        thread.start()
+        thread.join()
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["results"]
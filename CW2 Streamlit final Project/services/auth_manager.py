@@ -1,18 +1,95 @@
 """Authentication manager service class"""
-from typing import Optional
+import math
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
 from models.user import User
 from services.database_manager import DatabaseManager
+from services.login_throttle import LoginThrottle, get_login_throttle
 import bcrypt
 
+#Hashing pool defaults (overridable with AUTH_HASH_WORKERS and AUTH_HASH_QUEUE)
+DEFAULT_HASH_WORKERS = int(os.environ.get("AUTH_HASH_WORKERS", str(os.cpu_count() or 1)))
+DEFAULT_HASH_QUEUE = int(os.environ.get("AUTH_HASH_QUEUE", "64"))
+DEFAULT_SUBMIT_TIMEOUT = 30.0
+
+#bcrypt cost calibration: the target verify time (AUTH_HASH_TARGET_MS) picks the work factor,
+#within these bounds; AUTH_BCRYPT_ROUNDS pins it instead. The floor (AUTH_BCRYPT_MIN_ROUNDS)
+#defaults to 12, the fixed cost used before calibration, so a slow host never weakens hashes
+DEFAULT_TARGET_MS = float(os.environ.get("AUTH_HASH_TARGET_MS", "250"))
+MIN_ROUNDS = int(os.environ.get("AUTH_BCRYPT_MIN_ROUNDS", "12"))
+MAX_ROUNDS = 16
+FIXED_ROUNDS = os.environ.get("AUTH_BCRYPT_ROUNDS")
+CALIBRATION_ROUNDS = 10
+CALIBRATION_SAMPLES = 3
+#Bulk imports may hash below the floor for speed; those hashes are upgraded on first login
+IMPORT_MIN_ROUNDS = 10
+#Hashes are only upgraded when more than this many rounds below the target, so hosts that
+#calibrate a round apart (or one host across restarts) don't keep rewriting each other's hashes
+REHASH_TOLERANCE = 1
+BCRYPT_COST = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
 
 #Password hashing class
 class Hasher:
-    """Password hashing utility using bcrypt."""
+    """Password hashing utility using bcrypt.
+    
+    The work factor is calibrated once per process so a verify takes about the target time
+    on this host; each extra round doubles the cost, so one timing at CALIBRATION_ROUNDS is
+    enough. Stored hashes are only ever upgraded, never lowered to a cheaper cost.
+    """
+    
+    rounds: Optional[int] = None
+    _calibrate_lock = threading.Lock()
+    
+    @classmethod
+    def calibrate(cls, target_ms: float = DEFAULT_TARGET_MS) -> int:
+        """Pick (and remember) the cost whose verify time is closest to target_ms on this host."""
+        if FIXED_ROUNDS:
+            rounds = int(FIXED_ROUNDS)
+        else:
+            hashed = bcrypt.hashpw(b"calibration", bcrypt.gensalt(CALIBRATION_ROUNDS))
+            samples = []
+            for _ in range(CALIBRATION_SAMPLES):
+                start = time.perf_counter()
+                bcrypt.checkpw(b"calibration", hashed)
+                samples.append((time.perf_counter() - start) * 1000)
+            #Fastest sample is the least disturbed by other load
+            rounds = CALIBRATION_ROUNDS + round(math.log2(max(target_ms, 1e-3) / max(min(samples), 1e-3)))
+        cls.rounds = min(MAX_ROUNDS, max(MIN_ROUNDS, rounds))
+        return cls.rounds
+    
+    @classmethod
+    def current_rounds(cls) -> int:
+        """The calibrated cost, calibrating on first use."""
+        if cls.rounds is None:
+            with cls._calibrate_lock:
+                if cls.rounds is None:
+                    cls.calibrate()
+        return cls.rounds
     
     @staticmethod
-    def hash_password(password: str) -> str:
-        """Return bcrypt hash (utf-8 string)."""
-        return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    def cost(hashed: str) -> Optional[int]:
+        """Work factor stored in a bcrypt hash, or None if it is not one."""
+        match = BCRYPT_COST.match(hashed or "")
+        return int(match.group(1)) if match else None
+    
+    @classmethod
+    def needs_rehash(cls, hashed: str) -> bool:
+        """True if a (valid) hash is below the floor or clearly below this host's target cost."""
+        cost = cls.cost(hashed)
+        if cost is None:
+            return False
+        return cost < MIN_ROUNDS or cost < cls.current_rounds() - REHASH_TOLERANCE
+    
+    @classmethod
+    def hash_password(cls, password: str) -> str:
+        """Return bcrypt hash (utf-8 string) at the calibrated cost."""
+        salt = bcrypt.gensalt(cls.current_rounds())
+        return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
     
     @staticmethod
     def check_password(password: str, hashed: str) -> bool:
@@ -22,13 +99,117 @@ class Hasher:
         except Exception:
             return False
 
+#Bounded bcrypt worker pool
+class HashingPool:
+    """Runs bcrypt hashing and checks on a fixed set of worker threads.
+    
+    bcrypt releases the GIL, so workers hash in parallel up to the core count while the
+    Streamlit script threads just wait on the result. At most max_pending jobs may be
+    queued or running; further submissions wait for a slot and time out after
+    submit_timeout, so a login burst queues up instead of oversubscribing the CPU.
+    """
+    
+    def __init__(self, workers: int = DEFAULT_HASH_WORKERS, max_pending: int = DEFAULT_HASH_QUEUE,
+                 submit_timeout: float = DEFAULT_SUBMIT_TIMEOUT):
+        self.workers = max(1, int(workers))
+        self.max_pending = max(self.workers, int(max_pending))
+        self._submit_timeout = submit_timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._stats = {"submitted": 0, "completed": 0, "timeouts": 0, "peak_queued": 0,
+                       "wait_seconds": 0.0, "run_seconds": 0.0}
+    
+    def submit(self, func: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Future:
+        """Queue func(*args) on a worker; raises TimeoutError if the queue stays full.
+        
+        timeout overrides the pool's submit_timeout (0 means don't wait for a slot).
+        """
+        timeout = self._submit_timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise TimeoutError(f"Password hashing queue full after {timeout}s")
+        queued_at = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+            self._stats["submitted"] += 1
+            self._stats["peak_queued"] = max(self._stats["peak_queued"], self._queued)
+        
+        def run() -> Any:
+            started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._stats["wait_seconds"] += started - queued_at
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._stats["completed"] += 1
+                    self._stats["run_seconds"] += time.perf_counter() - started
+                self._slots.release()
+        
+        try:
+            return self._executor.submit(run)
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+            self._slots.release()
+            raise
+    
+    def hash_password(self, password: str) -> str:
+        """Hash a password on the pool and wait for the result."""
+        return self.submit(Hasher.hash_password, password).result()
+    
+    def check_password(self, password: str, hashed: str) -> bool:
+        """Check a password on the pool and wait for the result."""
+        return self.submit(Hasher.check_password, password, hashed).result()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, running jobs and average wait/run times."""
+        with self._lock:
+            stats = dict(self._stats, queued=self._queued, running=self._running,
+                         workers=self.workers, max_pending=self.max_pending)
+        completed = stats["completed"] or 1
+        stats["avg_wait_ms"] = stats["wait_seconds"] / completed * 1000
+        stats["avg_run_ms"] = stats["run_seconds"] / completed * 1000
+        return stats
+    
+    def shutdown(self) -> None:
+        """Finish queued jobs and stop the workers."""
+        self._executor.shutdown(wait=True)
+
+
+#One pool per process, shared by every session
+_hashing_pool: Optional[HashingPool] = None
+_hashing_pool_lock = threading.Lock()
+
+
+def get_hashing_pool() -> HashingPool:
+    """Return the process-wide hashing pool, creating it on first use."""
+    global _hashing_pool
+    with _hashing_pool_lock:
+        if _hashing_pool is None:
+            _hashing_pool = HashingPool()
+        return _hashing_pool
+
+
 #Authentication manager class
 class AuthManager:
     """Handles user registration and login."""
     
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, hashing_pool: Optional[HashingPool] = None,
+                 throttle: Optional[LoginThrottle] = None):
         self._db = db_manager
         self._hasher = Hasher()
+        #bcrypt runs on the shared worker pool rather than the calling script thread
+        self._pool = hashing_pool or get_hashing_pool()
+        #Failed-login counters are checked before any bcrypt work
+        self._throttle = throttle or get_login_throttle(db_manager)
     
 
     #Register a new user
@@ -41,7 +222,7 @@ class AuthManager:
                 return False
             
             # Hash password
-            password_hash = self._hasher.hash_password(password)
+            password_hash = self._pool.hash_password(password)
             
             # Add user to database
             self._db.add_user(username, password_hash, role)
@@ -51,15 +232,29 @@ class AuthManager:
             return False
     
     #Login
-    def login_user(self, username: str, password: str) -> Optional[User]:
-        """Authenticate a user and return User object."""
+    def login_user(self, username: str, password: str, source: Optional[str] = None) -> Optional[User]:
+        """Authenticate a user and return User object.
+        
+        source identifies the client (e.g. its address); locked usernames or sources are
+        refused before the user lookup and bcrypt, see lockout_remaining().
+        """
+        #Checking and reserving a failure slot is one step, so a concurrent burst can't
+        #all slip past the limit before the first failure is recorded
+        attempt = self._throttle.begin(username, source)
+        if attempt is None:
+            return None
         try:
             user_data = self._db.get_user(username)
             if user_data is None:
+                #Unknown usernames count too, so guessing names still trips the source limit
+                self._throttle.fail(attempt)
                 return None
             
             # Verify password
-            if self._hasher.check_password(password, user_data["password_hash"]):
+            if self._pool.check_password(password, user_data["password_hash"]):
+                self._throttle.succeed(attempt)
+                if Hasher.needs_rehash(user_data["password_hash"]):
+                    self._rehash(user_data["id"], password, user_data["password_hash"])
                 return User(
                     username=user_data["username"],
                     password_hash=user_data["password_hash"],
@@ -67,11 +262,44 @@ class AuthManager:
                     user_id=user_data["id"],
                     created_at=user_data.get("created_at")
                 )
+            self._throttle.fail(attempt)
             return None
         except Exception as e:
+            #No verdict (e.g. the hashing queue timed out): don't count it as a failure
+            self._throttle.release(attempt)
             print(f"Login error: {e}")
             return None
     
+    def _rehash(self, user_id: int, password: str, old_hash: str) -> None:
+        """Re-hash a password at the calibrated cost in the background and store it.
+        
+        The login returns without waiting; the update only applies if the stored hash is
+        still old_hash, so a password change made meanwhile is kept.
+        """
+        def store(future: Future) -> None:
+            try:
+                self._db.update_user_password(user_id, future.result(), expected_hash=old_hash)
+            except Exception as e:
+                print(f"Rehash error: {e}")
+        
+        try:
+            self._pool.submit(Hasher.hash_password, password, timeout=0).add_done_callback(store)
+        except TimeoutError:
+            #Busy pool: skip it rather than delay the login; the next login tries again
+            pass
+    
+    def lockout_remaining(self, username: str, source: Optional[str] = None) -> float:
+        """Seconds before this username/source may try to log in again (0 if not locked)."""
+        return self._throttle.retry_after(username, source)
+    
+    def throttle_stats(self) -> Dict[str, Any]:
+        """Get login throttle statistics (checks, blocked attempts, failures, batched writes)."""
+        return self._throttle.stats()
+    
+    def hashing_stats(self) -> Dict[str, Any]:
+        """Get password hashing pool statistics (queue depth, waits, run times)."""
+        return self._pool.stats()
+    
     #Admin and utility functions
     def get_all_users(self):
         """Get all registered users."""
@@ -0,0 +1,166 @@
+"""SQLite connection pool service"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+#Pool defaults (the size can be overridden with the DB_POOL_SIZE environment variable)
+DEFAULT_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+DEFAULT_CHECKOUT_TIMEOUT = 30.0
+
+#Pragmas applied once to every new connection
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=134217728",
+)
+
+
+class ConnectionPool:
+    """Thread-safe pool of reusable SQLite connections for one database file."""
+
+    def __init__(self, db_path: str, size: int = DEFAULT_POOL_SIZE,
+                 busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS,
+                 checkout_timeout: float = DEFAULT_CHECKOUT_TIMEOUT):
+        self._db_path = Path(db_path)
+        self._size = max(1, int(size))
+        self._busy_timeout_ms = busy_timeout_ms
+        self._checkout_timeout = checkout_timeout
+        self._idle: List[sqlite3.Connection] = []
+        self._open_count = 0
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {"checkouts": 0, "waits": 0, "timeouts": 0, "created": 0, "peak_in_use": 0}
+
+    def _open(self) -> sqlite3.Connection:
+        """Open a new connection with WAL mode and tuned pragmas."""
+        conn = sqlite3.connect(
+            self._db_path,
+            timeout=self._busy_timeout_ms / 1000,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout={int(self._busy_timeout_ms)}")
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    #Checkout methods
+    def acquire(self) -> sqlite3.Connection:
+        """Check out a connection, waiting if every connection is in use."""
+        deadline = time.monotonic() + self._checkout_timeout
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            self._stats["checkouts"] += 1
+            waited = False
+            while not self._idle and self._open_count >= self._size:
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(timeout=remaining):
+                    if not self._idle and self._open_count >= self._size:
+                        self._stats["timeouts"] += 1
+                        raise TimeoutError(
+                            f"No database connection available after {self._checkout_timeout}s"
+                        )
+            conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                self._open_count += 1
+            self._in_use += 1
+            self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._in_use)
+
+        if conn is None:
+            #Open outside the lock so slow opens don't block other checkouts
+            try:
+                conn = self._open()
+            except Exception:
+                with self._cond:
+                    self._open_count -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._stats["created"] += 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool, rolling back any open transaction."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            reusable = True
+        except sqlite3.Error:
+            reusable = False
+
+        with self._cond:
+            self._in_use -= 1
+            if reusable and not self._closed:
+                self._idle.append(conn)
+            else:
+                self._open_count -= 1
+                conn.close()
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Context manager that checks a connection out and back in."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    #Maintenance methods
+    def stats(self) -> Dict[str, int]:
+        """Return pool usage counters."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "size": self._size,
+                "open": self._open_count,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+            })
+        return stats
+
+    def close_all(self) -> None:
+        """Close idle connections; busy ones are closed when released."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._idle.pop().close()
+                self._open_count -= 1
+            self._cond.notify_all()
+
+
+#Process-wide registry so every DatabaseManager shares one pool per database file
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path, size: Optional[int] = None) -> ConnectionPool:
+    """Return the shared pool for a database file, creating it on first use."""
+    key = str(Path(db_path).resolve())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(key, size or DEFAULT_POOL_SIZE)
+            _pools[key] = pool
+        return pool
+
+
+def close_all_pools() -> None:
+    """Close and forget every registered pool."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
+        _pools.clear()
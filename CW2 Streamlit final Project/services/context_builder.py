@@ -0,0 +1,198 @@
+"""Token-budgeted prompt context builder"""
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+from models.security_incident import SEVERITY_LEVELS
+
+#Budgets (overridable with the AI_CONTEXT_TOKENS and AI_HISTORY_TOKENS environment variables)
+DEFAULT_CONTEXT_TOKENS = int(os.environ.get("AI_CONTEXT_TOKENS", "1500"))
+DEFAULT_HISTORY_TOKENS = int(os.environ.get("AI_HISTORY_TOKENS", "1500"))
+
+#Tokens kept back for the overflow summary line
+SUMMARY_RESERVE_TOKENS = 80
+
+#Statuses ranked ahead of finished work
+OPEN_STATUSES = {"open", "in progress"}
+
+#Row layouts: label and key for each field, the rank field, and the fields to aggregate on overflow
+ROW_KINDS = {
+    "incident": {
+        "noun": "incidents",
+        "fields": (("", "title"), ("Severity", "severity"), ("Status", "status"), ("Date", "date")),
+        "level": "severity",
+        "date": "date",
+        "aggregate": ("severity", "status"),
+    },
+    "ticket": {
+        "noun": "tickets",
+        "fields": (("", "title"), ("Priority", "priority"), ("Status", "status"), ("Created", "created_date")),
+        "level": "priority",
+        "date": "created_date",
+        "aggregate": ("priority", "status"),
+    },
+    "dataset": {
+        "noun": "datasets",
+        "fields": (("", "name"), ("Source", "source"), ("Category", "category"), ("Size", "size")),
+        "level": None,
+        "date": None,
+        "aggregate": ("category", "source"),
+    },
+    "user": {
+        "noun": "users",
+        "fields": (("", "username"), ("Role", "role"), ("Created", "created_at")),
+        "level": None,
+        "date": "created_at",
+        "aggregate": ("role",),
+    },
+}
+
+#Rank for user roles (privileged accounts matter most in access reviews)
+ROLE_LEVELS = {"admin": 3, "analyst": 2, "user": 1}
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_DIGITS = re.compile(r"\d+")
+_SPACES = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of text without a tokenizer.
+
+    Words count as one token plus one per extra six characters and punctuation counts
+    as one token each, which tracks GPT tokenizers closely enough for budgeting English.
+    """
+    if not text:
+        return 0
+    return sum(1 + (len(piece) - 1) // 6 for piece in _TOKEN_PATTERN.findall(text))
+
+
+def fit_history(history: Sequence[Dict[str, str]], budget_tokens: int = DEFAULT_HISTORY_TOKENS,
+                max_messages: int = 10) -> List[Dict[str, str]]:
+    """Keep the most recent messages that fit the token budget (oldest dropped first)."""
+    kept: List[Dict[str, str]] = []
+    used = 0
+    for message in reversed(history[-max_messages:] if max_messages else history):
+        cost = estimate_tokens(message["content"]) + 4
+        if used + cost > budget_tokens:
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+    return kept
+
+
+def rows_from_frame(frame, columns: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Turn DataFrame columns into row dicts keyed the way ROW_KINDS expects."""
+    return frame[list(columns)].rename(columns=columns).to_dict("records")
+
+
+class ContextBuilder:
+    """Packs table rows into prompt text that fits a token budget.
+
+    Rows are ranked (severity/priority, open status, recency), near-duplicates are merged
+    with a count, and rows that don't fit are summarized as aggregate counts.
+    """
+
+    def __init__(self, budget_tokens: int = DEFAULT_CONTEXT_TOKENS):
+        self.budget_tokens = max(SUMMARY_RESERVE_TOKENS * 2, int(budget_tokens))
+
+    #Ranking helpers
+    @staticmethod
+    def _text(value: Any) -> str:
+        """Render a field value (dates are trimmed to the day)."""
+        if value is None:
+            return "N/A"
+        if hasattr(value, "strftime"):
+            return "N/A" if value != value else value.strftime("%Y-%m-%d")
+        return str(value)
+
+    def _rank(self, spec: Dict[str, Any], row: Dict[str, Any]) -> Tuple:
+        """Sort key: higher level, then open status, then most recent first."""
+        level = 0
+        if spec["level"]:
+            level = SEVERITY_LEVELS.get(str(row.get(spec["level"]) or "").lower(), 0)
+        elif "role" in row:
+            level = ROLE_LEVELS.get(str(row.get("role") or "").lower(), 0)
+        elif "size" in row:
+            level = row.get("size") or 0
+        is_open = str(row.get("status") or "").lower() in OPEN_STATUSES
+        recency = self._text(row.get(spec["date"])) if spec["date"] else ""
+        return (level, is_open, recency)
+
+    def _dedupe_key(self, spec: Dict[str, Any], row: Dict[str, Any]) -> str:
+        """Rows that differ only by numbers, case or spacing count as duplicates."""
+        parts = [self._text(row.get(key)) for _, key in spec["fields"] if key != spec["date"]]
+        return _SPACES.sub(" ", _DIGITS.sub("#", " | ".join(parts).lower())).strip()
+
+    def format_row(self, kind: str, row: Dict[str, Any]) -> str:
+        """Format one row as a single line (Title | Severity: High | ...)."""
+        parts = []
+        for label, key in ROW_KINDS[kind]["fields"]:
+            value = self._text(row.get(key))
+            if key == "size" and row.get(key) is not None:
+                value = f"{value}MB"
+            parts.append(f"{label}: {value}" if label else value)
+        return " | ".join(parts)
+
+    def _summarize(self, kind: str, rows: List[Dict[str, Any]]) -> str:
+        """Aggregate counts for rows that did not fit."""
+        spec = ROW_KINDS[kind]
+        pieces = []
+        for key in spec["aggregate"]:
+            counts = Counter(self._text(row.get(key)) for row in rows)
+            pieces.append(f"{key} " + ", ".join(f"{label}: {n}" for label, n in counts.most_common(6)))
+        if spec["date"]:
+            dates = sorted(d for d in (self._text(row.get(spec["date"])) for row in rows) if d != "N/A")
+            if dates:
+                pieces.append(f"dates {dates[0]} to {dates[-1]}")
+        if kind == "dataset":
+            total = sum(row.get("size") or 0 for row in rows)
+            pieces.append(f"total size {total:,}MB")
+        return f"... plus {len(rows)} more {spec['noun']} not listed ({'; '.join(pieces)})"
+
+    #Packing
+    def pack(self, kind: str, rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Pack rows into numbered lines within the budget.
+
+        Returns a dict with text, tokens, included, duplicates merged and omitted counts.
+        """
+        if kind not in ROW_KINDS:
+            raise ValueError(f"Unknown row kind: {kind}")
+        spec = ROW_KINDS[kind]
+        rows = list(rows)
+        ranked = sorted(rows, key=lambda row: self._rank(spec, row), reverse=True)
+
+        #Merge duplicates, keeping the highest ranked row of each group
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for row in ranked:
+            groups.setdefault(self._dedupe_key(spec, row), []).append(row)
+
+        lines: List[str] = []
+        overflow: List[Dict[str, Any]] = []
+        used = 0
+        limit = self.budget_tokens - SUMMARY_RESERVE_TOKENS
+        for group in groups.values():
+            if overflow:
+                overflow.extend(group)
+                continue
+            line = f"{len(lines) + 1}. {self.format_row(kind, group[0])}"
+            if len(group) > 1:
+                line += f" (x{len(group)} similar)"
+            cost = estimate_tokens(line) + 1
+            if used + cost > limit:
+                overflow.extend(group)
+                continue
+            lines.append(line)
+            used += cost
+
+        if overflow:
+            lines.append(self._summarize(kind, overflow))
+        text = "\n".join(lines)
+        return {
+            "text": text,
+            "tokens": estimate_tokens(text),
+            "rows": len(rows),
+            "included": len(rows) - len(overflow),
+            "merged": len(rows) - len(overflow) - (len(lines) - (1 if overflow else 0)),
+            "omitted": len(overflow),
+        }
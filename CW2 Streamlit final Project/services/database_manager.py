@@ -1,12 +1,79 @@
 """Database manager service class"""
+import re
 import sqlite3
-from typing import Any, Iterable, List, Dict, Optional
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, List, Dict, Optional, Sequence, Set, Tuple
 from pathlib import Path
+import pandas as pd
+from models.security_incident import SEVERITY_LEVELS
+from services.connection_pool import get_pool
+from services.query_cache import ALL_TABLES, get_query_cache
+from services.statistics_engine import StatisticsEngine
+from services.rollup_engine import RollupEngine
+from services.snapshot_manager import SnapshotManager, change_log_head, changed_tables, get_snapshot_manager
+from services.migrations import ensure_migrated
+
+#Tables that support keyset pagination, with their selectable and filterable columns
+PAGE_TABLES = {
+    "cyber_incidents": {"columns": "*", "date_column": "occurred_on", "filters": ("severity", "status")},
+    "it_tickets": {"columns": "*", "date_column": "created_on", "filters": ("priority", "status")},
+    "datasets_metadata": {"columns": "*", "date_column": None, "filters": ("category", "source")},
+    "users": {"columns": "id, username, role, created_at", "date_column": "created_at", "filters": ("role",)},
+}
+
+#Column layouts for DataFrame loads (labels match the analytics pages)
+FRAME_PRESETS = {
+    "cyber_incidents": {
+        "sql": "SELECT id, title, severity, status, occurred_on FROM cyber_incidents",
+        "columns": ["ID", "Title", "Severity", "Status", "Date"],
+        "categorical": ["Severity", "Status"],
+        "dates": ["Date"],
+    },
+    "it_tickets": {
+        "sql": "SELECT id, title, priority, status, created_on FROM it_tickets",
+        "columns": ["ID", "Title", "Priority", "Status", "Created_Date"],
+        "categorical": ["Priority", "Status"],
+        "dates": ["Created_Date"],
+    },
+    "datasets_metadata": {
+        "sql": "SELECT id, name, source, category, size FROM datasets_metadata",
+        "columns": ["ID", "Name", "Source", "Category", "Size_MB"],
+        "categorical": ["Source", "Category"],
+        "dates": [],
+    },
+}
+
+#Columns a preview frame may be ordered by (descending)
+PREVIEW_ORDER = ("id", "size")
+
+#Tables whose rows feed the dashboard statistics
+STATISTICS_TABLES = ("cyber_incidents", "datasets_metadata", "it_tickets", "users")
+
+#Target table of a write statement, used for cache invalidation
+WRITE_TARGET = re.compile(
+    r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)"
+    r"\s+[\"`\[]?(\w+)",
+    re.IGNORECASE
+)
+#Statements that change the schema (or run arbitrary SQL) invalidate everything
+SCHEMA_CHANGE = re.compile(r"^\s*(?:CREATE|ALTER|DROP|ANALYZE|VACUUM|PRAGMA|WITH)\b", re.IGNORECASE)
+
+#Domain codes of the search_index FTS5 mirror (rowid = id * 4 + code, see migration 5)
+SEARCH_DOMAINS = {"incident": 0, "ticket": 1, "dataset": 2, "user": 3}
+SEARCH_TERM = re.compile(r"\w+")
+
+#Row change listeners, shared process-wide per database like the pool and the query cache
+ChangeListener = Callable[[str, str, Optional[int]], None]
+_listeners: Dict[str, List[ChangeListener]] = {}
+_listeners_lock = threading.Lock()
 
 class DatabaseManager:
     """Handles SQLite database connections and queries."""
     
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, pool_size: Optional[int] = None):
         if db_path is None:
             BASE_DIR = Path(__file__).resolve().parent.parent
             #Directs to my exisitng database folder
@@ -15,50 +82,432 @@ class DatabaseManager:
             self._db_path = Path(db_path)
         
         self._connection: Optional[sqlite3.Connection] = None
+        self._tx_depth = 0
+        self._tx_report: Optional[Dict[str, Any]] = None
+        self._tx_dirty: Set[str] = set()
+        self._tx_changes: List[Tuple[str, str, Optional[int]]] = []
         self._ensure_database_directory()
+        #Connections are shared process-wide, so reruns and sessions reuse them
+        self._pool = get_pool(self._db_path, pool_size)
+        #Query results are shared the same way and dropped when their tables are written
+        self._cache = get_query_cache(self._db_path)
+        self._listener_key = str(self._db_path.resolve())
+        #Bring the schema up to date (runs once per process per database); the versions
+        #applied are kept so scripts such as setup_db.py can report them
+        self.applied_migrations: List[int] = ensure_migrated(self, self._listener_key)
+        #Whole-table frames are shared too (looked up on first use, see _snapshots)
+        self._snapshot_manager: Optional[SnapshotManager] = None
     
     def _ensure_database_directory(self):
         """Ensure database directory exists."""
         self._db_path.parent.mkdir(parents=True, exist_ok=True)
     
+    @property
+    def _snapshots(self) -> SnapshotManager:
+        """The shared snapshot manager, kept current from the change log.
+        
+        Looked up lazily because the registry builds its own DatabaseManager on this file.
+        """
+        if self._snapshot_manager is None:
+            self._snapshot_manager = get_snapshot_manager(self, FRAME_PRESETS)
+        return self._snapshot_manager
+    
     def connect(self) -> None:
-        """Establish database connection."""
+        """Check out a pooled connection and pin it to this manager."""
         if self._connection is None:
-            self._connection = sqlite3.connect(self._db_path)
-            self._connection.row_factory = sqlite3.Row
+            self._connection = self._pool.acquire()
     
     def close(self) -> None:
-        """Close database connection."""
+        """Return the pinned connection to the pool."""
         if self._connection is not None:
-            self._connection.close()
+            self._pool.release(self._connection)
             self._connection = None
     
+    @contextmanager
+    def _use_connection(self) -> Iterator[sqlite3.Connection]:
+        """Yield the pinned connection, or borrow one from the pool for a single call."""
+        if self._connection is not None:
+            yield self._connection
+        else:
+            with self._pool.connection() as conn:
+                yield conn
+    
+    def pool_stats(self) -> Dict[str, int]:
+        """Get connection pool statistics (checkouts, waits, peak in-use)."""
+        return self._pool.stats()
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Get query cache statistics (hits, misses, evictions, invalidations)."""
+        return self._cache.stats()
+    
+    def clear_cache(self) -> None:
+        """Drop every cached query result and table snapshot for this database."""
+        self._cache.clear()
+        self._snapshots.clear()
+    
+    def snapshot_stats(self) -> Dict[str, Any]:
+        """Get table snapshot statistics (rows, change log version, last sync)."""
+        return self._snapshots.stats()
+    
+    # Change listeners
+    def add_change_listener(self, listener: ChangeListener) -> None:
+        """Call listener(table, op, row_id) after each committed entity write to this database.
+        
+        op is "insert", "update" or "delete"; bulk inserts report op "bulk" with row_id None.
+        """
+        with _listeners_lock:
+            _listeners.setdefault(self._listener_key, []).append(listener)
+    
+    def remove_change_listener(self, listener: ChangeListener) -> None:
+        """Stop calling a listener registered with add_change_listener."""
+        with _listeners_lock:
+            registered = _listeners.get(self._listener_key, [])
+            if listener in registered:
+                registered.remove(listener)
+    
+    def _notify(self, table: str, op: str, row_id: Optional[int] = None) -> None:
+        """Report a row change to the listeners (held back until commit inside a transaction)."""
+        if self._tx_depth:
+            self._tx_changes.append((table, op, row_id))
+            return
+        with _listeners_lock:
+            listeners = list(_listeners.get(self._listener_key, ()))
+        for listener in listeners:
+            try:
+                listener(table, op, row_id)
+            except Exception:
+                #A broken listener must not fail the write that already committed
+                pass
+    
+    # Query cache
+    def _cached(self, key: Tuple, tables: Iterable[str], loader: Callable[[], Any]) -> Any:
+        """Return a cached result for key, or load it and cache it against tables.
+        
+        Cached results are shared between sessions, so callers must treat them as read-only.
+        Reads inside a transaction bypass the cache because they may see uncommitted rows.
+        """
+        if self._tx_depth:
+            return loader()
+        self._sync_cache()
+        found, value = self._cache.get(key)
+        if found:
+            return value
+        generation = self._cache.generation(tables)
+        value = loader()
+        self._cache.put(key, value, tables, generation)
+        return value
+    
+    def _sync_cache(self) -> None:
+        """Invalidate cached results for tables written through any other connection.
+        
+        One indexed lookup of the change log head; only when it moved are the changed tables read.
+        """
+        head = change_log_head(self)
+        seen = self._cache.log_head
+        if seen is None:
+            #First check in this process: nothing was cached before it
+            self._cache.advance(head, ())
+        elif head != seen:
+            #A head that went backwards means the database file was replaced
+            self._cache.advance(head, changed_tables(self, seen, head) if head > seen else None)
+    
+    def cached_fetch_all(self, sql: str, params: Iterable[Any] = (),
+                         tables: Iterable[str] = ()) -> List[Dict]:
+        """fetch_all through the shared cache; tables lists every table the query reads."""
+        params = tuple(params)
+        rows = self._cached(("all", sql, params), tables, lambda: self.fetch_all(sql, params))
+        return list(rows)
+    
+    def _mark_written(self, sql: str) -> None:
+        """Invalidate cached results for the table a write touched (at commit if deferred)."""
+        match = WRITE_TARGET.match(sql)
+        if match:
+            table = match.group(1).lower()
+        elif SCHEMA_CHANGE.match(sql):
+            table = ALL_TABLES
+        else:
+            return
+        if self._tx_depth:
+            self._tx_dirty.add(table)
+        else:
+            self._cache.invalidate([table])
+    
     def execute_query(self, sql: str, params: Iterable[Any] = ()) -> sqlite3.Cursor:
         """Execute a write query (INSERT, UPDATE, DELETE)."""
-        if self._connection is None:
-            self.connect()
-        cur = self._connection.cursor()
-        cur.execute(sql, tuple(params))
-        self._connection.commit()
+        with self._use_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(sql, tuple(params))
+            self._finish_write(conn, cur)
+        self._mark_written(sql)
         return cur
     
+    def execute_many(self, sql: str, seq_of_params: Iterable[Sequence[Any]]) -> Dict[str, Any]:
+        """Execute one write statement for many parameter rows in a single transaction."""
+        with self.transaction() as report:
+            rows_before = report["rows"]
+            start = time.perf_counter()
+            cur = self._connection.cursor()
+            cur.executemany(sql, seq_of_params)
+            report["rows"] += max(cur.rowcount, 0)
+            rows = report["rows"] - rows_before
+            self._mark_written(sql)
+        seconds = time.perf_counter() - start
+        return {
+            "rows": rows,
+            "seconds": seconds,
+            "rows_per_sec": rows / seconds if seconds > 0 else float(rows)
+        }
+    
+    def _finish_write(self, conn: sqlite3.Connection, cur: sqlite3.Cursor) -> None:
+        """Commit a single write, or defer it when a transaction is open."""
+        if self._tx_depth:
+            self._tx_report["rows"] += max(cur.rowcount, 0)
+        else:
+            conn.commit()
+    
+    @contextmanager
+    def transaction(self) -> Iterator[Dict[str, Any]]:
+        """Group many writes into one commit; yields a report with rows and elapsed time."""
+        if self._tx_depth:
+            #Nested blocks join the outer transaction
+            self._tx_depth += 1
+            try:
+                yield self._tx_report
+            finally:
+                self._tx_depth -= 1
+            return
+        
+        pinned_here = self._connection is None
+        self.connect()
+        report = {"rows": 0, "seconds": 0.0, "rows_per_sec": 0.0}
+        committed = False
+        start = time.perf_counter()
+        self._tx_depth = 1
+        self._tx_report = report
+        try:
+            #Take the write lock up front so concurrent writers wait on busy_timeout
+            self._connection.execute("BEGIN IMMEDIATE")
+            yield report
+            self._connection.commit()
+            committed = True
+        except BaseException:
+            self._connection.rollback()
+            raise
+        finally:
+            self._tx_depth = 0
+            self._tx_report = None
+            #Committed (or rolled back) writes are now visible to other readers
+            if self._tx_dirty:
+                self._cache.invalidate(self._tx_dirty)
+                self._tx_dirty = set()
+            changes, self._tx_changes = self._tx_changes, []
+            if committed:
+                for change in changes:
+                    self._notify(*change)
+            report["seconds"] = time.perf_counter() - start
+            if report["seconds"] > 0:
+                report["rows_per_sec"] = report["rows"] / report["seconds"]
+            if pinned_here:
+                self.close()
+    
     def fetch_one(self, sql: str, params: Iterable[Any] = ()) -> Optional[Dict]:
         """Fetch a single row from the database."""
-        if self._connection is None:
-            self.connect()
-        cur = self._connection.cursor()
-        cur.execute(sql, tuple(params))
-        row = cur.fetchone()
+        with self._use_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(sql, tuple(params))
+            row = cur.fetchone()
         return dict(row) if row else None
     
     def fetch_all(self, sql: str, params: Iterable[Any] = ()) -> List[Dict]:
         """Fetch all rows from the database."""
-        if self._connection is None:
-            self.connect()
-        cur = self._connection.cursor()
-        cur.execute(sql, tuple(params))
-        rows = cur.fetchall()
-        return [dict(row) for row in rows]
+        with self._use_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(sql, tuple(params))
+            #Build dicts straight from the cursor instead of materializing fetchall() first
+            return [dict(row) for row in cur]
+    
+    def iter_rows(self, sql: str, params: Iterable[Any] = (), batch_size: int = 500,
+                  row_type: str = "dict") -> Iterator[Any]:
+        """Stream rows in fetchmany batches as dicts, plain tuples or lightweight records.
+        
+        The pooled connection is held until the generator is exhausted or closed.
+        """
+        if row_type not in ("dict", "tuple", "record"):
+            raise ValueError("row_type must be 'dict', 'tuple' or 'record'")
+        
+        with self._use_connection() as conn:
+            cur = conn.cursor()
+            if row_type != "dict":
+                #Skip sqlite3.Row wrapping when the caller wants tuples
+                cur.row_factory = None
+            cur.execute(sql, tuple(params))
+            if cur.description is None:
+                return
+            columns = [col[0] for col in cur.description]
+            record = namedtuple("Record", columns, rename=True) if row_type == "record" else None
+            
+            while True:
+                batch = cur.fetchmany(batch_size)
+                if not batch:
+                    break
+                if row_type == "dict":
+                    for row in batch:
+                        yield dict(row)
+                elif row_type == "record":
+                    for row in batch:
+                        yield record._make(row)
+                else:
+                    yield from batch
+    
+    # DataFrame loads
+    def fetch_frame(self, sql: str, params: Iterable[Any] = (), columns: Optional[List[str]] = None,
+                    categorical: Iterable[str] = (), dates: Iterable[str] = ()) -> pd.DataFrame:
+        """Build a typed DataFrame straight from the cursor (no dicts or entity objects)."""
+        with self._use_connection() as conn:
+            cur = conn.cursor()
+            cur.row_factory = None
+            cur.execute(sql, tuple(params))
+            names = columns or [col[0] for col in cur.description]
+            frame = pd.DataFrame.from_records(cur.fetchall(), columns=names)
+        
+        for column in categorical:
+            frame[column] = frame[column].astype("category")
+        for column in dates:
+            #Typed date columns are ISO formatted, so parsing can skip format inference
+            frame[column] = pd.to_datetime(frame[column], format="%Y-%m-%d", errors="coerce")
+        return frame
+    
+    def _preset_frame(self, table: str) -> pd.DataFrame:
+        """Load a whole table as a DataFrame using its FRAME_PRESETS layout.
+        
+        Outside a transaction this is the shared snapshot, refreshed with only the rows
+        changed since the last call; inside one the table is read directly.
+        """
+        if self._tx_depth:
+            preset = FRAME_PRESETS[table]
+            return self.fetch_frame(
+                preset["sql"] + " ORDER BY id DESC",
+                columns=preset["columns"],
+                categorical=preset["categorical"],
+                dates=preset["dates"]
+            )
+        #Pages add columns to their frames, so this is a copy of the shared one
+        return self._snapshots.frame(table)
+    
+    def get_incidents_frame(self) -> pd.DataFrame:
+        """Get all incidents as a DataFrame with categorical severity/status and datetime dates."""
+        frame = self._preset_frame("cyber_incidents")
+        #Mapping the categories (not every row) keeps this cheap on large tables
+        levels = frame["Severity"].map(lambda s: SEVERITY_LEVELS.get(str(s).lower(), 0))
+        frame["Severity_Level"] = levels.astype("int64") if len(frame) else pd.Series(dtype="int64")
+        return frame
+    
+    def get_tickets_frame(self) -> pd.DataFrame:
+        """Get all tickets as a DataFrame with categorical priority/status and datetime dates."""
+        return self._preset_frame("it_tickets")
+    
+    def get_datasets_frame(self) -> pd.DataFrame:
+        """Get all datasets as a DataFrame with categorical source/category."""
+        return self._preset_frame("datasets_metadata")
+    
+    def get_preview_frame(self, table: str, limit: int = 1000, order_by: str = "id") -> pd.DataFrame:
+        """The first `limit` rows by order_by (descending) in the table's FRAME_PRESETS layout.
+        
+        For raw-data previews and top-N charts that should not load the whole table.
+        """
+        if table not in FRAME_PRESETS:
+            raise ValueError(f"Unknown table: {table}")
+        if order_by not in PREVIEW_ORDER:
+            raise ValueError(f"Cannot order a preview by '{order_by}'")
+        preset = FRAME_PRESETS[table]
+        limit = max(1, int(limit))
+        frame = self._cached(("preview", table, limit, order_by), (table,), lambda: self.fetch_frame(
+            f"{preset['sql']} ORDER BY {order_by} DESC LIMIT ?", (limit,),
+            columns=preset["columns"],
+            categorical=preset["categorical"],
+            dates=preset["dates"]
+        ))
+        #The cached frame is shared, so callers get their own copy
+        return frame.copy()
+    
+    # Paginated fetches
+    def _page_where(self, table: str, filters: Optional[Dict[str, Any]]) -> Tuple[List[str], List[Any]]:
+        """Build the WHERE clauses and parameters for fetch_page filters."""
+        spec = PAGE_TABLES[table]
+        clauses, params = [], []
+        for column, value in (filters or {}).items():
+            if value is None or (isinstance(value, (list, tuple, set)) and not value):
+                continue
+            if column in ("date_from", "date_to"):
+                if spec["date_column"] is None:
+                    raise ValueError(f"{table} has no date column to filter on")
+                operator = ">=" if column == "date_from" else "<="
+                clauses.append(f"{spec['date_column']} {operator} ?")
+                params.append(str(value))
+            elif column in spec["filters"]:
+                if isinstance(value, (list, tuple, set)):
+                    values = list(value)
+                    clauses.append(f"{column} IN ({', '.join('?' for _ in values)})")
+                    params.extend(values)
+                else:
+                    clauses.append(f"{column} = ?")
+                    params.append(value)
+            else:
+                raise ValueError(f"Cannot filter {table} on '{column}'")
+        return clauses, params
+    
+    def fetch_page(self, table: str, after_id: Optional[int] = None, limit: int = 50,
+                   filters: Optional[Dict[str, Any]] = None, order: str = "desc",
+                   include_total: bool = True) -> Dict[str, Any]:
+        """Fetch one keyset-paginated page of rows with server-side filters."""
+        filter_key = tuple(sorted(
+            (column, tuple(value) if isinstance(value, (list, tuple, set)) else value)
+            for column, value in (filters or {}).items()
+        ))
+        key = ("page", table, after_id, limit, filter_key, order, include_total)
+        page = self._cached(key, (table,), lambda: self._load_page(
+            table, after_id, limit, filters, order, include_total
+        ))
+        #Callers annotate the page dict (page numbers, totals), so return a fresh one
+        return dict(page)
+    
+    def _load_page(self, table: str, after_id: Optional[int], limit: int,
+                   filters: Optional[Dict[str, Any]], order: str, include_total: bool) -> Dict[str, Any]:
+        """Run the page and count queries behind fetch_page."""
+        if table not in PAGE_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        order = order.lower()
+        if order not in ("asc", "desc"):
+            raise ValueError("order must be 'asc' or 'desc'")
+        limit = max(1, int(limit))
+        
+        clauses, params = self._page_where(table, filters)
+        page_clauses, page_params = list(clauses), list(params)
+        if after_id is not None:
+            page_clauses.append("id < ?" if order == "desc" else "id > ?")
+            page_params.append(after_id)
+        
+        where = f" WHERE {' AND '.join(page_clauses)}" if page_clauses else ""
+        #One extra row tells us whether another page exists without a COUNT
+        rows = self.fetch_all(
+            f"SELECT {PAGE_TABLES[table]['columns']} FROM {table}{where} "
+            f"ORDER BY id {order.upper()} LIMIT ?",
+            page_params + [limit + 1]
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        total = None
+        if include_total:
+            count_where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+            total = self.fetch_one(f"SELECT COUNT(*) AS total FROM {table}{count_where}", params)["total"]
+        
+        return {
+            "rows": rows,
+            "has_more": has_more,
+            "next_after_id": rows[-1]["id"] if has_more else None,
+            "total": total
+        }
     
     # User operations
     def add_user(self, username: str, password_hash: str, role: str = "user") -> int:
@@ -75,12 +524,25 @@ class DatabaseManager:
     
     def get_all_users(self) -> List[Dict]:
         """Get all users."""
-        return self.fetch_all("SELECT id, username, role, created_at FROM users ORDER BY id DESC")
+        return self.cached_fetch_all(
+            "SELECT id, username, role, created_at FROM users ORDER BY id DESC", tables=("users",)
+        )
     
     def update_user_role(self, user_id: int, role: str):
         """Update user role."""
         self.execute_query("UPDATE users SET role = ? WHERE id = ?", (role, user_id))
     
+    def update_user_password(self, user_id: int, password_hash: str, expected_hash: Optional[str] = None) -> bool:
+        """Replace a user's password hash; with expected_hash, only if it is still the stored one."""
+        if expected_hash is None:
+            cursor = self.execute_query("UPDATE users SET password_hash = ? WHERE id = ?", (password_hash, user_id))
+        else:
+            cursor = self.execute_query(
+                "UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+                (password_hash, user_id, expected_hash)
+            )
+        return cursor.rowcount > 0
+    
     def delete_user(self, user_id: int):
         """Delete user."""
         self.execute_query("DELETE FROM users WHERE id = ?", (user_id,))
@@ -88,7 +550,17 @@ class DatabaseManager:
     # Incident operations
     def get_all_incidents(self) -> List[Dict]:
         """Get all cyber incidents."""
-        return self.fetch_all("SELECT * FROM cyber_incidents ORDER BY id DESC")
+        return self.cached_fetch_all("SELECT * FROM cyber_incidents ORDER BY id DESC", tables=("cyber_incidents",))
+    
+    def fetch_incidents_page(self, after_id: Optional[int] = None, limit: int = 50,
+                             severity=None, status=None, date_from: str = None, date_to: str = None,
+                             include_total: bool = True) -> Dict[str, Any]:
+        """Fetch one page of incidents filtered by severity, status and date range."""
+        return self.fetch_page(
+            "cyber_incidents", after_id, limit,
+            {"severity": severity, "status": status, "date_from": date_from, "date_to": date_to},
+            include_total=include_total
+        )
     
     def get_incident(self, incident_id: int) -> Optional[Dict]:
         """Get incident by ID."""
@@ -100,23 +572,44 @@ class DatabaseManager:
             "INSERT INTO cyber_incidents (title, severity, status, date) VALUES (?, ?, ?, ?)",
             (title, severity, status, date)
         )
+        self._notify("cyber_incidents", "insert", cursor.lastrowid)
         return cursor.lastrowid
     
+    def bulk_insert_incidents(self, incidents: Iterable[Sequence[Any]]) -> Dict[str, Any]:
+        """Insert many (title, severity, status, date) rows in one transaction."""
+        report = self.execute_many(
+            "INSERT INTO cyber_incidents (title, severity, status, date) VALUES (?, ?, ?, ?)",
+            incidents
+        )
+        self._notify("cyber_incidents", "bulk")
+        return report
+    
     def update_incident(self, incident_id: int, title: str, severity: str, status: str, date: str):
         """Update existing incident."""
         self.execute_query(
             "UPDATE cyber_incidents SET title=?, severity=?, status=?, date=? WHERE id=?",
             (title, severity, status, date, incident_id)
         )
+        self._notify("cyber_incidents", "update", incident_id)
     
     def delete_incident(self, incident_id: int):
         """Delete incident."""
         self.execute_query("DELETE FROM cyber_incidents WHERE id=?", (incident_id,))
+        self._notify("cyber_incidents", "delete", incident_id)
     
     # Dataset operations
     def get_all_datasets(self) -> List[Dict]:
         """Get all datasets."""
-        return self.fetch_all("SELECT * FROM datasets_metadata ORDER BY id DESC")
+        return self.cached_fetch_all("SELECT * FROM datasets_metadata ORDER BY id DESC", tables=("datasets_metadata",))
+    
+    def fetch_datasets_page(self, after_id: Optional[int] = None, limit: int = 50,
+                            category=None, source=None, include_total: bool = True) -> Dict[str, Any]:
+        """Fetch one page of datasets filtered by category and source."""
+        return self.fetch_page(
+            "datasets_metadata", after_id, limit,
+            {"category": category, "source": source},
+            include_total=include_total
+        )
     
     def get_dataset(self, dataset_id: int) -> Optional[Dict]:
         """Get dataset by ID."""
@@ -128,23 +621,45 @@ class DatabaseManager:
             "INSERT INTO datasets_metadata (name, source, category, size) VALUES (?, ?, ?, ?)",
             (name, source, category, size)
         )
+        self._notify("datasets_metadata", "insert", cursor.lastrowid)
         return cursor.lastrowid
     
+    def bulk_insert_datasets(self, datasets: Iterable[Sequence[Any]]) -> Dict[str, Any]:
+        """Insert many (name, source, category, size) rows in one transaction."""
+        report = self.execute_many(
+            "INSERT INTO datasets_metadata (name, source, category, size) VALUES (?, ?, ?, ?)",
+            datasets
+        )
+        self._notify("datasets_metadata", "bulk")
+        return report
+    
     def update_dataset(self, dataset_id: int, name: str, source: str, category: str, size: int):
         """Update existing dataset."""
         self.execute_query(
             "UPDATE datasets_metadata SET name=?, source=?, category=?, size=? WHERE id=?",
             (name, source, category, size, dataset_id)
         )
+        self._notify("datasets_metadata", "update", dataset_id)
     
     def delete_dataset(self, dataset_id: int):
         """Delete dataset."""
         self.execute_query("DELETE FROM datasets_metadata WHERE id=?", (dataset_id,))
+        self._notify("datasets_metadata", "delete", dataset_id)
     
     # Ticket operations
     def get_all_tickets(self) -> List[Dict]:
         """Get all IT tickets."""
-        return self.fetch_all("SELECT * FROM it_tickets ORDER BY id DESC")
+        return self.cached_fetch_all("SELECT * FROM it_tickets ORDER BY id DESC", tables=("it_tickets",))
+    
+    def fetch_tickets_page(self, after_id: Optional[int] = None, limit: int = 50,
+                           priority=None, status=None, date_from: str = None, date_to: str = None,
+                           include_total: bool = True) -> Dict[str, Any]:
+        """Fetch one page of tickets filtered by priority, status and creation date range."""
+        return self.fetch_page(
+            "it_tickets", after_id, limit,
+            {"priority": priority, "status": status, "date_from": date_from, "date_to": date_to},
+            include_total=include_total
+        )
     
     def get_ticket(self, ticket_id: int) -> Optional[Dict]:
         """Get ticket by ID."""
@@ -156,54 +671,102 @@ class DatabaseManager:
             "INSERT INTO it_tickets (title, priority, status, created_date) VALUES (?, ?, ?, ?)",
             (title, priority, status, created_date)
         )
+        self._notify("it_tickets", "insert", cursor.lastrowid)
         return cursor.lastrowid
     
+    def bulk_insert_tickets(self, tickets: Iterable[Sequence[Any]]) -> Dict[str, Any]:
+        """Insert many (title, priority, status, created_date) rows in one transaction."""
+        report = self.execute_many(
+            "INSERT INTO it_tickets (title, priority, status, created_date) VALUES (?, ?, ?, ?)",
+            tickets
+        )
+        self._notify("it_tickets", "bulk")
+        return report
+    
     def update_ticket(self, ticket_id: int, title: str, priority: str, status: str, created_date: str):
         """Update existing ticket."""
         self.execute_query(
             "UPDATE it_tickets SET title=?, priority=?, status=?, created_date=? WHERE id=?",
             (title, priority, status, created_date, ticket_id)
         )
+        self._notify("it_tickets", "update", ticket_id)
     
     def delete_ticket(self, ticket_id: int):
         """Delete ticket."""
         self.execute_query("DELETE FROM it_tickets WHERE id=?", (ticket_id,))
+        self._notify("it_tickets", "delete", ticket_id)
     
-    # Statistics function
-    def get_statistics(self) -> Dict[str, Any]:
-        """Get statistics for dashboard - returns nested structure."""
-        stats = {}
-        
-        # Incident statistics
-        incidents_data = self.fetch_one("SELECT COUNT(*) as total FROM cyber_incidents")
-        incidents_open = self.fetch_one(
-            "SELECT COUNT(*) as open FROM cyber_incidents WHERE status IN ('open', 'in progress')"
-        )
-        stats["incidents"] = {
-            "total": incidents_data["total"] if incidents_data else 0,
-            "open": incidents_open["open"] if incidents_open else 0
-        }
+    # Full-text search
+    def search(self, query: str, domains: Optional[Iterable[str]] = None, limit: int = 20) -> List[Dict]:
+        """Keyword search across incidents, tickets, datasets and users, best match first.
         
-        # Dataset statistics
-        datasets_data = self.fetch_one("SELECT COUNT(*) as total FROM datasets_metadata")
-        datasets_size = self.fetch_one("SELECT SUM(size) as total_size FROM datasets_metadata")
-        stats["datasets"] = {
-            "total": datasets_data["total"] if datasets_data else 0,
-            "total_size": datasets_size["total_size"] if datasets_size and datasets_size["total_size"] else 0
-        }
+        Every word must match, as a prefix ("phish" finds "phishing"). Each result has domain,
+        id, title, highlight (title with **matched** terms), snippet (matched detail) and score.
+        """
+        terms = SEARCH_TERM.findall(query or "")
+        if not terms or limit <= 0:
+            return []
+        domains = list(domains) if domains is not None else list(SEARCH_DOMAINS)
+        unknown = [domain for domain in domains if domain not in SEARCH_DOMAINS]
+        if unknown:
+            raise ValueError(f"Unknown search domain: {unknown[0]}")
+        if not domains:
+            return []
         
-        # Ticket statistics
-        tickets_data = self.fetch_one("SELECT COUNT(*) as total FROM it_tickets")
-        tickets_open = self.fetch_one(
-            "SELECT COUNT(*) as open FROM it_tickets WHERE status IN ('open', 'in progress')"
+        #Quote each word so FTS5 operators typed by the user are matched as plain text
+        match = " ".join(f'"{term}"*' for term in terms)
+        codes = [SEARCH_DOMAINS[domain] for domain in domains]
+        rows = self.fetch_all(
+            f"""SELECT rowid, title, rank,
+                       highlight(search_index, 0, '**', '**') AS highlight,
+                       snippet(search_index, 1, '**', '**', '…', 8) AS snippet
+                FROM search_index
+                WHERE search_index MATCH ? AND rowid % 4 IN ({", ".join("?" * len(codes))})
+                ORDER BY rank LIMIT ?""",
+            (match, *codes, limit)
         )
-        stats["tickets"] = {
-            "total": tickets_data["total"] if tickets_data else 0,
-            "open": tickets_open["open"] if tickets_open else 0
-        }
-        
-        # User statistics
-        users_data = self.fetch_one("SELECT COUNT(*) as total FROM users")
-        stats["users"] = {"total": users_data["total"] if users_data else 0}
-        
-        return stats
\ No newline at end of file
+        names = {code: domain for domain, code in SEARCH_DOMAINS.items()}
+        return [{
+            "domain": names[row["rowid"] % 4],
+            "id": row["rowid"] // 4,
+            "title": row["title"],
+            "highlight": row["highlight"],
+            "snippet": row["snippet"],
+            #bm25 is lower-is-better; flip it so higher scores mean better matches
+            "score": -row["rank"]
+        } for row in rows]
+    
+    # Trend series (rollup tables)
+    def _trend(self, table: str, source: str, grain: str, by: Optional[str], start: Optional[str],
+               end: Optional[str], filters: Dict[str, Any]) -> List[Dict]:
+        """Read a rollup through the shared cache (invalidated by writes to the source table)."""
+        filters = {column: tuple(values) for column, values in filters.items() if values}
+        key = ("trend", table, grain, by, start, end, tuple(sorted(filters.items())))
+        rows = self._cached(key, (source,), lambda: RollupEngine(self).trend(
+            table, grain, by, start, end, filters
+        ))
+        return list(rows)
+    
+    def get_incident_trend(self, grain: str = "month", by: Optional[str] = None,
+                           start: Optional[str] = None, end: Optional[str] = None,
+                           severity=None, status=None) -> List[Dict]:
+        """Incident counts per day, week or month (optionally per severity or status)."""
+        return self._trend("incident_rollups", "cyber_incidents", grain, by, start, end,
+                           {"severity": severity, "status": status})
+    
+    def get_ticket_trend(self, grain: str = "month", by: Optional[str] = None,
+                         start: Optional[str] = None, end: Optional[str] = None,
+                         priority=None, status=None) -> List[Dict]:
+        """Ticket counts per day, week or month (optionally per priority or status)."""
+        return self._trend("ticket_rollups", "it_tickets", grain, by, start, end,
+                           {"priority": priority, "status": status})
+    
+    def rebuild_rollups(self) -> None:
+        """Recount the trend rollup tables from the incident and ticket tables."""
+        RollupEngine(self).rebuild()
+        self._cache.invalidate(["cyber_incidents", "it_tickets"])
+    
+    # Statistics function
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get statistics for dashboard - returns nested structure."""
+        return self._cached(("statistics",), STATISTICS_TABLES, StatisticsEngine(self).get_statistics)
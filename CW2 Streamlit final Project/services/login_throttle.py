@@ -0,0 +1,323 @@
+"""Login throttling and lockout service class"""
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+#Failed logins allowed per username and per source within the window (AUTH_LOCKOUT_LIMIT,
+#AUTH_SOURCE_LIMIT); a key over its limit is locked until its oldest counted failure leaves
+#the window (AUTH_LOCKOUT_SECONDS, 5 minutes like the Week 7 prototype)
+DEFAULT_USER_LIMIT = int(os.environ.get("AUTH_LOCKOUT_LIMIT", "5"))
+DEFAULT_SOURCE_LIMIT = int(os.environ.get("AUTH_SOURCE_LIMIT", "20"))
+DEFAULT_WINDOW_SECONDS = float(os.environ.get("AUTH_LOCKOUT_SECONDS", str(5 * 60)))
+#Most keys tracked in memory (least recently failed are forgotten first)
+DEFAULT_MAX_KEYS = 100000
+
+#Addresses of reverse proxies whose X-Forwarded-For/X-Real-Ip headers are believed
+#(TRUSTED_PROXY, comma separated); without one the socket's remote address is the source
+TRUSTED_PROXIES = frozenset(
+    address.strip() for address in os.environ.get("TRUSTED_PROXY", "").split(",") if address.strip()
+)
+
+#Failures are written in batches: when this many are pending or this long after the last flush
+#(a timer flushes a lone failure once the interval has passed), and at once when a key locks
+FLUSH_BATCH = 256
+FLUSH_INTERVAL_SECONDS = 5.0
+#Rows per multi-row INSERT/DELETE statement (keeps under SQLite's bound parameter limit)
+STATEMENT_ROWS = 400
+
+#Statements for the schema migration
+LOGIN_THROTTLE_MIGRATION = (
+    """
+    CREATE TABLE IF NOT EXISTS login_failures (
+        key TEXT NOT NULL,
+        failed_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_login_failures_key ON login_failures (key)",
+    "CREATE INDEX IF NOT EXISTS idx_login_failures_failed_at ON login_failures (failed_at)",
+)
+
+
+def _keys(username: str, source: Optional[str]) -> List[str]:
+    """Counter keys for an attempt: always the username, plus the source when known."""
+    keys = [f"user:{username}"]
+    if source:
+        keys.append(f"source:{source}")
+    return keys
+
+
+def resolve_source(remote_ip: Optional[str], headers: Dict[str, str],
+                   trusted_proxies: Iterable[str] = TRUSTED_PROXIES) -> Optional[str]:
+    """Client address for the per-source limit.
+
+    Forwarded headers are client-controlled, so they only count when the connection comes
+    from a trusted proxy; then the rightmost X-Forwarded-For hop that is not itself a
+    trusted proxy is the address that proxy saw. Otherwise the socket address is used.
+    """
+    trusted = set(trusted_proxies)
+    if not remote_ip or remote_ip not in trusted:
+        return remote_ip or None
+    hops = [hop.strip() for hop in (headers.get("X-Forwarded-For") or "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if hop not in trusted:
+            return hop
+    return (headers.get("X-Real-Ip") or "").strip() or remote_ip
+
+
+def _chunks(items: List[Any], size: int = STATEMENT_ROWS) -> Iterable[List[Any]]:
+    """Split a list into statement-sized slices."""
+    return (items[i:i + size] for i in range(0, len(items), size))
+
+
+class LoginAttempt:
+    """A login attempt that holds a reserved failure slot until it is settled."""
+
+    def __init__(self, username: str, keys: List[str], at: float):
+        self.username = username
+        self.keys = keys
+        self.at = at
+        self.settled = False
+
+
+class LoginThrottle:
+    """Sliding-window failed-login counters per username and per source.
+
+    Each key keeps a ring buffer of its last `limit` failure times, so a check is one
+    dictionary lookup and one comparison: the key is locked while the oldest buffered
+    failure is still inside the window. begin() checks and reserves a failure slot in
+    one locked step, so concurrent attempts can't all pass the check before any of them
+    fails; the slot is kept on failure and given back on success. Rejected attempts are
+    not recorded, so a burst against a locked key costs no bcrypt work and no writes.
+    Failures and resets are queued and written to login_failures in batches, or straight
+    away when they lock a key, and a timer writes whatever is still queued after
+    flush_interval; startup reloads the live window.
+    """
+
+    def __init__(self, db_manager, user_limit: int = DEFAULT_USER_LIMIT,
+                 source_limit: int = DEFAULT_SOURCE_LIMIT,
+                 window_seconds: float = DEFAULT_WINDOW_SECONDS, max_keys: int = DEFAULT_MAX_KEYS,
+                 flush_interval: float = FLUSH_INTERVAL_SECONDS, clock: Callable[[], float] = time.time):
+        self._db = db_manager
+        self.user_limit = max(1, int(user_limit))
+        self.source_limit = max(1, int(source_limit))
+        self.window_seconds = window_seconds
+        self._max_keys = max(1, int(max_keys))
+        self._flush_interval = flush_interval
+        self._clock = clock
+        self._failures: "OrderedDict[str, Deque[float]]" = OrderedDict()
+        self._pending: List[Tuple[str, float]] = []
+        self._resets: set = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = clock()
+        self._timer: Optional[threading.Timer] = None
+        self._stats = {"checks": 0, "blocked": 0, "failures": 0, "resets": 0, "flushes": 0,
+                       "rows_written": 0, "evictions": 0}
+        self._load()
+
+    def _limit(self, key: str) -> int:
+        """Failures allowed for a key within the window."""
+        return self.user_limit if key.startswith("user:") else self.source_limit
+
+    def _load(self) -> None:
+        """Rebuild the ring buffers from failures still inside the window."""
+        rows = self._db.fetch_all(
+            "SELECT key, failed_at FROM login_failures WHERE failed_at > ? ORDER BY failed_at",
+            (self._clock() - self.window_seconds,)
+        )
+        with self._lock:
+            for row in rows:
+                self._buffer(row["key"]).append(row["failed_at"])
+
+    def _buffer(self, key: str) -> Deque[float]:
+        """The ring buffer for a key (lock held), created and LRU-bounded on demand."""
+        failures = self._failures.get(key)
+        if failures is None:
+            failures = self._failures[key] = deque(maxlen=self._limit(key))
+            while len(self._failures) > self._max_keys:
+                self._failures.popitem(last=False)
+                self._stats["evictions"] += 1
+        else:
+            self._failures.move_to_end(key)
+        return failures
+
+    def _wait(self, keys: List[str], now: float) -> float:
+        """Seconds until every key is under its limit (lock held)."""
+        wait = 0.0
+        for key in keys:
+            failures = self._failures.get(key)
+            if failures is not None and len(failures) == failures.maxlen:
+                wait = max(wait, failures[0] + self.window_seconds - now)
+        return wait
+
+    def _unreserve(self, key: str, at: float) -> None:
+        """Take a reserved slot back out of a key's buffer (lock held)."""
+        failures = self._failures.get(key)
+        if failures is not None:
+            try:
+                failures.remove(at)
+            except ValueError:
+                #Already pushed out by newer failures
+                pass
+
+    def _queue(self, keys: List[str], at: float) -> bool:
+        """Queue failure rows for writing (lock held); True when a flush is due.
+
+        A flush is due for a full batch, after flush_interval, or when the failure locks
+        a key, so a lockout survives a restart and is seen by other processes at once.
+        """
+        self._pending.extend((key, at) for key in keys)
+        self._stats["failures"] += 1
+        if (len(self._pending) >= FLUSH_BATCH or at - self._last_flush >= self._flush_interval
+                or self._wait(keys, at) > 0):
+            return True
+        if self._timer is None:
+            #Otherwise a lone failure would sit in memory until the next one arrives
+            self._timer = threading.Timer(self._flush_interval, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+        return False
+
+    def _timed_flush(self) -> None:
+        """Timer callback: write failures still queued after flush_interval."""
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Login throttle flush error: {e}")
+
+    def _reset(self, key: str) -> bool:
+        """Forget a key's failures and queue the delete (lock held); False if it had none."""
+        if self._failures.pop(key, None) is None:
+            return False
+        #Queued failures for the key are dropped; later ones are queued after the reset
+        self._pending = [entry for entry in self._pending if entry[0] != key]
+        self._resets.add(key)
+        self._stats["resets"] += 1
+        return True
+
+    #Public API
+    def retry_after(self, username: str, source: Optional[str] = None) -> float:
+        """Seconds until this username/source may try again (0 if it is not locked)."""
+        now = self._clock()
+        with self._lock:
+            return max(self._wait(_keys(username, source), now), 0.0)
+
+    def begin(self, username: str, source: Optional[str] = None) -> Optional[LoginAttempt]:
+        """Check the limits and reserve a failure slot in one step; None if locked.
+
+        Settle the attempt with fail(), succeed() or release().
+        """
+        keys = _keys(username, source)
+        now = self._clock()
+        with self._lock:
+            self._stats["checks"] += 1
+            if self._wait(keys, now) > 0:
+                self._stats["blocked"] += 1
+                return None
+            for key in keys:
+                self._buffer(key).append(now)
+        return LoginAttempt(username, keys, now)
+
+    def fail(self, attempt: LoginAttempt) -> None:
+        """The attempt failed: its reserved slots become recorded failures."""
+        with self._lock:
+            if attempt.settled:
+                return
+            attempt.settled = True
+            due = self._queue(attempt.keys, attempt.at)
+        if due:
+            self.flush()
+
+    def succeed(self, attempt: LoginAttempt) -> None:
+        """The attempt logged in: clear the username's failures and free the source slot."""
+        with self._lock:
+            if attempt.settled:
+                return
+            attempt.settled = True
+            for key in attempt.keys[1:]:
+                self._unreserve(key, attempt.at)
+            reset = self._reset(attempt.keys[0])
+        if reset:
+            self.flush()
+
+    def release(self, attempt: LoginAttempt) -> None:
+        """The attempt never got to a verdict (e.g. an error): give its slots back."""
+        with self._lock:
+            if attempt.settled:
+                return
+            attempt.settled = True
+            for key in attempt.keys:
+                self._unreserve(key, attempt.at)
+
+    def record_failure(self, username: str, source: Optional[str] = None) -> None:
+        """Count a failed login against the username and the source."""
+        now = self._clock()
+        keys = _keys(username, source)
+        with self._lock:
+            for key in keys:
+                self._buffer(key).append(now)
+            due = self._queue(keys, now)
+        if due:
+            self.flush()
+
+    def record_success(self, username: str) -> None:
+        """Clear a username's failures after a good login (the source keeps its count)."""
+        with self._lock:
+            reset = self._reset(_keys(username, None)[0])
+        if reset:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write queued failures and resets, and drop rows that left the window."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                resets, self._resets = list(self._resets), set()
+                self._last_flush = self._clock()
+                timer, self._timer = self._timer, None
+            if timer is not None:
+                timer.cancel()
+            for batch in _chunks(resets):
+                self._db.execute_query(
+                    f"DELETE FROM login_failures WHERE key IN ({', '.join('?' * len(batch))})", batch
+                )
+            for batch in _chunks(pending):
+                self._db.execute_query(
+                    f"INSERT INTO login_failures (key, failed_at) VALUES {', '.join(['(?, ?)'] * len(batch))}",
+                    [value for entry in batch for value in entry]
+                )
+            if pending or resets:
+                self._db.execute_query(
+                    "DELETE FROM login_failures WHERE failed_at <= ?",
+                    (self._clock() - self.window_seconds,)
+                )
+            with self._lock:
+                self._stats["flushes"] += 1
+                self._stats["rows_written"] += len(pending)
+            return len(pending)
+
+    def stats(self) -> Dict[str, Any]:
+        """Check/block/failure counters, tracked keys and queued writes."""
+        with self._lock:
+            return dict(self._stats, keys=len(self._failures), pending=len(self._pending))
+
+
+#Process-wide registry so every session counts against one throttle per database file
+_throttles: Dict[str, LoginThrottle] = {}
+_throttles_lock = threading.Lock()
+
+
+def get_login_throttle(db_manager) -> LoginThrottle:
+    """Return the shared login throttle for a database (it writes through its own DatabaseManager)."""
+    key = str(Path(db_manager._db_path).resolve())
+    with _throttles_lock:
+        throttle = _throttles.get(key)
+        if throttle is None:
+            throttle = _throttles[key] = LoginThrottle(type(db_manager)(db_manager._db_path))
+            #Queued failures outlive a clean shutdown
+            atexit.register(throttle.flush)
+        return throttle
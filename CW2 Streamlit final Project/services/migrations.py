@@ -0,0 +1,285 @@
+"""Schema migration runner service"""
+import threading
+from typing import List, Sequence, Set, Tuple
+from services.rollup_engine import ROLLUP_MIGRATION
+from services.snapshot_manager import CHANGE_LOG_MIGRATION, LOGGED_TABLES_MIGRATION
+from services.session_store import SESSION_MIGRATION
+from services.login_throttle import LOGIN_THROTTLE_MIGRATION
+
+#Ordered, append-only list of (version, name, statements). Never edit an applied migration.
+MIGRATIONS: List[Tuple[int, str, Sequence[str]]] = [
+    (1, "baseline schema", (
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password_hash TEXT NOT NULL,
+            role TEXT DEFAULT 'user',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS cyber_incidents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT,
+            severity TEXT,
+            status TEXT,
+            date TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS datasets_metadata (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            source TEXT,
+            category TEXT,
+            size INTEGER
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS it_tickets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT,
+            priority TEXT,
+            status TEXT,
+            created_date TEXT
+        )
+        """,
+    )),
+    (2, "typed date columns", (
+        #Normalized DATE copies of the free-text date columns, kept in step by triggers
+        "ALTER TABLE cyber_incidents ADD COLUMN occurred_on DATE",
+        "UPDATE cyber_incidents SET occurred_on = date(date)",
+        """
+        CREATE TRIGGER IF NOT EXISTS incidents_occurred_on_insert AFTER INSERT ON cyber_incidents
+        BEGIN
+            UPDATE cyber_incidents SET occurred_on = date(NEW.date) WHERE id = NEW.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS incidents_occurred_on_update AFTER UPDATE OF date ON cyber_incidents
+        BEGIN
+            UPDATE cyber_incidents SET occurred_on = date(NEW.date) WHERE id = NEW.id;
+        END
+        """,
+        "ALTER TABLE it_tickets ADD COLUMN created_on DATE",
+        "UPDATE it_tickets SET created_on = date(created_date)",
+        """
+        CREATE TRIGGER IF NOT EXISTS tickets_created_on_insert AFTER INSERT ON it_tickets
+        BEGIN
+            UPDATE it_tickets SET created_on = date(NEW.created_date) WHERE id = NEW.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tickets_created_on_update AFTER UPDATE OF created_date ON it_tickets
+        BEGIN
+            UPDATE it_tickets SET created_on = date(NEW.created_date) WHERE id = NEW.id;
+        END
+        """,
+    )),
+    (3, "composite filter indexes", (
+        "CREATE INDEX IF NOT EXISTS idx_incidents_status_severity_date "
+        "ON cyber_incidents (status, severity, occurred_on)",
+        "CREATE INDEX IF NOT EXISTS idx_incidents_occurred_on ON cyber_incidents (occurred_on)",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_priority_status_created "
+        "ON it_tickets (priority, status, created_on)",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_created_on ON it_tickets (created_on)",
+        "CREATE INDEX IF NOT EXISTS idx_datasets_category_size ON datasets_metadata (category, size)",
+        "ANALYZE",
+    )),
+    (4, "ai response cache", (
+        """
+        CREATE TABLE IF NOT EXISTS ai_response_cache (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            last_used_at REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_ai_response_cache_last_used ON ai_response_cache (last_used_at)",
+    )),
+    (5, "full-text search", (
+        #One FTS5 mirror for every domain; rowid = id * 4 + domain code (see SEARCH_DOMAINS)
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+            title, detail, tokenize = 'porter unicode61', prefix = '2 3'
+        )
+        """,
+        #Default ranking: BM25 with title matches weighted above detail (status, role, ...) matches
+        "INSERT INTO search_index (search_index, rank) VALUES ('rank', 'bm25(4.0, 1.0)')",
+        "INSERT INTO search_index (rowid, title, detail) "
+        "SELECT id * 4 + 0, title, coalesce(severity, '') || ' ' || coalesce(status, '') FROM cyber_incidents",
+        """
+        CREATE TRIGGER IF NOT EXISTS incidents_search_insert AFTER INSERT ON cyber_incidents
+        BEGIN
+            INSERT INTO search_index (rowid, title, detail)
+            VALUES (NEW.id * 4 + 0, NEW.title, coalesce(NEW.severity, '') || ' ' || coalesce(NEW.status, ''));
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS incidents_search_update AFTER UPDATE OF title, severity, status ON cyber_incidents
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 4 + 0;
+            INSERT INTO search_index (rowid, title, detail)
+            VALUES (NEW.id * 4 + 0, NEW.title, coalesce(NEW.severity, '') || ' ' || coalesce(NEW.status, ''));
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS incidents_search_delete AFTER DELETE ON cyber_incidents
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 4 + 0;
+        END
+        """,
+        "INSERT INTO search_index (rowid, title, detail) "
+        "SELECT id * 4 + 1, title, coalesce(priority, '') || ' ' || coalesce(status, '') FROM it_tickets",
+        """
+        CREATE TRIGGER IF NOT EXISTS tickets_search_insert AFTER INSERT ON it_tickets
+        BEGIN
+            INSERT INTO search_index (rowid, title, detail)
+            VALUES (NEW.id * 4 + 1, NEW.title, coalesce(NEW.priority, '') || ' ' || coalesce(NEW.status, ''));
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tickets_search_update AFTER UPDATE OF title, priority, status ON it_tickets
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 4 + 1;
+            INSERT INTO search_index (rowid, title, detail)
+            VALUES (NEW.id * 4 + 1, NEW.title, coalesce(NEW.priority, '') || ' ' || coalesce(NEW.status, ''));
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tickets_search_delete AFTER DELETE ON it_tickets
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 4 + 1;
+        END
+        """,
+        "INSERT INTO search_index (rowid, title, detail) "
+        "SELECT id * 4 + 2, name, coalesce(source, '') || ' ' || coalesce(category, '') FROM datasets_metadata",
+        """
+        CREATE TRIGGER IF NOT EXISTS datasets_search_insert AFTER INSERT ON datasets_metadata
+        BEGIN
+            INSERT INTO search_index (rowid, title, detail)
+            VALUES (NEW.id * 4 + 2, NEW.name, coalesce(NEW.source, '') || ' ' || coalesce(NEW.category, ''));
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS datasets_search_update AFTER UPDATE OF name, source, category ON datasets_metadata
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 4 + 2;
+            INSERT INTO search_index (rowid, title, detail)
+            VALUES (NEW.id * 4 + 2, NEW.name, coalesce(NEW.source, '') || ' ' || coalesce(NEW.category, ''));
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS datasets_search_delete AFTER DELETE ON datasets_metadata
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 4 + 2;
+        END
+        """,
+        "INSERT INTO search_index (rowid, title, detail) "
+        "SELECT id * 4 + 3, username, coalesce(role, '') FROM users",
+        """
+        CREATE TRIGGER IF NOT EXISTS users_search_insert AFTER INSERT ON users
+        BEGIN
+            INSERT INTO search_index (rowid, title, detail)
+            VALUES (NEW.id * 4 + 3, NEW.username, coalesce(NEW.role, ''));
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS users_search_update AFTER UPDATE OF username, role ON users
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 4 + 3;
+            INSERT INTO search_index (rowid, title, detail)
+            VALUES (NEW.id * 4 + 3, NEW.username, coalesce(NEW.role, ''));
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS users_search_delete AFTER DELETE ON users
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 4 + 3;
+        END
+        """,
+    )),
+    #Daily/weekly/monthly incident and ticket counts, maintained by triggers (see rollup_engine)
+    (6, "time-series rollups", ROLLUP_MIGRATION),
+    #row_version/updated_at columns and a trigger-fed change_log (see snapshot_manager)
+    (7, "change tracking", CHANGE_LOG_MIGRATION),
+    #Server-side login sessions (see session_store)
+    (8, "sessions", SESSION_MIGRATION),
+    (9, "login throttle", LOGIN_THROTTLE_MIGRATION),
+    #Log user writes too, so caches notice accounts created by other processes
+    (10, "user change log", LOGGED_TABLES_MIGRATION),
+]
+
+
+class MigrationRunner:
+    """Applies pending schema migrations and records them in schema_migrations."""
+
+    def __init__(self, db_manager, migrations: Sequence[Tuple[int, str, Sequence[str]]] = None):
+        self._db = db_manager
+        self._migrations = sorted(migrations or MIGRATIONS, key=lambda m: m[0])
+
+    def _ensure_table(self) -> None:
+        """Create the schema_migrations bookkeeping table."""
+        self._db.execute_query("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+
+    def applied_versions(self) -> Set[int]:
+        """Return the versions already recorded as applied."""
+        self._ensure_table()
+        rows = self._db.fetch_all("SELECT version FROM schema_migrations")
+        return {row["version"] for row in rows}
+
+    def pending(self) -> List[Tuple[int, str, Sequence[str]]]:
+        """Return migrations that have not been applied yet."""
+        applied = self.applied_versions()
+        return [m for m in self._migrations if m[0] not in applied]
+
+    def run(self) -> List[int]:
+        """Apply every pending migration, each in its own transaction."""
+        applied_now = []
+        if not self.pending():
+            return applied_now
+
+        for version, name, statements in self._migrations:
+            with self._db.transaction():
+                #Re-check under the write lock in case another process got here first
+                already = self._db.fetch_one(
+                    "SELECT 1 AS applied FROM schema_migrations WHERE version = ?", (version,)
+                )
+                if already:
+                    continue
+                for statement in statements:
+                    self._db.execute_query(statement)
+                self._db.execute_query(
+                    "INSERT INTO schema_migrations (version, name) VALUES (?, ?)",
+                    (version, name)
+                )
+            applied_now.append(version)
+        return applied_now
+
+
+#Databases already migrated by this process, so reruns skip the check entirely
+_migrated: Set[str] = set()
+_migrated_lock = threading.Lock()
+
+
+def ensure_migrated(db_manager, key: str) -> List[int]:
+    """Run pending migrations once per process for the database identified by key."""
+    if key in _migrated:
+        return []
+    with _migrated_lock:
+        if key in _migrated:
+            return []
+        applied = MigrationRunner(db_manager).run()
+        _migrated.add(key)
+        return applied
+
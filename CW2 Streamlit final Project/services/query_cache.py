@@ -0,0 +1,134 @@
+"""Shared query result cache service"""
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("QUERY_CACHE_SIZE", "256"))
+
+#Marker table name meaning "every table" (schema changes)
+ALL_TABLES = "*"
+
+
+class QueryCache:
+    """Thread-safe LRU cache of query results, invalidated per table.
+
+    Each table has a generation counter that is bumped on invalidation. A result is only
+    stored if the generations it was read under are still current, so a slow reader can't
+    put back data that a concurrent write has already made stale.
+
+    Writes made through DatabaseManager invalidate their table at once. Writes from other
+    connections (scripts, a second server process) are found through the change log:
+    DatabaseManager reports each new log head with advance() before it reads the cache.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self._max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[str, ...], Any]]" = OrderedDict()
+        self._keys_by_table: Dict[str, Set[Hashable]] = {}
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        #Newest change log version already accounted for (None until the first check)
+        self._log_head: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return (found, value) for a key and refresh its LRU position."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, entry[1]
+
+    def generation(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        """Snapshot the generation of some tables before reading them."""
+        with self._lock:
+            return (self._epoch,) + tuple(self._generations.get(t, 0) for t in sorted(tables))
+
+    def put(self, key: Hashable, value: Any, tables: Iterable[str], generation: Tuple[int, ...]) -> bool:
+        """Store a result read under `generation`; skipped if a table changed meanwhile."""
+        tables = tuple(sorted(tables))
+        with self._lock:
+            current = (self._epoch,) + tuple(self._generations.get(t, 0) for t in tables)
+            if current != generation:
+                return False
+            self._remove(key)
+            self._entries[key] = (tables, value)
+            for table in tables:
+                self._keys_by_table.setdefault(table, set()).add(key)
+            while len(self._entries) > self._max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+            return True
+
+    def _remove(self, key: Hashable) -> None:
+        """Drop one entry and its table index references (lock must be held)."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for table in entry[0]:
+            keys = self._keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+
+    def invalidate(self, tables: Iterable[str]) -> None:
+        """Drop every cached result that depends on any of the given tables."""
+        with self._lock:
+            for table in set(tables):
+                self._stats["invalidations"] += 1
+                if table == ALL_TABLES:
+                    self._epoch += 1
+                    self._entries.clear()
+                    self._keys_by_table.clear()
+                    continue
+                self._generations[table] = self._generations.get(table, 0) + 1
+                for key in list(self._keys_by_table.pop(table, ())):
+                    self._remove(key)
+
+    @property
+    def log_head(self) -> Optional[int]:
+        """Change log version the cached results are known to be current with."""
+        return self._log_head
+
+    def advance(self, head: int, tables: Optional[Iterable[str]]) -> None:
+        """Invalidate the tables changed up to a change log head (None: unknown, drop everything)."""
+        self.invalidate([ALL_TABLES] if tables is None else tables)
+        with self._lock:
+            if self._log_head is None or tables is None or head > self._log_head:
+                self._log_head = head
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        self.invalidate([ALL_TABLES])
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, size and hit ratio."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["max_entries"] = self._max_entries
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+#Process-wide registry so every session shares one cache per database file
+_caches: Dict[str, QueryCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_query_cache(db_path, max_entries: Optional[int] = None) -> QueryCache:
+    """Return the shared cache for a database file, creating it on first use."""
+    key = str(Path(db_path).resolve())
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = QueryCache(max_entries or DEFAULT_MAX_ENTRIES)
+            _caches[key] = cache
+        return cache
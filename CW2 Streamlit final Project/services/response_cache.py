@@ -0,0 +1,112 @@
+"""AI response cache service class"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+#Defaults (overridable with the AI_CACHE_TTL_SECONDS and AI_CACHE_MAX_ENTRIES environment variables)
+DEFAULT_TTL_SECONDS = int(os.environ.get("AI_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("AI_CACHE_MAX_ENTRIES", "2000"))
+
+_SPACES = re.compile(r"[ \t]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def normalize_prompt(text: str) -> str:
+    """Collapse whitespace differences that don't change what the model is asked."""
+    lines = [_SPACES.sub(" ", line).strip() for line in (text or "").replace("\r\n", "\n").split("\n")]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+class ResponseCache:
+    """Content-addressed cache of AI responses stored in the ai_response_cache table.
+
+    The cache is called from worker threads (AsyncAIAssistant runs it with asyncio.to_thread),
+    so it reads and writes through its own DatabaseManager and one call at a time: a page's
+    manager keeps its transaction state on the instance and must not be shared across threads.
+    """
+
+    def __init__(self, db_manager, ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, clock: Callable[[], float] = time.time):
+        self._db = type(db_manager)(db_manager._db_path)
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, int(max_entries))
+        self._stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, temperature: float, prompt: str,
+                 context: str = "", history: Iterable[Dict[str, str]] = ()) -> str:
+        """Hash everything that determines a response into a stable key."""
+        payload = json.dumps({
+            "model": model,
+            "system": normalize_prompt(system_prompt),
+            "temperature": round(float(temperature), 3),
+            "prompt": normalize_prompt(prompt),
+            "context": normalize_prompt(context),
+            "history": [[m["role"], normalize_prompt(m["content"])] for m in history],
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached response, or None if missing or expired."""
+        #The lookup, expiry delete and hit count happen in one transaction
+        with self._lock, self._db.transaction():
+            now = self._clock()
+            row = self._db.fetch_one(
+                "SELECT response, expires_at FROM ai_response_cache WHERE key = ?", (key,)
+            )
+            if row is None or row["expires_at"] <= now:
+                if row is not None:
+                    self._db.execute_query("DELETE FROM ai_response_cache WHERE key = ?", (key,))
+                self._stats["misses"] += 1
+                return None
+            self._db.execute_query(
+                "UPDATE ai_response_cache SET last_used_at = ?, hits = hits + 1 WHERE key = ?", (now, key)
+            )
+            self._stats["hits"] += 1
+            return row["response"]
+
+    def put(self, key: str, response: str, model: str) -> None:
+        """Store a response and evict the least recently used entries over the limit (one transaction)."""
+        with self._lock, self._db.transaction():
+            now = self._clock()
+            self._db.execute_query(
+                """INSERT OR REPLACE INTO ai_response_cache
+                   (key, model, response, created_at, expires_at, last_used_at, hits)
+                   VALUES (?, ?, ?, ?, ?, ?, 0)""",
+                (key, model, response, now, now + self.ttl_seconds, now)
+            )
+            self._db.execute_query(
+                """DELETE FROM ai_response_cache WHERE key IN (
+                       SELECT key FROM ai_response_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,)
+            )
+            self._stats["stores"] += 1
+
+    def purge_expired(self) -> int:
+        """Delete every expired entry and return how many were removed."""
+        with self._lock:
+            cursor = self._db.execute_query(
+                "DELETE FROM ai_response_cache WHERE expires_at <= ?", (self._clock(),)
+            )
+        return max(cursor.rowcount, 0)
+
+    def clear(self) -> None:
+        """Delete every cached response."""
+        with self._lock:
+            self._db.execute_query("DELETE FROM ai_response_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for this instance and the stored entry count."""
+        with self._lock:
+            stats = dict(self._stats)
+            row = self._db.fetch_one("SELECT COUNT(*) AS entries FROM ai_response_cache")
+        stats["entries"] = row["entries"] if row else 0
+        stats["max_entries"] = self.max_entries
+        return stats
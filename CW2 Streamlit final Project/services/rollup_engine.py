@@ -0,0 +1,160 @@
+"""Time-series rollup engine service class"""
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+#Bucket start date for each grain as a SQLite expression of a date value (weeks start on Monday)
+GRAINS = {
+    "day": "date({0})",
+    "week": "date({0}, 'weekday 0', '-6 days')",
+    "month": "date({0}, 'start of month')",
+}
+
+#One rollup table per source table: counts per grain, bucket and both breakdown columns.
+#Migration 6 creates these from the specs below, so changing them needs a new migration.
+ROLLUPS = {
+    "incident_rollups": {"source": "cyber_incidents", "date": "date", "dims": ("severity", "status")},
+    "ticket_rollups": {"source": "it_tickets", "date": "created_date", "dims": ("priority", "status")},
+}
+
+
+def _table_sql(table: str, spec: Dict[str, Any]) -> str:
+    """CREATE TABLE for one rollup (clustered on grain and bucket for range reads)."""
+    dim1, dim2 = spec["dims"]
+    return f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            grain TEXT NOT NULL,
+            bucket DATE NOT NULL,
+            {dim1} TEXT NOT NULL,
+            {dim2} TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (grain, bucket, {dim1}, {dim2})
+        ) WITHOUT ROWID"""
+
+
+def _bump_sql(table: str, spec: Dict[str, Any], row: str, delta: int) -> str:
+    """Upsert that adds delta to every grain's bucket for the NEW or OLD row."""
+    dim1, dim2 = spec["dims"]
+    date_column = f"{row}.{spec['date']}"
+    buckets = "\n                UNION ALL ".join(
+        f"SELECT '{grain}' AS grain, {expression.format(date_column)} AS bucket"
+        for grain, expression in GRAINS.items()
+    )
+    return f"""
+            INSERT INTO {table} (grain, bucket, {dim1}, {dim2}, count)
+            SELECT grain, bucket, coalesce({row}.{dim1}, ''), coalesce({row}.{dim2}, ''), {delta} FROM (
+                {buckets}
+            ) WHERE bucket IS NOT NULL
+            ON CONFLICT (grain, bucket, {dim1}, {dim2}) DO UPDATE SET count = count + excluded.count;"""
+
+
+def _triggers(table: str, spec: Dict[str, Any]) -> Dict[str, str]:
+    """Insert, update and delete triggers that keep one rollup in step with its source."""
+    source, watched = spec["source"], ", ".join((spec["date"],) + spec["dims"])
+    return {
+        f"{table}_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON {source}
+        BEGIN{_bump_sql(table, spec, "NEW", 1)}
+        END""",
+        f"{table}_update": f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_update AFTER UPDATE OF {watched} ON {source}
+        BEGIN{_bump_sql(table, spec, "OLD", -1)}{_bump_sql(table, spec, "NEW", 1)}
+        END""",
+        f"{table}_delete": f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON {source}
+        BEGIN{_bump_sql(table, spec, "OLD", -1)}
+        END""",
+    }
+
+
+def _backfill_sql(table: str, spec: Dict[str, Any]) -> str:
+    """Count every source row into the rollup with one GROUP BY per grain."""
+    dim1, dim2 = spec["dims"]
+    selects = "\n        UNION ALL\n".join(f"""
+        SELECT '{grain}', {expression.format(spec['date'])} AS bucket,
+               coalesce({dim1}, ''), coalesce({dim2}, ''), COUNT(*)
+        FROM {spec['source']} WHERE bucket IS NOT NULL GROUP BY 2, 3, 4"""
+        for grain, expression in GRAINS.items()
+    )
+    return f"INSERT INTO {table} (grain, bucket, {dim1}, {dim2}, count){selects}"
+
+
+#Trigger SQL keyed by trigger name (like COUNTER_TRIGGERS in statistics_engine)
+ROLLUP_TRIGGERS = {
+    name: sql for table, spec in ROLLUPS.items() for name, sql in _triggers(table, spec).items()
+}
+
+#Statements for the schema migration: tables, triggers, then the initial backfill
+ROLLUP_MIGRATION = tuple(
+    [_table_sql(table, spec) for table, spec in ROLLUPS.items()]
+    + list(ROLLUP_TRIGGERS.values())
+    + [_backfill_sql(table, spec) for table, spec in ROLLUPS.items()]
+)
+
+
+class RollupEngine:
+    """Reads trend series from the trigger-maintained rollup tables and rebuilds them."""
+
+    def __init__(self, db_manager):
+        self._db = db_manager
+
+    def trend(self, table: str, grain: str = "month", by: Optional[str] = None,
+              start: Optional[str] = None, end: Optional[str] = None,
+              filters: Optional[Dict[str, Sequence[str]]] = None) -> List[Dict[str, Any]]:
+        """Counts per bucket (and per `by` value), oldest first; costs O(buckets), not O(rows).
+
+        start and end are inclusive ISO dates matched against bucket start dates.
+        """
+        if table not in ROLLUPS:
+            raise ValueError(f"Unknown rollup table: {table}")
+        if grain not in GRAINS:
+            raise ValueError(f"grain must be one of {', '.join(GRAINS)}")
+        dims = ROLLUPS[table]["dims"]
+        if by is not None and by not in dims:
+            raise ValueError(f"Cannot break {table} down by '{by}'")
+
+        clauses, params = ["grain = ?"], [grain]
+        if start:
+            clauses.append("bucket >= ?")
+            params.append(start)
+        if end:
+            clauses.append("bucket <= ?")
+            params.append(end)
+        for column, values in (filters or {}).items():
+            if column not in dims:
+                raise ValueError(f"Cannot filter {table} on '{column}'")
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+
+        columns = "bucket" + (f", {by}" if by else "")
+        return self._db.fetch_all(
+            f"""SELECT {columns}, SUM(count) AS count FROM {table}
+                WHERE {" AND ".join(clauses)}
+                GROUP BY {columns} HAVING SUM(count) > 0 ORDER BY {columns}""",
+            params
+        )
+
+    #Rollup maintenance
+    def rebuild(self) -> None:
+        """Recount every rollup table from its source table."""
+        with self._db.transaction():
+            for table, spec in ROLLUPS.items():
+                self._db.execute_query(f"DELETE FROM {table}")
+                self._db.execute_query(_backfill_sql(table, spec))
+
+    @contextmanager
+    def deferred(self) -> Iterator[None]:
+        """Suspend the rollup triggers for a bulk load, then recount once at the end.
+
+        Faster than per-row trigger upserts when loading a large share of a table.
+        """
+        with self._db.transaction():
+            for name in ROLLUP_TRIGGERS:
+                self._db.execute_query(f"DROP TRIGGER IF EXISTS {name}")
+        try:
+            yield
+        finally:
+            with self._db.transaction():
+                for sql in ROLLUP_TRIGGERS.values():
+                    self._db.execute_query(sql)
+                self.rebuild()
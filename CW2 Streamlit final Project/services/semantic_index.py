@@ -0,0 +1,358 @@
+"""Local semantic search index service class"""
+import math
+import re
+import threading
+import time
+import zlib
+from array import array
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from services.snapshot_manager import DELTA_BATCH, change_log_head, changed_ids
+
+#Searchable tables: domain code, table and the text column that is indexed
+SEARCH_SOURCES = {
+    "incident": (0, "cyber_incidents", "title"),
+    "ticket": (1, "it_tickets", "title"),
+}
+_DOMAINS = {code: kind for kind, (code, _, _) in SEARCH_SOURCES.items()}
+
+#Terms are hashed into 2**HASH_BITS buckets, so the index needs no vocabulary
+HASH_BITS = 22
+#Pending postings are merged into the main arrays once they pass this share of it
+COMPACT_RATIO = 0.05
+COMPACT_MIN_POSTINGS = 20000
+
+_WORDS = re.compile(r"[a-z0-9]+")
+#Longer bare numbers are row counters and ids; indexing them would fill every bucket
+MAX_NUMBER_DIGITS = 4
+#Common English words that would match most rows
+STOP_WORDS = frozenset("a an and are as at be by for from in is it of on or the to was with".split())
+
+
+@lru_cache(maxsize=200000)
+def _bucket(term: str) -> int:
+    """Hash a term to its bucket (crc32 is stable across processes, unlike hash())."""
+    return zlib.crc32(term.encode("utf-8")) & ((1 << HASH_BITS) - 1)
+
+
+@lru_cache(maxsize=200000)
+def _term(word: str) -> str:
+    """Stem a lowercase word ('attacks' and 'attacked' become 'attack'); empty if it is skipped."""
+    if word in STOP_WORDS or (len(word) > MAX_NUMBER_DIGITS and word.isdigit()):
+        return ""
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def term_weights(text: str) -> Dict[int, float]:
+    """Hashed term frequencies of text: stemmed words plus adjacent pairs of non-numeric words."""
+    words = [term for term in map(_term, _WORDS.findall((text or "").lower())) if term]
+    counts: Dict[int, float] = {}
+    for word in words:
+        bucket = _bucket(word)
+        counts[bucket] = counts.get(bucket, 0.0) + 1.0
+    for first, second in zip(words, words[1:]):
+        if first.isdigit() or second.isdigit():
+            continue
+        bucket = _bucket(f"{first} {second}")
+        counts[bucket] = counts.get(bucket, 0.0) + 1.0
+    return counts
+
+
+class SemanticIndex:
+    """In-memory TF-IDF index over incident and ticket titles with NumPy top-k search.
+
+    Postings live in CSR arrays (bucket -> row slots and weights), so a query only touches
+    the rows that share a term with it. Each search reads the change log head; rows changed
+    since the last sync (by any process) go to a small pending segment and their old slots
+    are tombstoned until the next compaction.
+    """
+
+    def __init__(self, db_manager):
+        self._db = db_manager
+        self._lock = threading.RLock()
+        self._built = False
+        #Change log version the index reflects
+        self._version = 0
+        self._reset()
+        self.last_search_metrics: Dict[str, Any] = {}
+        self.build_seconds = 0.0
+
+    def _reset(self) -> None:
+        """Start from an empty index."""
+        self._size = 0
+        self._domain = np.zeros(0, dtype=np.int8)
+        self._ref = np.zeros(0, dtype=np.int64)
+        self._alive = np.zeros(0, dtype=bool)
+        self._indptr = np.zeros((1 << HASH_BITS) + 1, dtype=np.int64)
+        self._postings = np.zeros(0, dtype=np.int32)
+        self._weights = np.zeros(0, dtype=np.float32)
+        #Sorted row keys of the compacted slots (key = id * domains + domain code)
+        self._main_keys = np.zeros(0, dtype=np.int64)
+        self._main_slots = np.zeros(0, dtype=np.int32)
+        #Rows added since the last compaction (flat bucket/slot/weight postings)
+        self._delta_buckets = array("i")
+        self._delta_postings = array("i")
+        self._delta_weights = array("f")
+        self._delta_rows: Dict[int, int] = {}
+
+    @staticmethod
+    def _key(kind: str, row_id: int) -> int:
+        """Unique integer key for a row across domains."""
+        return int(row_id) * len(SEARCH_SOURCES) + SEARCH_SOURCES[kind][0]
+
+    def _find_slot(self, key: int) -> Optional[int]:
+        """Slot currently holding a row, or None."""
+        slot = self._delta_rows.get(key)
+        if slot is not None:
+            return slot
+        position = int(np.searchsorted(self._main_keys, key))
+        if position < len(self._main_keys) and self._main_keys[position] == key:
+            return int(self._main_slots[position])
+        return None
+
+    def _grow(self, needed: int) -> None:
+        """Make room in the per-slot arrays (capacity doubles)."""
+        if needed <= len(self._alive):
+            return
+        capacity = max(needed, len(self._alive) * 2, 1024)
+        for name in ("_domain", "_ref", "_alive"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _add_rows(self, kind: str, rows: Iterable[Tuple[int, str]], fresh: bool = False) -> None:
+        """Add (id, text) rows to the pending segment, tombstoning any older copies.
+
+        fresh skips the lookups when the index is being built from empty.
+        """
+        code = SEARCH_SOURCES[kind][0]
+        first = self._size
+        refs = array("q")
+        for row_id, text in rows:
+            slot = first + len(refs)
+            if not fresh:
+                key = self._key(kind, row_id)
+                old = self._find_slot(key)
+                if old is not None:
+                    self._alive[old] = False
+                self._delta_rows[key] = slot
+            refs.append(row_id)
+            counts = term_weights(text)
+            norm = math.sqrt(sum(c * c for c in counts.values())) or 1.0
+            self._delta_buckets.extend(counts)
+            self._delta_postings.extend([slot] * len(counts))
+            self._delta_weights.extend([count / norm for count in counts.values()])
+        if not refs:
+            return
+        self._grow(first + len(refs))
+        self._size = first + len(refs)
+        self._ref[first:self._size] = np.frombuffer(refs, dtype=np.int64)
+        self._domain[first:self._size] = code
+        self._alive[first:self._size] = True
+
+    def _fetch(self, kind: str, where: str, params: Sequence[Any] = ()) -> Iterable[Tuple[int, str]]:
+        """Stream (id, text) rows for one domain."""
+        _, table, column = SEARCH_SOURCES[kind]
+        return self._db.iter_rows(
+            f"SELECT id, {column} FROM {table} WHERE {where} ORDER BY id",
+            params, batch_size=5000, row_type="tuple"
+        )
+
+    def _apply_changes(self) -> None:
+        """Reindex the rows changed since the last sync (ids no longer in a table were deleted)."""
+        #Read the head before the rows: a change racing the fetch is applied again next sync
+        head = change_log_head(self._db)
+        if head == self._version:
+            return
+        for kind, (_, table, _) in SEARCH_SOURCES.items():
+            ids = changed_ids(self._db, table, self._version, head)
+            if ids is None:
+                #The log was pruned past this index
+                self.build()
+                return
+            for start in range(0, len(ids), DELTA_BATCH):
+                batch = ids[start:start + DELTA_BATCH]
+                rows = list(self._fetch(kind, f"id IN ({', '.join('?' * len(batch))})", batch))
+                self._add_rows(kind, rows)
+                for row_id in set(batch).difference(row_id for row_id, _ in rows):
+                    slot = self._find_slot(self._key(kind, row_id))
+                    if slot is not None:
+                        self._alive[slot] = False
+        self._version = head
+        if len(self._delta_postings) > max(COMPACT_MIN_POSTINGS, COMPACT_RATIO * len(self._postings)):
+            self.compact()
+
+    #Building
+    def build(self) -> None:
+        """Index every row from scratch."""
+        with self._lock:
+            start = time.perf_counter()
+            head = change_log_head(self._db)
+            self._reset()
+            for kind in SEARCH_SOURCES:
+                self._add_rows(kind, self._fetch(kind, "1 = 1"), fresh=True)
+            self.compact()
+            self._version = head
+            self._built = True
+            self.build_seconds = time.perf_counter() - start
+
+    def compact(self) -> None:
+        """Merge pending postings into the CSR arrays and drop tombstoned rows."""
+        with self._lock:
+            delta_buckets, delta_slots, delta_weights = self._delta_arrays()
+            main_buckets = np.repeat(
+                np.arange(1 << HASH_BITS, dtype=np.int32), np.diff(self._indptr)
+            )
+            all_buckets = np.concatenate([main_buckets, delta_buckets])
+            all_slots = np.concatenate([self._postings, delta_slots])
+            all_weights = np.concatenate([self._weights, delta_weights])
+
+            #Renumber the live slots densely and drop postings of dead ones
+            alive = self._alive[:self._size]
+            new_slot = np.cumsum(alive, dtype=np.int64) - 1
+            keep = alive[all_slots]
+            all_buckets = all_buckets[keep]
+            all_slots = new_slot[all_slots[keep]].astype(np.int32)
+            all_weights = all_weights[keep]
+
+            order = np.argsort(all_buckets, kind="stable")
+            self._postings = all_slots[order]
+            self._weights = all_weights[order]
+            self._indptr = np.zeros((1 << HASH_BITS) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(all_buckets, minlength=1 << HASH_BITS), out=self._indptr[1:])
+
+            self._domain = self._domain[:self._size][alive]
+            self._ref = self._ref[:self._size][alive]
+            self._size = len(self._ref)
+            self._alive = np.ones(self._size, dtype=bool)
+            keys = self._ref * len(SEARCH_SOURCES) + self._domain
+            self._main_slots = np.argsort(keys, kind="stable").astype(np.int32)
+            self._main_keys = keys[self._main_slots]
+            self._delta_buckets = array("i")
+            self._delta_postings = array("i")
+            self._delta_weights = array("f")
+            self._delta_rows = {}
+
+    def ensure_built(self) -> None:
+        """Build on first use, then apply any writes logged since the last search."""
+        with self._lock:
+            if not self._built:
+                self.build()
+            else:
+                self._apply_changes()
+
+    #Searching
+    def _delta_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Views of the pending postings as NumPy arrays."""
+        return (
+            np.frombuffer(self._delta_buckets, dtype=np.int32),
+            np.frombuffer(self._delta_postings, dtype=np.int32),
+            np.frombuffer(self._delta_weights, dtype=np.float32),
+        )
+
+    def _postings_for(self, buckets: Sequence[int]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Slots and weights for each bucket from both segments."""
+        delta_buckets, delta_slots, delta_weights = self._delta_arrays()
+        found = []
+        for bucket in buckets:
+            begin, end = self._indptr[bucket], self._indptr[bucket + 1]
+            slots, weights = self._postings[begin:end], self._weights[begin:end]
+            if len(delta_buckets):
+                mask = delta_buckets == bucket
+                if mask.any():
+                    slots = np.concatenate([slots, delta_slots[mask]])
+                    weights = np.concatenate([weights, delta_weights[mask]])
+            found.append((slots, weights))
+        return found
+
+    def search(self, query: str, kinds: Sequence[str] = tuple(SEARCH_SOURCES), limit: int = 10,
+               min_score: float = 0.05) -> List[Dict[str, Any]]:
+        """Return the rows most similar to query, best first.
+
+        Each result has kind, id, text and score (cosine similarity of IDF-weighted terms).
+        """
+        start = time.perf_counter()
+        with self._lock:
+            self.ensure_built()
+            query_terms = term_weights(query)
+            live = int(self._alive[:self._size].sum())
+            postings = self._postings_for(list(query_terms))
+            #IDF is computed at query time, so stored row weights never need rewriting
+            query_weights = [
+                count * (math.log((1 + live) / (1 + len(slots))) + 1.0)
+                for count, (slots, _) in zip(query_terms.values(), postings)
+            ]
+            query_norm = math.sqrt(sum(w * w for w, (slots, _) in zip(query_weights, postings) if len(slots))) or 1.0
+            #One bincount over every matching posting scores all rows at once
+            all_slots = np.concatenate([slots for slots, _ in postings] or [np.zeros(0, dtype=np.int32)])
+            all_weights = np.concatenate(
+                [weights * np.float32(w / query_norm) for w, (_, weights) in zip(query_weights, postings)]
+                or [np.zeros(0, dtype=np.float32)]
+            )
+            scores = np.bincount(all_slots, all_weights, minlength=self._size)
+            scores[~self._alive[:self._size]] = 0.0
+            codes = [SEARCH_SOURCES[kind][0] for kind in kinds]
+            if len(codes) < len(SEARCH_SOURCES):
+                scores[~np.isin(self._domain[:self._size], codes)] = 0.0
+
+            candidates = np.flatnonzero(scores >= min_score)
+            if len(candidates) > limit:
+                candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+            candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+            hits = [(_DOMAINS[int(self._domain[s])], int(self._ref[s]), float(scores[s])) for s in candidates]
+            total = live
+
+        results = self._with_text(hits)
+        self.last_search_metrics = {
+            "seconds": time.perf_counter() - start,
+            "rows": total,
+            "matches": len(results),
+        }
+        return results
+
+    def _with_text(self, hits: List[Tuple[str, int, float]]) -> List[Dict[str, Any]]:
+        """Attach the current text of each hit (one query per domain)."""
+        texts: Dict[Tuple[str, int], str] = {}
+        for kind in SEARCH_SOURCES:
+            ids = [row_id for hit_kind, row_id, _ in hits if hit_kind == kind]
+            if ids:
+                marks = ", ".join("?" * len(ids))
+                for row_id, text in self._fetch(kind, f"id IN ({marks})", ids):
+                    texts[(kind, row_id)] = text
+        return [
+            {"kind": kind, "id": row_id, "text": texts[(kind, row_id)], "score": score}
+            for kind, row_id, score in hits if (kind, row_id) in texts
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return index size and layout counters."""
+        with self._lock:
+            live = int(self._alive[:self._size].sum())
+            return {
+                "rows": live,
+                "tombstones": self._size - live,
+                "postings": len(self._postings),
+                "pending_postings": len(self._delta_postings),
+                "build_seconds": self.build_seconds,
+            }
+
+
+#Process-wide registry so every session shares one index per database file
+_indexes: Dict[str, SemanticIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_semantic_index(db_manager) -> SemanticIndex:
+    """Return the shared index for a database (it reads through its own DatabaseManager)."""
+    key = str(Path(db_manager._db_path).resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = SemanticIndex(type(db_manager)(db_manager._db_path))
+        return index
@@ -0,0 +1,225 @@
+"""Server-side session store service class"""
+import hashlib
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+#Session lifetime (absolute) and idle timeout, overridable with SESSION_TTL_SECONDS / SESSION_IDLE_SECONDS
+DEFAULT_TTL_SECONDS = int(os.environ.get("SESSION_TTL_SECONDS", str(8 * 3600)))
+DEFAULT_IDLE_SECONDS = int(os.environ.get("SESSION_IDLE_SECONDS", str(30 * 60)))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("SESSION_CACHE_SIZE", "1024"))
+#last_seen is written back (and revocation re-checked) at most this often per session
+TOUCH_INTERVAL_SECONDS = 60
+#Expired rows are deleted at most this often
+PURGE_INTERVAL_SECONDS = 3600
+
+#Permission claims granted by each role (unknown roles get the "user" set)
+ROLE_PERMISSIONS = {
+    "admin": ("view", "edit_records", "delete_records", "manage_users"),
+    "editor": ("view", "edit_records"),
+    "user": ("view",),
+}
+
+#Statements for the schema migration; only a SHA-256 of each token is stored
+SESSION_MIGRATION = (
+    """
+    CREATE TABLE IF NOT EXISTS sessions (
+        token_hash TEXT PRIMARY KEY,
+        user_id INTEGER,
+        username TEXT NOT NULL,
+        role TEXT NOT NULL,
+        member_since TEXT,
+        created_at REAL NOT NULL,
+        last_seen REAL NOT NULL,
+        expires_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions (user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)",
+)
+
+_COLUMNS = ("user_id", "username", "role", "member_since", "created_at", "last_seen", "expires_at")
+
+
+def _token_hash(token: str) -> str:
+    """Key a session by its token's digest so the table never holds usable tokens."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _claims(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Session dict with permission claims derived from the role."""
+    session = {column: row[column] for column in _COLUMNS}
+    session["permissions"] = ROLE_PERMISSIONS.get(session["role"], ROLE_PERMISSIONS["user"])
+    return session
+
+
+class SessionStore:
+    """Issues session tokens and resolves them to identity and role claims.
+
+    Sessions live in an in-memory LRU backed by the sessions table. A resolve that hits
+    the LRU checks expiry in memory and makes no query; last_seen is written back at most
+    once per TOUCH_INTERVAL_SECONDS, and that write also notices sessions revoked by
+    another process. Misses (a restart, or another process issued the token) read the table.
+    """
+
+    def __init__(self, db_manager, ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 idle_seconds: int = DEFAULT_IDLE_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self._db = db_manager
+        self.ttl_seconds = ttl_seconds
+        self.idle_seconds = idle_seconds
+        self._max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._stored_seen: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self._stats = {"issued": 0, "hits": 0, "misses": 0, "expired": 0, "revoked": 0, "evictions": 0}
+
+    #LRU helpers
+    def _put(self, key: str, session: Dict[str, Any], stored_seen: float) -> None:
+        """Cache a session, evicting the least recently used beyond max_entries."""
+        with self._lock:
+            self._entries[key] = session
+            self._entries.move_to_end(key)
+            self._stored_seen[key] = stored_seen
+            while len(self._entries) > self._max_entries:
+                oldest, _ = self._entries.popitem(last=False)
+                self._stored_seen.pop(oldest, None)
+                self._stats["evictions"] += 1
+
+    def _drop(self, key: str) -> None:
+        """Forget a cached session."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._stored_seen.pop(key, None)
+
+    def _expired(self, session: Dict[str, Any], now: float) -> bool:
+        """True past the absolute expiry or after too long idle."""
+        return now >= session["expires_at"] or now - session["last_seen"] >= self.idle_seconds
+
+    #Public API
+    def issue(self, user_id: Optional[int], username: str, role: str,
+              member_since: Optional[str] = None) -> str:
+        """Start a session and return its token (keep it in st.session_state only)."""
+        token = secrets.token_urlsafe(32)
+        key = _token_hash(token)
+        now = time.time()
+        row = {
+            "user_id": user_id, "username": username, "role": role or "user",
+            "member_since": member_since, "created_at": now, "last_seen": now,
+            "expires_at": now + self.ttl_seconds,
+        }
+        self._db.execute_query(
+            f"INSERT INTO sessions (token_hash, {', '.join(_COLUMNS)}) VALUES (?{', ?' * len(_COLUMNS)})",
+            (key, *(row[column] for column in _COLUMNS))
+        )
+        self._put(key, _claims(row), now)
+        with self._lock:
+            self._stats["issued"] += 1
+        if now - self._last_purge >= PURGE_INTERVAL_SECONDS:
+            self.purge_expired()
+        return token
+
+    def resolve(self, token: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Identity and claims for a token, or None if it is unknown, expired or revoked."""
+        if not token:
+            return None
+        key = _token_hash(token)
+        now = time.time()
+        with self._lock:
+            session = self._entries.get(key)
+            if session is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+            else:
+                self._stats["misses"] += 1
+        if session is None:
+            row = self._db.fetch_one(
+                f"SELECT {', '.join(_COLUMNS)} FROM sessions WHERE token_hash = ?", (key,)
+            )
+            if row is None:
+                return None
+            session = _claims(row)
+            self._put(key, session, row["last_seen"])
+
+        if self._expired(session, now):
+            self._drop(key)
+            self._db.execute_query("DELETE FROM sessions WHERE token_hash = ?", (key,))
+            with self._lock:
+                self._stats["expired"] += 1
+            return None
+
+        session["last_seen"] = now
+        if now - self._stored_seen.get(key, 0.0) >= TOUCH_INTERVAL_SECONDS:
+            touched = self._db.execute_query(
+                "UPDATE sessions SET last_seen = ? WHERE token_hash = ?", (now, key)
+            ).rowcount
+            if not touched:
+                #Revoked elsewhere (another process logged it out)
+                self._drop(key)
+                return None
+            with self._lock:
+                self._stored_seen[key] = now
+        return session
+
+    def revoke(self, token: Optional[str]) -> None:
+        """End one session (logout)."""
+        if not token:
+            return
+        key = _token_hash(token)
+        self._drop(key)
+        self._db.execute_query("DELETE FROM sessions WHERE token_hash = ?", (key,))
+        with self._lock:
+            self._stats["revoked"] += 1
+
+    def revoke_user(self, user_id: int) -> None:
+        """End every session of a user (e.g. when the account is deleted)."""
+        with self._lock:
+            keys = [key for key, session in self._entries.items() if session["user_id"] == user_id]
+        for key in keys:
+            self._drop(key)
+        self._db.execute_query("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+        with self._lock:
+            self._stats["revoked"] += len(keys)
+
+    def update_role(self, user_id: int, role: str) -> None:
+        """Re-issue the role claims of a user's live sessions after a role change."""
+        self._db.execute_query("UPDATE sessions SET role = ? WHERE user_id = ?", (role, user_id))
+        permissions = ROLE_PERMISSIONS.get(role, ROLE_PERMISSIONS["user"])
+        with self._lock:
+            for session in self._entries.values():
+                if session["user_id"] == user_id:
+                    session["role"] = role
+                    session["permissions"] = permissions
+
+    def purge_expired(self) -> int:
+        """Delete expired and idle sessions from the table; returns how many went."""
+        now = time.time()
+        self._last_purge = now
+        return self._db.execute_query(
+            "DELETE FROM sessions WHERE expires_at <= ? OR last_seen <= ?",
+            (now, now - self.idle_seconds)
+        ).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Cached sessions and hit/miss/expiry counters."""
+        with self._lock:
+            return dict(self._stats, cached=len(self._entries))
+
+
+#Process-wide registry so every session resolves against one store per database file
+_stores: Dict[str, SessionStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_session_store(db_manager) -> SessionStore:
+    """Return the shared session store for a database (it writes through its own DatabaseManager)."""
+    key = str(Path(db_manager._db_path).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = SessionStore(type(db_manager)(db_manager._db_path))
+        return store
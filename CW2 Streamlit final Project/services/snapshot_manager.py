@@ -0,0 +1,318 @@
+"""Delta-synced table snapshot service class"""
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+import numpy as np
+import pandas as pd
+
+#Tracked tables and the columns whose updates count as a change (derived columns such as
+#occurred_on and the row_version/updated_at bookkeeping are left out so they don't log twice).
+#Migration 7 creates the triggers from this, so changing it needs a new migration.
+CHANGE_TRACKED = {
+    "cyber_incidents": ("title", "severity", "status", "date"),
+    "it_tickets": ("title", "priority", "status", "created_date"),
+    "datasets_metadata": ("name", "source", "category", "size"),
+}
+
+#Tables logged without the row_version/updated_at stamp, only so readers such as the query
+#cache notice their writes (migration 10; password_hash changes are deliberately not logged)
+CHANGE_LOGGED = {
+    "users": ("username", "role"),
+}
+
+#A snapshot reloads in full when more than this share of its rows changed since the last sync
+FULL_RELOAD_RATIO = 0.2
+
+#Change log entries kept after a full reload (older ones are pruned)
+CHANGE_LOG_KEEP = 100000
+
+#Largest id list sent in one delta fetch
+DELTA_BATCH = 900
+
+
+def _triggers(table: str, columns: tuple, stamp_rows: bool = True) -> Dict[str, str]:
+    """Triggers that log every insert, update and delete and (optionally) stamp row_version/updated_at."""
+    stamp = (f"UPDATE {table} SET row_version = last_insert_rowid(), updated_at = CURRENT_TIMESTAMP "
+             f"WHERE id = NEW.id;") if stamp_rows else ""
+    return {
+        f"{table}_log_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_log_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO change_log (table_name, row_id, op) VALUES ('{table}', NEW.id, 'insert');
+            {stamp}
+        END""",
+        f"{table}_log_update": f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_log_update AFTER UPDATE OF {", ".join(columns)} ON {table}
+        BEGIN
+            INSERT INTO change_log (table_name, row_id, op) VALUES ('{table}', NEW.id, 'update');
+            {stamp}
+        END""",
+        f"{table}_log_delete": f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_log_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO change_log (table_name, row_id, op) VALUES ('{table}', OLD.id, 'delete');
+        END""",
+    }
+
+
+#Trigger SQL keyed by trigger name (like ROLLUP_TRIGGERS in rollup_engine)
+CHANGE_TRIGGERS = {
+    name: sql for table, columns in CHANGE_TRACKED.items() for name, sql in _triggers(table, columns).items()
+}
+
+#Statements for the schema migration. Existing rows keep row_version 0 and a NULL updated_at
+#("unchanged since tracking began"); the log's version numbers are never reused (AUTOINCREMENT).
+CHANGE_LOG_MIGRATION = tuple(
+    [
+        statement
+        for table in CHANGE_TRACKED
+        for statement in (
+            f"ALTER TABLE {table} ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0",
+            f"ALTER TABLE {table} ADD COLUMN updated_at TIMESTAMP",
+        )
+    ]
+    + [
+        """
+        CREATE TABLE IF NOT EXISTS change_log (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_change_log_table_version ON change_log (table_name, version)",
+    ]
+    + list(CHANGE_TRIGGERS.values())
+)
+
+#Statements for migration 10: log writes to the CHANGE_LOGGED tables too
+LOGGED_TABLES_MIGRATION = tuple(
+    sql for table, columns in CHANGE_LOGGED.items() for sql in _triggers(table, columns, stamp_rows=False).values()
+)
+
+
+def change_log_head(db_manager) -> int:
+    """Newest change log version ever issued (survives pruning)."""
+    row = db_manager.fetch_one("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")
+    return row["seq"] if row else 0
+
+
+def _pruned(db_manager, since: int) -> bool:
+    """True if pruning removed entries newer than since (so the log can't say what changed)."""
+    oldest = db_manager.fetch_one(
+        "SELECT MIN(version) AS version FROM change_log WHERE version > ?", (since,)
+    )["version"]
+    return oldest is None or oldest > since + 1
+
+
+def changed_ids(db_manager, table: str, since: int, head: int) -> Optional[List[int]]:
+    """Ids of a table changed in (since, head], or None if pruning removed part of that range.
+
+    Readers refetch these ids: rows that come back were inserted or updated, the rest deleted.
+    """
+    if _pruned(db_manager, since):
+        return None
+    rows = db_manager.fetch_all(
+        "SELECT DISTINCT row_id FROM change_log WHERE table_name = ? AND version > ? AND version <= ?",
+        (table, since, head)
+    )
+    return [row["row_id"] for row in rows]
+
+
+def changed_tables(db_manager, since: int, head: int) -> Optional[Set[str]]:
+    """Tables with changes in (since, head], or None if pruning removed part of that range."""
+    if _pruned(db_manager, since):
+        return None
+    rows = db_manager.fetch_all(
+        "SELECT DISTINCT table_name FROM change_log WHERE version > ? AND version <= ?", (since, head)
+    )
+    return {row["table_name"] for row in rows}
+
+
+class _Snapshot:
+    """One table's shared frame and the change log version it reflects."""
+
+    def __init__(self, frame: pd.DataFrame, version: int):
+        self.frame = frame
+        self.version = version
+        self.lock = threading.Lock()
+
+
+class SnapshotManager:
+    """Keeps one in-memory DataFrame per table, brought up to date from the change log.
+
+    A sync reads the log head (one indexed lookup). If it moved, only the rows changed
+    since the snapshot's version are fetched and merged in; deletes drop rows. Large
+    deltas, and logs pruned past the snapshot, fall back to a full reload. Writes from
+    other processes are picked up too, since the log lives in the database.
+    """
+
+    def __init__(self, db_manager, presets: Dict[str, Dict[str, Any]]):
+        self._db = db_manager
+        self._presets = {table: preset for table, preset in presets.items() if table in CHANGE_TRACKED}
+        self._snapshots: Dict[str, _Snapshot] = {}
+        self._lock = threading.Lock()
+        self.last_sync_metrics: Dict[str, Dict[str, Any]] = {}
+
+    #Loading
+    def _fetch(self, table: str, where: str = "", params: tuple = ()) -> pd.DataFrame:
+        """Load rows in the preset layout, newest id first."""
+        preset = self._presets[table]
+        return self._db.fetch_frame(
+            f"{preset['sql']} {where} ORDER BY id DESC", params,
+            columns=preset["columns"],
+            categorical=preset["categorical"],
+            dates=preset["dates"]
+        )
+
+    def _apply(self, table: str, frame: pd.DataFrame, ids: List[int]) -> pd.DataFrame:
+        """Refetch the changed ids into the frame (ids no longer in the table were deleted).
+
+        Updated rows are overwritten in place; only deletes and inserts rebuild the frame.
+        """
+        preset = self._presets[table]
+        id_column = preset["columns"][0]
+        parts = [
+            self._fetch(table, f"WHERE id IN ({', '.join('?' * len(batch))})", tuple(batch))
+            for batch in (ids[i:i + DELTA_BATCH] for i in range(0, len(ids), DELTA_BATCH))
+        ]
+        changed = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+
+        #Give both sides the same categories so category dtypes survive the merge
+        for column in preset["categorical"]:
+            known = frame[column].cat.categories
+            extra = pd.Index(changed[column].dropna().astype(object).unique()).difference(known)
+            if len(extra):
+                known = known.append(extra)
+                frame[column] = frame[column].cat.add_categories(extra)
+            changed[column] = pd.Categorical(changed[column], categories=known)
+
+        #The frame is sorted by id descending, so its reversed id column can be binary searched
+        ascending = frame[id_column].to_numpy()[::-1]
+
+        def locate(targets: np.ndarray):
+            found = np.searchsorted(ascending, targets).clip(0, max(len(ascending) - 1, 0))
+            hit = ascending[found] == targets if len(ascending) else np.zeros(len(targets), dtype=bool)
+            return len(ascending) - 1 - found, hit
+
+        changed_ids = changed[id_column].to_numpy()
+        positions, present = locate(changed_ids)
+        same_dtypes = all(changed[column].dtype == frame[column].dtype for column in frame.columns)
+        if present.any() and same_dtypes:
+            for index, column in enumerate(frame.columns):
+                frame.iloc[positions[present], index] = changed[column].to_numpy()[present]
+            changed = changed[~present]
+            gone = np.setdiff1d(np.asarray(ids, dtype=changed_ids.dtype), changed_ids)
+        else:
+            #Mismatched dtypes (e.g. a NULL size): replace updated rows instead of writing them in
+            gone = np.asarray(ids, dtype=changed_ids.dtype)
+
+        drop, dropped = locate(gone)
+        if dropped.any():
+            keep = np.ones(len(frame), dtype=bool)
+            keep[drop[dropped]] = False
+            frame = frame[keep].reset_index(drop=True)
+        if len(changed):
+            frame = pd.concat([changed, frame], ignore_index=True)
+            order = frame[id_column].to_numpy()
+            if not (np.diff(order) < 0).all():
+                frame = frame.sort_values(id_column, ascending=False, kind="stable", ignore_index=True)
+        return frame
+
+    #Public API
+    def _snapshot(self, table: str) -> _Snapshot:
+        """The snapshot slot for a table (created empty on first use)."""
+        if table not in self._presets:
+            raise ValueError(f"No snapshot for table: {table}")
+        with self._lock:
+            snapshot = self._snapshots.get(table)
+            if snapshot is None:
+                snapshot = self._snapshots[table] = _Snapshot(None, 0)
+        return snapshot
+
+    def _refresh(self, table: str, snapshot: _Snapshot) -> Dict[str, Any]:
+        """Apply the delta (or reload) to a snapshot whose lock is held."""
+        start = time.perf_counter()
+        #Read the head before the rows: a change racing the load is applied again next sync
+        head = change_log_head(self._db)
+        metrics = {"mode": "current", "rows": 0}
+        if snapshot.frame is not None and head != snapshot.version:
+            ids = changed_ids(self._db, table, snapshot.version, head)
+            if ids is not None and len(ids) <= max(1, len(snapshot.frame)) * FULL_RELOAD_RATIO:
+                if ids:
+                    snapshot.frame = self._apply(table, snapshot.frame, ids)
+                snapshot.version = head
+                metrics = {"mode": "delta", "rows": len(ids)}
+        if snapshot.frame is None or head != snapshot.version:
+            snapshot.frame = self._fetch(table)
+            snapshot.version = head
+            metrics = {"mode": "full", "rows": len(snapshot.frame)}
+            self.prune()
+        metrics["version"] = head
+        metrics["seconds"] = time.perf_counter() - start
+        self.last_sync_metrics[table] = metrics
+        return metrics
+
+    def sync(self, table: str) -> Dict[str, Any]:
+        """Bring one table's snapshot up to date; returns how it was done (full, delta or current)."""
+        snapshot = self._snapshot(table)
+        with snapshot.lock:
+            return self._refresh(table, snapshot)
+
+    def frame(self, table: str) -> pd.DataFrame:
+        """A private copy of a table's current frame (synced first)."""
+        snapshot = self._snapshot(table)
+        with snapshot.lock:
+            self._refresh(table, snapshot)
+            #Copied under the lock because deltas update the shared frame in place
+            return snapshot.frame.copy()
+
+    def prune(self, keep: int = CHANGE_LOG_KEEP) -> int:
+        """Delete all but the newest `keep` log entries; returns how many were removed.
+
+        Snapshots older than what is left simply reload in full on their next sync.
+        """
+        head = change_log_head(self._db)
+        row = self._db.fetch_one("SELECT MIN(version) AS version FROM change_log")
+        if row["version"] is None or head - row["version"] < keep * 2:
+            return 0
+        return self._db.execute_query("DELETE FROM change_log WHERE version <= ?", (head - keep,)).rowcount
+
+    def clear(self) -> None:
+        """Drop every snapshot so the next sync reloads in full."""
+        with self._lock:
+            self._snapshots = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot sizes, versions and the last sync of each table."""
+        with self._lock:
+            snapshots = dict(self._snapshots)
+        return {
+            table: {
+                "rows": len(snapshot.frame) if snapshot.frame is not None else 0,
+                "version": snapshot.version,
+                "last_sync": self.last_sync_metrics.get(table, {}),
+            }
+            for table, snapshot in snapshots.items()
+        }
+
+
+#Process-wide registry so every session shares one set of snapshots per database file
+_managers: Dict[str, SnapshotManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_snapshot_manager(db_manager, presets: Dict[str, Dict[str, Any]]) -> SnapshotManager:
+    """Return the shared snapshot manager for a database.
+
+    It reads through a private manager on the same file: a session's manager may be
+    holding a transaction open, and the shared snapshots must only see committed rows.
+    """
+    key = str(Path(db_manager._db_path).resolve())
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = SnapshotManager(type(db_manager)(db_manager._db_path), presets)
+        return manager
@@ -0,0 +1,173 @@
+"""Statistics engine service class"""
+import sqlite3
+from typing import Any, Dict
+
+#Statuses that count as "open" on the dashboard
+OPEN_STATUSES = "('open', 'in progress')"
+
+#Every header counter in a single round trip (one scan per table)
+STATISTICS_SQL = f"""
+SELECT * FROM
+    (SELECT COUNT(*) AS incidents_total,
+            COALESCE(SUM(status IN {OPEN_STATUSES}), 0) AS incidents_open
+     FROM cyber_incidents),
+    (SELECT COUNT(*) AS datasets_total,
+            COALESCE(SUM(size), 0) AS datasets_total_size
+     FROM datasets_metadata),
+    (SELECT COUNT(*) AS tickets_total,
+            COALESCE(SUM(status IN {OPEN_STATUSES}), 0) AS tickets_open
+     FROM it_tickets),
+    (SELECT COUNT(*) AS users_total FROM users)
+"""
+
+COUNTER_NAMES = (
+    "incidents_total", "incidents_open",
+    "datasets_total", "datasets_total_size",
+    "tickets_total", "tickets_open",
+    "users_total",
+)
+
+#Triggers that keep stats_counters in step with every insert, update and delete
+COUNTER_TRIGGERS = {
+    "stats_incidents_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS stats_incidents_insert AFTER INSERT ON cyber_incidents
+        BEGIN
+            UPDATE stats_counters SET value = value + 1 WHERE name = 'incidents_total';
+            UPDATE stats_counters SET value = value + (NEW.status IN {OPEN_STATUSES})
+                WHERE name = 'incidents_open';
+        END""",
+    "stats_incidents_update": f"""
+        CREATE TRIGGER IF NOT EXISTS stats_incidents_update AFTER UPDATE OF status ON cyber_incidents
+        BEGIN
+            UPDATE stats_counters
+                SET value = value + (NEW.status IN {OPEN_STATUSES}) - (OLD.status IN {OPEN_STATUSES})
+                WHERE name = 'incidents_open';
+        END""",
+    "stats_incidents_delete": f"""
+        CREATE TRIGGER IF NOT EXISTS stats_incidents_delete AFTER DELETE ON cyber_incidents
+        BEGIN
+            UPDATE stats_counters SET value = value - 1 WHERE name = 'incidents_total';
+            UPDATE stats_counters SET value = value - (OLD.status IN {OPEN_STATUSES})
+                WHERE name = 'incidents_open';
+        END""",
+    "stats_datasets_insert": """
+        CREATE TRIGGER IF NOT EXISTS stats_datasets_insert AFTER INSERT ON datasets_metadata
+        BEGIN
+            UPDATE stats_counters SET value = value + 1 WHERE name = 'datasets_total';
+            UPDATE stats_counters SET value = value + COALESCE(NEW.size, 0)
+                WHERE name = 'datasets_total_size';
+        END""",
+    "stats_datasets_update": """
+        CREATE TRIGGER IF NOT EXISTS stats_datasets_update AFTER UPDATE OF size ON datasets_metadata
+        BEGIN
+            UPDATE stats_counters SET value = value + COALESCE(NEW.size, 0) - COALESCE(OLD.size, 0)
+                WHERE name = 'datasets_total_size';
+        END""",
+    "stats_datasets_delete": """
+        CREATE TRIGGER IF NOT EXISTS stats_datasets_delete AFTER DELETE ON datasets_metadata
+        BEGIN
+            UPDATE stats_counters SET value = value - 1 WHERE name = 'datasets_total';
+            UPDATE stats_counters SET value = value - COALESCE(OLD.size, 0)
+                WHERE name = 'datasets_total_size';
+        END""",
+    "stats_tickets_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS stats_tickets_insert AFTER INSERT ON it_tickets
+        BEGIN
+            UPDATE stats_counters SET value = value + 1 WHERE name = 'tickets_total';
+            UPDATE stats_counters SET value = value + (NEW.status IN {OPEN_STATUSES})
+                WHERE name = 'tickets_open';
+        END""",
+    "stats_tickets_update": f"""
+        CREATE TRIGGER IF NOT EXISTS stats_tickets_update AFTER UPDATE OF status ON it_tickets
+        BEGIN
+            UPDATE stats_counters
+                SET value = value + (NEW.status IN {OPEN_STATUSES}) - (OLD.status IN {OPEN_STATUSES})
+                WHERE name = 'tickets_open';
+        END""",
+    "stats_tickets_delete": f"""
+        CREATE TRIGGER IF NOT EXISTS stats_tickets_delete AFTER DELETE ON it_tickets
+        BEGIN
+            UPDATE stats_counters SET value = value - 1 WHERE name = 'tickets_total';
+            UPDATE stats_counters SET value = value - (OLD.status IN {OPEN_STATUSES})
+                WHERE name = 'tickets_open';
+        END""",
+    "stats_users_insert": """
+        CREATE TRIGGER IF NOT EXISTS stats_users_insert AFTER INSERT ON users
+        BEGIN
+            UPDATE stats_counters SET value = value + 1 WHERE name = 'users_total';
+        END""",
+    "stats_users_delete": """
+        CREATE TRIGGER IF NOT EXISTS stats_users_delete AFTER DELETE ON users
+        BEGIN
+            UPDATE stats_counters SET value = value - 1 WHERE name = 'users_total';
+        END""",
+}
+
+
+def nest_statistics(flat: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert flat counters into the nested structure the pages expect."""
+    return {
+        "incidents": {"total": flat["incidents_total"] or 0, "open": flat["incidents_open"] or 0},
+        "datasets": {"total": flat["datasets_total"] or 0, "total_size": flat["datasets_total_size"] or 0},
+        "tickets": {"total": flat["tickets_total"] or 0, "open": flat["tickets_open"] or 0},
+        "users": {"total": flat["users_total"] or 0},
+    }
+
+
+class StatisticsEngine:
+    """Computes dashboard counters in one query, optionally from trigger-maintained counters."""
+
+    def __init__(self, db_manager):
+        self._db = db_manager
+
+    def compute(self) -> Dict[str, int]:
+        """Aggregate every counter from the base tables in one round trip."""
+        row = self._db.fetch_one(STATISTICS_SQL)
+        return {name: row[name] or 0 for name in COUNTER_NAMES}
+
+    def read_counters(self) -> Dict[str, int]:
+        """Read the materialized counters (raises if they are not enabled)."""
+        rows = self._db.fetch_all("SELECT name, value FROM stats_counters")
+        counters = {row["name"]: row["value"] for row in rows}
+        missing = [name for name in COUNTER_NAMES if name not in counters]
+        if missing:
+            raise LookupError(f"Missing statistics counters: {', '.join(missing)}")
+        return counters
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get statistics for dashboard - O(1) when counters are enabled."""
+        try:
+            flat = self.read_counters()
+        except (sqlite3.OperationalError, LookupError):
+            flat = self.compute()
+        return nest_statistics(flat)
+
+    #Counter maintenance
+    def enable_counters(self) -> None:
+        """Create the stats_counters table and triggers, then backfill it."""
+        with self._db.transaction():
+            self._db.execute_query("""
+            CREATE TABLE IF NOT EXISTS stats_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            )
+            """)
+            for trigger_sql in COUNTER_TRIGGERS.values():
+                self._db.execute_query(trigger_sql)
+            self.rebuild_counters()
+
+    def rebuild_counters(self) -> None:
+        """Recompute the materialized counters from the base tables."""
+        with self._db.transaction():
+            flat = self.compute()
+            self._db.execute_many(
+                "INSERT OR REPLACE INTO stats_counters (name, value) VALUES (?, ?)",
+                list(flat.items())
+            )
+
+    def disable_counters(self) -> None:
+        """Drop the counter triggers and table."""
+        with self._db.transaction():
+            for trigger_name in COUNTER_TRIGGERS:
+                self._db.execute_query(f"DROP TRIGGER IF EXISTS {trigger_name}")
+            self._db.execute_query("DROP TABLE IF EXISTS stats_counters")
@@ -0,0 +1,199 @@
+"""Map-reduce summarization pipeline service class"""
+import hashlib
+import json
+import math
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from services.context_builder import ContextBuilder
+
+#Checkpoints live next to the default database so interrupted briefings can resume
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_CHECKPOINT_DIR = BASE_DIR / "DATA" / "summary_checkpoints"
+
+#Small tables are never cut thinner than this (about what fits one chunk unsummarized)
+MIN_ROWS_PER_CHUNK = 50
+
+#Bump when the prompts change so old checkpoints are not reused
+PIPELINE_VERSION = 1
+
+#Tables the pipeline can read, with the columns ContextBuilder expects
+SUMMARY_SOURCES = {
+    "incident": ("cyber_incidents", "SELECT id, title, severity, status, date FROM cyber_incidents ORDER BY id"),
+    "ticket": ("it_tickets", "SELECT id, title, priority, status, created_date FROM it_tickets ORDER BY id"),
+    "dataset": ("datasets_metadata", "SELECT id, name, source, category, size FROM datasets_metadata ORDER BY id"),
+}
+
+MAP_PROMPT = """Summarize this slice ({position}) of the {noun} table for an analyst briefing.
+
+{rows}
+
+In at most 120 words cover: dominant categories and counts, notable high-severity or open items,
+time patterns, and anything unusual. Use short bullet points."""
+
+REDUCE_PROMPT = """Merge these partial summaries of the {noun} table into one summary.
+
+{summaries}
+
+Keep every important count, risk and trend; drop repetition. At most 180 words, bullet points."""
+
+BRIEFING_PROMPT = """Write a cross-domain intelligence briefing from these whole-table summaries.
+
+{summaries}
+
+Cover the overall risk picture, links between domains (e.g. incidents driving tickets),
+and the top five actions. At most 300 words with clear sections."""
+
+
+class SummarizationPipeline:
+    """Summarizes whole tables in bounded time: chunk, summarize concurrently, merge hierarchically.
+
+    A table is cut into at most max_chunks slices. Each slice is packed to chunk_tokens
+    with ContextBuilder, so large tables mean denser slices rather than more calls. Partial
+    summaries are merged fan_in at a time until one remains. Each finished stage is saved
+    to a JSON checkpoint, so a rerun over unchanged data resumes where it stopped.
+    """
+
+    def __init__(self, db_manager, assistant, chunk_tokens: int = 1500, max_chunks: int = 24,
+                 fan_in: int = 6, batch_size: int = 2000, checkpoint_dir: Optional[Path] = DEFAULT_CHECKPOINT_DIR):
+        self._db = db_manager
+        self._assistant = assistant
+        self.chunk_tokens = chunk_tokens
+        self.max_chunks = max(1, int(max_chunks))
+        self.fan_in = max(2, int(fan_in))
+        self.batch_size = batch_size
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else None
+        self.last_run_metrics: Dict[str, Any] = {"calls": 0, "errors": []}
+
+    #Chunking
+    def _chunks(self, kind: str, rows_per_chunk: int) -> Iterator[str]:
+        """Stream a table and yield one packed text block per slice."""
+        sql = SUMMARY_SOURCES[kind][1]
+        builder = ContextBuilder(self.chunk_tokens)
+        slice_rows: List[Dict[str, Any]] = []
+        for row in self._db.iter_rows(sql, batch_size=self.batch_size):
+            slice_rows.append(row)
+            if len(slice_rows) >= rows_per_chunk:
+                yield builder.pack(kind, slice_rows)["text"]
+                slice_rows = []
+        if slice_rows:
+            yield builder.pack(kind, slice_rows)["text"]
+
+    #Checkpoints
+    def _fingerprint(self, kind: str, total: int, last_id: Optional[int], version: Optional[int]) -> str:
+        """Identify a run by the data it reads and the pipeline settings.
+        
+        version is the table's newest change log entry, so edits and deletes that keep the
+        row count and max id still start a fresh run.
+        """
+        payload = json.dumps([
+            PIPELINE_VERSION, kind, total, last_id, version, self.chunk_tokens,
+            self.max_chunks, self.fan_in, getattr(self._assistant, "model", "")
+        ])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _load_checkpoint(self, name: str) -> Dict[str, Any]:
+        """Read a saved run state, or start fresh if there is none."""
+        if not self.checkpoint_dir:
+            return {}
+        path = self.checkpoint_dir / f"{name}.json"
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_checkpoint(self, name: str, state: Dict[str, Any]) -> None:
+        """Write the run state atomically (temp file, then rename)."""
+        if not self.checkpoint_dir:
+            return
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        path = self.checkpoint_dir / f"{name}.json"
+        temp = path.with_suffix(".tmp")
+        temp.write_text(json.dumps(state))
+        temp.replace(path)
+
+    #Map and reduce stages
+    def _run_stage(self, prompts: Sequence[str], done: Dict[str, str]) -> Dict[str, str]:
+        """Run the prompts whose index is not already in done; returns the new summaries."""
+        pending = [(str(i), prompt) for i, prompt in enumerate(prompts) if str(i) not in done]
+        if not pending:
+            return {}
+        results = self._assistant.run_many([prompt for _, prompt in pending], temperature=0.0, use_cache=True)
+        self.last_run_metrics["calls"] += len(pending)
+        finished = {}
+        for (index, _), result in zip(pending, results):
+            if result["error"]:
+                self.last_run_metrics["errors"].append(result["error"])
+            else:
+                finished[index] = result["response"]
+        return finished
+
+    def summarize_table(self, kind: str) -> str:
+        """Produce one summary for a whole table."""
+        if kind not in SUMMARY_SOURCES:
+            raise ValueError(f"Unknown table kind: {kind}")
+        noun = f"{kind}s"
+        table = SUMMARY_SOURCES[kind][0]
+        row = self._db.fetch_one(
+            f"SELECT COUNT(*) AS total, MAX(id) AS last_id, "
+            f"(SELECT MAX(version) FROM change_log WHERE table_name = ?) AS version FROM {table}",
+            (table,)
+        )
+        total = row["total"]
+        if not total:
+            return f"No {noun} recorded."
+        rows_per_chunk = max(MIN_ROWS_PER_CHUNK, math.ceil(total / self.max_chunks))
+        chunk_count = math.ceil(total / rows_per_chunk)
+
+        name = f"{kind}-{self._fingerprint(kind, total, row['last_id'], row['version'])}"
+        state = self._load_checkpoint(name)
+        state.setdefault("levels", [{}])
+
+        #Map: one summary per slice (skipped entirely when the checkpoint already has them all)
+        if len(state["levels"][0]) < chunk_count:
+            map_prompts = [
+                MAP_PROMPT.format(position=f"part {i + 1} of {chunk_count}", noun=noun, rows=text)
+                for i, text in enumerate(self._chunks(kind, rows_per_chunk))
+            ]
+            state["levels"][0].update(self._run_stage(map_prompts, state["levels"][0]))
+            self._save_checkpoint(name, state)
+        summaries = [state["levels"][0][key] for key in sorted(state["levels"][0], key=int)]
+        if len(summaries) < chunk_count:
+            raise RuntimeError(
+                f"{chunk_count - len(summaries)} of {chunk_count} {noun} slices failed; rerun to resume"
+            )
+
+        #Reduce: merge fan_in summaries at a time until one is left
+        level = 1
+        while len(summaries) > 1:
+            groups = [summaries[i:i + self.fan_in] for i in range(0, len(summaries), self.fan_in)]
+            if len(state["levels"]) <= level:
+                state["levels"].append({})
+            reduce_prompts = [
+                REDUCE_PROMPT.format(noun=noun, summaries="\n\n".join(
+                    f"Part {j + 1}:\n{text}" for j, text in enumerate(group)
+                ))
+                for group in groups
+            ]
+            state["levels"][level].update(self._run_stage(reduce_prompts, state["levels"][level]))
+            self._save_checkpoint(name, state)
+            merged = state["levels"][level]
+            if len(merged) < len(groups):
+                raise RuntimeError(f"Merging {noun} summaries failed; rerun to resume")
+            summaries = [merged[key] for key in sorted(merged, key=int)]
+            level += 1
+        return summaries[0]
+
+    def briefing(self, kinds: Sequence[str] = ("incident", "ticket", "dataset")) -> Dict[str, Any]:
+        """Summarize each table, then merge them into one cross-domain briefing."""
+        start = time.perf_counter()
+        self.last_run_metrics = {"calls": 0, "errors": []}
+        tables = {kind: self.summarize_table(kind) for kind in kinds}
+        combined = "\n\n".join(f"{kind.title()}s:\n{text}" for kind, text in tables.items())
+        result = self._assistant.run_many([BRIEFING_PROMPT.format(summaries=combined)],
+                                          temperature=0.0, use_cache=True)[0]
+        self.last_run_metrics["calls"] += 1
+        self.last_run_metrics["seconds"] = time.perf_counter() - start
+        if result["error"]:
+            raise RuntimeError(result["error"])
+        return {"tables": tables, "briefing": result["response"]}
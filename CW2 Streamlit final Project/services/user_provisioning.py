@@ -0,0 +1,169 @@
+"""Bulk user provisioning service class"""
+import csv
+import json
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import bcrypt
+from services.auth_manager import Hasher, HashingPool, get_hashing_pool
+
+#Users written per transaction
+DEFAULT_BATCH_SIZE = 1000
+#Same rule as the registration form
+MIN_PASSWORD_LENGTH = 6
+#Length of a bcrypt hash string ($2b$12$ + 53 characters of salt and digest)
+BCRYPT_HASH_LENGTH = 60
+
+INPUT_FORMATS = {".csv": "csv", ".txt": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+def read_records(path: Union[str, Path], fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream user records from a CSV (with a header row) or JSON Lines file.
+
+    Records carry username, password or password_hash, and an optional role; the Week 8
+    users.txt layout (username,password_hash,role) reads as CSV.
+    """
+    path = Path(path)
+    fmt = fmt or INPUT_FORMATS.get(path.suffix.lower())
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"Unknown input format for {path.name}; use csv or jsonl")
+    with open(path, "r", encoding="utf-8", newline="") as handle:
+        if fmt == "csv":
+            for row in csv.DictReader(handle, skipinitialspace=True):
+                yield row
+        else:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _hash(password: str, rounds: int) -> str:
+    """bcrypt hash (utf-8 string) at an explicit cost."""
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+class UserProvisioner:
+    """Creates users in bulk: stream, dedupe, hash in parallel, insert in batches.
+
+    Existing usernames are read once up front; INSERT OR IGNORE covers accounts created
+    while the import runs. Values that are already bcrypt hashes are stored as given;
+    plain passwords are hashed on the HashingPool, and each batch is written while the
+    next one hashes. A lower `rounds` makes large imports faster: those hashes are
+    upgraded to the calibrated cost on the user's first login.
+    """
+
+    def __init__(self, db_manager, hashing_pool: Optional[HashingPool] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, rounds: Optional[int] = None,
+                 default_role: str = "user"):
+        self._db = db_manager
+        self._pool = hashing_pool or get_hashing_pool()
+        self.batch_size = max(1, int(batch_size))
+        self.rounds = rounds or Hasher.current_rounds()
+        self.default_role = default_role
+        self.last_run_metrics: Dict[str, Any] = {}
+
+    def _parse(self, record: Dict[str, Any]) -> Union[Tuple[str, str, str, bool], str]:
+        """(username, secret, role, prehashed) for a usable record, else the report counter to bump.
+
+        Values starting with $2 are taken as bcrypt hashes, so a malformed one is counted as
+        "malformed_hashes" rather than hashed as a password; other unusable records are "invalid".
+        """
+        username = str(record.get("username") or "").strip()
+        secret = str(record.get("password_hash") or record.get("password") or "").strip()
+        role = str(record.get("role") or "").strip() or self.default_role
+        if not username or not secret:
+            return "invalid"
+        if secret.startswith("$2"):
+            if Hasher.cost(secret) is None or len(secret) != BCRYPT_HASH_LENGTH:
+                return "malformed_hashes"
+            return username, secret, role, True
+        if len(secret) < MIN_PASSWORD_LENGTH:
+            return "invalid"
+        return username, secret, role, False
+
+    def _submit(self, password: str) -> Future:
+        """Queue a hash, waiting as long as it takes for a slot in the pool.
+
+        The pool's bounded queue keeps reading from running far ahead of hashing.
+        """
+        while True:
+            try:
+                return self._pool.submit(_hash, password, self.rounds)
+            except TimeoutError:
+                continue
+
+    def _write(self, batch: List[Tuple[str, Union[str, Future], str]], report: Dict[str, Any]) -> None:
+        """Wait for a batch's hashes and insert it in one transaction."""
+        start = time.perf_counter()
+        rows = [(username, secret if isinstance(secret, str) else secret.result(), role)
+                for username, secret, role in batch]
+        report["hash_wait_seconds"] += time.perf_counter() - start
+        result = self._db.execute_many(
+            "INSERT OR IGNORE INTO users (username, password_hash, role) VALUES (?, ?, ?)", rows
+        )
+        report["write_seconds"] += result["seconds"]
+        report["created"] += result["rows"]
+        report["skipped_existing"] += len(rows) - result["rows"]
+        report["batches"] += 1
+
+    def provision(self, records: Iterable[Dict[str, Any]],
+                  on_batch: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Create every new user in records; returns counts and throughput.
+
+        on_batch is called with the running report after each committed batch.
+        """
+        start = time.perf_counter()
+        report = {"read": 0, "created": 0, "skipped_existing": 0, "duplicates": 0, "invalid": 0,
+                  "malformed_hashes": 0, "prehashed": 0, "hashed": 0, "batches": 0, "rounds": self.rounds,
+                  "hash_wait_seconds": 0.0, "write_seconds": 0.0}
+        #One set-based read of the usernames already taken
+        existing = {row["username"] for row in self._db.fetch_all("SELECT username FROM users")}
+        seen = set()
+        batch: List[Tuple[str, Union[str, Future], str]] = []
+        previous: List[Tuple[str, Union[str, Future], str]] = []
+
+        def finish(rows: List[Tuple[str, Union[str, Future], str]]) -> None:
+            if rows:
+                self._write(rows, report)
+                if on_batch is not None:
+                    on_batch(self._metrics(report, start))
+
+        for record in records:
+            report["read"] += 1
+            parsed = self._parse(record)
+            if isinstance(parsed, str):
+                report[parsed] += 1
+                continue
+            username, secret, role, prehashed = parsed
+            if username in existing:
+                report["skipped_existing"] += 1
+                continue
+            if username in seen:
+                report["duplicates"] += 1
+                continue
+            seen.add(username)
+            if prehashed:
+                report["prehashed"] += 1
+            else:
+                queued = time.perf_counter()
+                secret = self._submit(secret)
+                report["hash_wait_seconds"] += time.perf_counter() - queued
+                report["hashed"] += 1
+            batch.append((username, secret, role))
+            if len(batch) >= self.batch_size:
+                #Write the previous batch while this one hashes
+                finish(previous)
+                previous, batch = batch, []
+        finish(previous)
+        finish(batch)
+
+        self.last_run_metrics = self._metrics(report, start)
+        return self.last_run_metrics
+
+    @staticmethod
+    def _metrics(report: Dict[str, Any], start: float) -> Dict[str, Any]:
+        """The report with elapsed time and users/sec."""
+        seconds = time.perf_counter() - start
+        return dict(report, seconds=seconds,
+                    users_per_sec=report["created"] / seconds if seconds > 0 else float(report["created"]))
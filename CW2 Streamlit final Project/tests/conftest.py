@@ -0,0 +1,52 @@
+"""Shared pytest fixtures (run from the project folder: python -m pytest -q)"""
+import sys
+from pathlib import Path
+import pytest
+
+#The services and models packages live in the project folder
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.insert(0, str(PROJECT_DIR))
+
+from services.database_manager import DatabaseManager
+
+
+class FakeClock:
+    """Manually advanced stand-in for time.time."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class FakeHashingPool:
+    """HashingPool stand-in that counts bcrypt checks instead of running them."""
+
+    def __init__(self, password: str = "correct-horse"):
+        self.password = password
+        self.checks = 0
+
+    def check_password(self, password: str, hashed: str) -> bool:
+        self.checks += 1
+        return password == self.password
+
+    def submit(self, func, *args, timeout=None):
+        raise TimeoutError("fake pool does not run jobs")
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A migrated database in a temp folder."""
+    manager = DatabaseManager(str(tmp_path / "test.db"))
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,135 @@
+"""Tests for AIAssistant.stream_message against a fake OpenAI stream"""
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from services.ai_assistant import AIAssistant
+
+
+def chunk(text):
+    """One streamed chat completion chunk carrying a text delta."""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeStream:
+    """Iterable stand-in for openai.Stream that records close() and can fail midway."""
+
+    def __init__(self, deltas, first_token_delay=0.0, fail_after=None):
+        self.deltas = deltas
+        self.first_token_delay = first_token_delay
+        self.fail_after = fail_after
+        self.closed = False
+
+    def __iter__(self):
+        time.sleep(self.first_token_delay)
+        #A keep-alive chunk with no choices comes first, like the real API sometimes sends
+        yield SimpleNamespace(choices=[])
+        for index, text in enumerate(self.deltas):
+            if self.fail_after is not None and index == self.fail_after:
+                raise ConnectionError("stream dropped")
+            yield chunk(text)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    """Just enough of openai.OpenAI for stream_message: chat.completions.create."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return self.stream
+
+
+@pytest.fixture
+def assistant():
+    assistant = AIAssistant()
+    assistant._history = [{"role": "user", "content": "earlier"}, {"role": "assistant", "content": "reply"}]
+    return assistant
+
+
+def test_completed_stream_records_ttft_and_commits_history(assistant):
+    stream = FakeStream(["Phishing ", "spike ", "detected."], first_token_delay=0.02)
+    assistant.client = FakeClient(stream)
+    text = "".join(assistant.stream_message("What happened?"))
+
+    assert text == "Phishing spike detected."
+    metrics = assistant.last_stream_metrics
+    assert metrics["completed"] and not metrics["cancelled"]
+    assert metrics["ttft"] is not None and metrics["ttft"] >= 0.02
+    assert metrics["seconds"] >= metrics["ttft"]
+    assert metrics["chunks"] == 3
+    assert stream.closed
+    assert assistant.client.requests[0]["stream"] is True
+    assert assistant._history[-2:] == [
+        {"role": "user", "content": "What happened?"},
+        {"role": "assistant", "content": "Phishing spike detected."},
+    ]
+
+
+def test_cancel_event_closes_the_response_without_committing(assistant):
+    stream = FakeStream(["one ", "two ", "three"])
+    assistant.client = FakeClient(stream)
+    cancel = threading.Event()
+    received = []
+    for delta in assistant.stream_message("Count", cancel_event=cancel):
+        received.append(delta)
+        cancel.set()
+
+    assert received == ["one "]
+    assert stream.closed
+    assert assistant.last_stream_metrics["cancelled"]
+    assert not assistant.last_stream_metrics["completed"]
+    assert len(assistant._history) == 2
+
+
+def test_closing_the_generator_early_does_not_commit(assistant):
+    stream = FakeStream(["one ", "two ", "three"])
+    assistant.client = FakeClient(stream)
+    deltas = assistant.stream_message("Count")
+    assert next(deltas) == "one "
+    deltas.close()
+
+    assert stream.closed
+    assert assistant.last_stream_metrics["cancelled"]
+    assert len(assistant._history) == 2
+
+
+def test_failed_stream_does_not_commit_partial_history(assistant):
+    stream = FakeStream(["partial ", "answer"], fail_after=1)
+    assistant.client = FakeClient(stream)
+    received = []
+    with pytest.raises(ConnectionError):
+        for delta in assistant.stream_message("Explain"):
+            received.append(delta)
+
+    assert received == ["partial "]
+    assert stream.closed
+    assert not assistant.last_stream_metrics["completed"]
+    assert assistant.last_stream_metrics["ttft"] is not None
+    assert len(assistant._history) == 2
+
+
+def test_send_message_stream_delegates_to_stream_message(assistant):
+    stream = FakeStream(["All ", "clear."])
+    assistant.client = FakeClient(stream)
+    text = "".join(assistant.send_message("Status?", context="3 open incidents", stream=True))
+
+    assert text == "All clear."
+    assert stream.closed
+    assert assistant.last_stream_metrics["completed"]
+    assert assistant.client.requests[0]["messages"][1] == {"role": "system", "content": "Context: 3 open incidents"}
+    assert assistant._history[-2:] == [
+        {"role": "user", "content": "Status?"},
+        {"role": "assistant", "content": "All clear."},
+    ]
+
+
+def test_stream_requires_a_client():
+    with pytest.raises(RuntimeError):
+        next(AIAssistant().stream_message("hello"))
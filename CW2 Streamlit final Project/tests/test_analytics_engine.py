@@ -0,0 +1,52 @@
+"""Tests for the Data Science analytics engine and its change log sync"""
+import sqlite3
+import pytest
+from services.analytics_engine import AnalyticsEngine, get_analytics_engine
+
+
+@pytest.fixture
+def engine(db):
+    db.bulk_insert_incidents([
+        (f"Incident {i}", "High" if i % 2 else "Low", "open", "2025-01-01") for i in range(50)
+    ])
+    return AnalyticsEngine(db)
+
+
+def test_unchanged_tables_reuse_the_bundle(engine):
+    first = engine.bundle()
+    assert engine.bundle() is first
+    assert engine.last_refresh_metrics["patched"] == engine.last_refresh_metrics["reloaded"] == 0
+
+
+def test_writes_from_another_process_are_patched_in(db, engine):
+    assert engine.bundle()["incidents"]["by_severity"] == {"High": 25, "Low": 25}
+    #A plain connection stands in for provision_users.py, setup_db.py or a second server
+    with sqlite3.connect(db._db_path) as conn:
+        conn.execute("INSERT INTO cyber_incidents (title, severity, status, date) "
+                     "VALUES ('New', 'Critical', 'open', '2025-02-01')")
+        conn.execute("UPDATE cyber_incidents SET status = 'closed' WHERE id = 2")
+        conn.execute("DELETE FROM cyber_incidents WHERE id = 3")
+    incidents = engine.bundle()["incidents"]
+    assert (engine.last_refresh_metrics["patched"], engine.last_refresh_metrics["reloaded"]) == (3, 0)
+    assert incidents["total"] == 50
+    #Ids start at 1, so odd ids are the Low rows
+    assert incidents["by_severity"] == {"Critical": 1, "High": 25, "Low": 24}
+    assert incidents["by_status"] == {"closed": 1, "open": 49}
+
+
+def test_large_deltas_reload_the_table(db, engine):
+    engine.bundle()
+    db.bulk_insert_incidents([(f"Bulk {i}", "Medium", "open", "2025-03-01") for i in range(40)])
+    incidents = engine.bundle()["incidents"]
+    assert engine.last_refresh_metrics["reloaded"] == 1
+    assert incidents["by_severity"]["Medium"] == 40
+
+
+def test_registry_reads_through_its_own_manager(db):
+    shared = get_analytics_engine(db)
+    assert shared._db is not db
+    with db.transaction():
+        db.execute_query("INSERT INTO it_tickets (title, priority, status, created_date) "
+                         "VALUES ('Uncommitted', 'High', 'open', '2025-01-01')")
+        assert shared.bundle()["tickets"]["total"] == 0
+    assert shared.bundle()["tickets"]["total"] == 1
@@ -0,0 +1,137 @@
+"""Tests for AsyncAIAssistant retries, timeouts and concurrency against a mocked OpenAI API"""
+import asyncio
+import json
+import threading
+import httpx
+import openai
+import pytest
+from services import async_ai_assistant
+from services.async_ai_assistant import AsyncAIAssistant
+from services.response_cache import ResponseCache
+
+
+def completion(content: str) -> httpx.Response:
+    """A minimal chat completion response body."""
+    return httpx.Response(200, json={
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "test-model",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+    })
+
+
+def make_assistant(monkeypatch, handler, **kwargs) -> AsyncAIAssistant:
+    """An assistant whose batches talk to `handler` through httpx.MockTransport."""
+    assistant = AsyncAIAssistant(api_key="test-key", model="test-model", **kwargs)
+
+    def new_client():
+        return openai.AsyncOpenAI(
+            api_key="test-key", base_url="http://mock.local/v1", max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        )
+
+    monkeypatch.setattr(assistant, "_new_client", new_client)
+    return assistant
+
+
+@pytest.fixture
+def backoffs(monkeypatch):
+    """Record each jittered backoff draw (low, high) and skip the wait itself."""
+    draws = []
+
+    def uniform(low, high):
+        draws.append((low, high))
+        return 0.0
+
+    monkeypatch.setattr(async_ai_assistant.random, "uniform", uniform)
+    return draws
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_retryable_statuses_are_retried_with_jitter(monkeypatch, backoffs, status):
+    responses = iter([httpx.Response(status, json={"error": {"message": "busy"}})] * 2 + [completion("done")])
+    assistant = make_assistant(monkeypatch, lambda request: next(responses),
+                               max_retries=3, backoff_base=0.5, backoff_max=8.0)
+    result = assistant.run_many(["Summarize"])[0]
+    assert result["response"] == "done"
+    assert result["attempts"] == 3
+    #Full jitter: a uniform draw from 0 up to the doubling ceiling
+    assert backoffs == [(0, 0.5), (0, 1.0)]
+    assert assistant.last_batch_metrics["retries"] == 2
+
+
+def test_retries_stop_at_max_retries(monkeypatch, backoffs):
+    assistant = make_assistant(monkeypatch, lambda request: httpx.Response(429, json={}),
+                               max_retries=2, backoff_base=1.0, backoff_max=1.5)
+    result = assistant.run_many(["Summarize"])[0]
+    assert result["response"] is None
+    assert result["attempts"] == 3
+    assert backoffs == [(0, 1.0), (0, 1.5)]
+
+
+def test_client_errors_are_not_retried(monkeypatch, backoffs):
+    assistant = make_assistant(monkeypatch, lambda request: httpx.Response(400, json={}), max_retries=3)
+    result = assistant.run_many(["Summarize"])[0]
+    assert result["attempts"] == 1
+    assert result["error"].startswith("Error:")
+    assert backoffs == []
+
+
+def test_slow_responses_hit_the_wait_for_timeout(monkeypatch, backoffs):
+    async def stall(request):
+        await asyncio.sleep(5)
+        return completion("too late")
+
+    assistant = make_assistant(monkeypatch, stall, timeout=0.05, max_retries=1)
+    result = assistant.run_many(["Summarize"])[0]
+    assert result["error"] == "Error: request timed out"
+    assert result["attempts"] == 2
+    assert result["seconds"] < 1
+
+
+def test_analyze_many_respects_the_concurrency_cap(monkeypatch):
+    in_flight = {"now": 0, "peak": 0}
+
+    async def slow(request):
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.02)
+        in_flight["now"] -= 1
+        return completion("ok")
+
+    assistant = make_assistant(monkeypatch, slow, max_concurrency=3)
+    results = assistant.run_many([f"prompt {i}" for i in range(12)])
+    assert [result["index"] for result in results] == list(range(12))
+    assert all(result["response"] == "ok" for result in results)
+    assert in_flight["peak"] == 3
+
+
+def test_real_cache_is_shared_by_concurrent_calls_off_the_event_loop(monkeypatch, db):
+    cache_threads, loop_threads = set(), set()
+
+    class ThreadRecordingCache(ResponseCache):
+        def get(self, key):
+            cache_threads.add(threading.get_ident())
+            return super().get(key)
+
+        def put(self, key, response, model):
+            cache_threads.add(threading.get_ident())
+            super().put(key, response, model)
+
+    def handler(request):
+        loop_threads.add(threading.get_ident())
+        return completion("re: " + json.loads(request.content)["messages"][-1]["content"])
+
+    #A SQLite-backed cache on the page's manager, as the IT Operations page builds it
+    assistant = make_assistant(monkeypatch, handler, cache=ThreadRecordingCache(db), max_concurrency=8)
+    prompts = [f"prompt {i}" for i in range(40)]
+    first = assistant.run_many(prompts, use_cache=True)
+    assert [result["response"] for result in first] == [f"re: prompt {i}" for i in range(40)]
+    assert not any(result["cached"] for result in first)
+
+    second = assistant.run_many(prompts, use_cache=True)
+    assert [result["response"] for result in second] == [result["response"] for result in first]
+    assert assistant.last_batch_metrics["cached"] == 40
+    assert not cache_threads & loop_threads
+    #The page's manager keeps working: the cache never touched its transaction state
+    assert db._tx_depth == 0
+    db.execute_query("INSERT INTO it_tickets (title, priority, status, created_date) "
+                     "VALUES ('After the batch', 'Low', 'open', '2025-01-01')")
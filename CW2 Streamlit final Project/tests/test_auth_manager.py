@@ -0,0 +1,165 @@
+"""Tests for bcrypt cost calibration, the hashing pool and the background rehash on login"""
+from types import SimpleNamespace
+import threading
+import bcrypt
+import pytest
+import services.auth_manager as auth_manager
+from services.auth_manager import (CALIBRATION_ROUNDS, MAX_ROUNDS, MIN_ROUNDS, AuthManager, HashingPool,
+                                   Hasher, get_hashing_pool)
+from services.login_throttle import LoginThrottle
+
+PASSWORD = "correct-horse"
+
+
+def fake_hash(cost):
+    """A well-formed bcrypt hash string with the given cost (not checkable)."""
+    return f"$2b${cost:02d}$" + "a" * 53
+
+
+@pytest.fixture(autouse=True)
+def fresh_rounds(monkeypatch):
+    #Each test calibrates (or pins) its own cost; the real one is restored afterwards
+    monkeypatch.setattr(Hasher, "rounds", None)
+
+
+def time_checks_at(monkeypatch, verify_ms):
+    """Make every calibration verify (at CALIBRATION_ROUNDS) appear to take verify_ms."""
+    ticks = iter(range(1000))
+    monkeypatch.setattr(auth_manager, "time", SimpleNamespace(perf_counter=lambda: next(ticks) * verify_ms / 1000))
+    monkeypatch.setattr(auth_manager, "bcrypt", SimpleNamespace(
+        gensalt=lambda rounds: b"", hashpw=lambda password, salt: b"", checkpw=lambda password, hashed: True))
+
+
+@pytest.mark.parametrize("verify_ms, expected", [
+    #Each extra round doubles the verify time
+    (250 / 2 ** (MIN_ROUNDS + 1 - CALIBRATION_ROUNDS), MIN_ROUNDS + 1),
+    (250 / 2 ** (MIN_ROUNDS + 2 - CALIBRATION_ROUNDS), MIN_ROUNDS + 2),
+    #A very fast host is capped, a slow one never drops below the floor
+    (0.01, MAX_ROUNDS),
+    (1000, MIN_ROUNDS),
+])
+def test_calibrate_picks_the_cost_closest_to_the_target(monkeypatch, verify_ms, expected):
+    time_checks_at(monkeypatch, verify_ms)
+    assert Hasher.calibrate(target_ms=250) == expected
+    assert Hasher.current_rounds() == expected
+
+
+def test_pinned_rounds_are_clamped_to_the_floor(monkeypatch):
+    monkeypatch.setattr(auth_manager, "FIXED_ROUNDS", str(MIN_ROUNDS + 1))
+    assert Hasher.calibrate() == MIN_ROUNDS + 1
+    monkeypatch.setattr(auth_manager, "FIXED_ROUNDS", "4")
+    assert Hasher.calibrate() == MIN_ROUNDS
+
+
+@pytest.mark.parametrize("target, stored, expected", [
+    #Below the floor: always upgraded
+    (MIN_ROUNDS, MIN_ROUNDS - 1, True),
+    (MIN_ROUNDS, MIN_ROUNDS, False),
+    #One round under the target is tolerated, two are not
+    (MIN_ROUNDS + 2, MIN_ROUNDS + 1, False),
+    (MIN_ROUNDS + 2, MIN_ROUNDS, True),
+    #Never downgraded, so a faster-calibrated host doesn't rewrite a slower one's hashes
+    (MIN_ROUNDS, MIN_ROUNDS + 2, False),
+])
+def test_needs_rehash_only_upgrades(monkeypatch, target, stored, expected):
+    monkeypatch.setattr(Hasher, "rounds", target)
+    assert Hasher.needs_rehash(fake_hash(stored)) is expected
+
+
+@pytest.mark.parametrize("hashed", ["", "plaintext", "$2b$xx$" + "a" * 53])
+def test_needs_rehash_ignores_non_bcrypt_values(monkeypatch, hashed):
+    monkeypatch.setattr(Hasher, "rounds", MIN_ROUNDS)
+    assert Hasher.needs_rehash(hashed) is False
+
+
+@pytest.fixture
+def pool():
+    pool = HashingPool(workers=1, max_pending=2)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_hashes_and_checks_on_worker_threads(pool, monkeypatch):
+    monkeypatch.setattr(Hasher, "rounds", 4)
+    hashed = pool.hash_password(PASSWORD)
+    assert Hasher.cost(hashed) == 4
+    assert pool.check_password(PASSWORD, hashed)
+    assert not pool.check_password("wrong", hashed)
+    assert pool.submit(threading.current_thread).result().name.startswith("bcrypt")
+    stats = pool.stats()
+    assert (stats["submitted"], stats["completed"], stats["queued"], stats["running"]) == (4, 4, 0, 0)
+    assert stats["avg_run_ms"] > 0
+
+
+def test_full_queue_times_out_instead_of_oversubscribing(pool):
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    running = pool.submit(block)
+    started.wait(5)
+    queued = pool.submit(lambda: "queued")
+    #One running and one queued fill max_pending=2
+    with pytest.raises(TimeoutError):
+        pool.submit(lambda: "rejected", timeout=0.05)
+    stats = pool.stats()
+    assert (stats["timeouts"], stats["running"], stats["queued"], stats["peak_queued"]) == (1, 1, 1, 1)
+    release.set()
+    running.result(5)
+    assert queued.result(5) == "queued"
+    #Slots come back once jobs finish
+    assert pool.submit(lambda: "after", timeout=0).result(5) == "after"
+
+
+def test_failed_jobs_free_their_slot(pool):
+    def fail():
+        raise RuntimeError("bcrypt failed")
+
+    for _ in range(pool.max_pending + 1):
+        with pytest.raises(RuntimeError):
+            pool.submit(fail, timeout=1).result(5)
+    assert pool.stats()["completed"] == pool.max_pending + 1
+
+
+def test_one_pool_per_process():
+    assert get_hashing_pool() is get_hashing_pool()
+
+
+@pytest.fixture
+def auth(db, clock, pool, monkeypatch):
+    monkeypatch.setattr(Hasher, "rounds", MIN_ROUNDS)
+    db.add_user("alice", bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(4)).decode("utf-8"))
+    return AuthManager(db, hashing_pool=pool, throttle=LoginThrottle(db, clock=clock))
+
+
+def test_weak_hash_is_upgraded_after_login(db, pool, auth):
+    old_hash = db.get_user("alice")["password_hash"]
+    assert auth.login_user("alice", PASSWORD) is not None
+    #Finish the background rehash
+    pool.shutdown()
+    new_hash = db.get_user("alice")["password_hash"]
+    assert new_hash != old_hash
+    assert Hasher.cost(new_hash) == MIN_ROUNDS
+    assert Hasher.check_password(PASSWORD, new_hash)
+    assert not Hasher.needs_rehash(new_hash)
+
+
+def test_rehash_keeps_a_password_changed_meanwhile(db, pool, auth):
+    user = db.get_user("alice")
+    changed = fake_hash(MIN_ROUNDS)
+    db.update_user_password(user["id"], changed)
+    auth._rehash(user["id"], PASSWORD, user["password_hash"])
+    pool.shutdown()
+    assert db.get_user("alice")["password_hash"] == changed
+
+
+def test_busy_pool_skips_the_rehash(db, auth, monkeypatch):
+    def full(*args, **kwargs):
+        raise TimeoutError("queue full")
+
+    monkeypatch.setattr(auth._pool, "submit", full)
+    user = db.get_user("alice")
+    auth._rehash(user["id"], PASSWORD, user["password_hash"])
+    assert db.get_user("alice")["password_hash"] == user["password_hash"]
@@ -0,0 +1,81 @@
+"""Tests for the shared SQLite connection pool"""
+import sqlite3
+import threading
+import time
+import pytest
+from services.connection_pool import ConnectionPool, get_pool
+from services.database_manager import DatabaseManager
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), size=2, checkout_timeout=0.05)
+    yield pool
+    pool.close_all()
+
+
+def test_connections_are_reused_with_wal_pragmas(pool):
+    for _ in range(5):
+        with pool.connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            first = conn
+    with pool.connection() as conn:
+        assert conn is first
+    stats = pool.stats()
+    assert (stats["checkouts"], stats["created"], stats["open"], stats["idle"]) == (6, 1, 1, 1)
+
+
+def test_checkout_waits_then_times_out_when_every_connection_is_busy(pool):
+    held = [pool.acquire(), pool.acquire()]
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    stats = pool.stats()
+    assert (stats["waits"], stats["timeouts"], stats["in_use"], stats["peak_in_use"]) == (1, 1, 2, 2)
+    for conn in held:
+        pool.release(conn)
+    assert pool.stats()["in_use"] == 0
+
+
+def test_released_connection_goes_to_a_waiting_thread(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), size=1, checkout_timeout=5)
+    held = pool.acquire()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    waiter.start()
+    while not pool.stats()["waits"]:
+        time.sleep(0.01)
+    pool.release(held)
+    waiter.join(timeout=5)
+    assert got == [held]
+    assert pool.stats()["created"] == 1
+    pool.release(got[0])
+    pool.close_all()
+
+
+def test_release_rolls_back_an_open_transaction(pool):
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE notes (body TEXT)")
+        conn.commit()
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO notes VALUES ('uncommitted')")
+        assert conn.in_transaction
+    with pool.connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0] == 0
+
+
+def test_closed_pool_refuses_checkouts_and_closes_busy_connections(pool):
+    busy = pool.acquire()
+    pool.close_all()
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    pool.release(busy)
+    with pytest.raises(sqlite3.ProgrammingError):
+        busy.execute("SELECT 1")
+    assert pool.stats()["open"] == 0
+
+
+def test_managers_share_one_pool_per_file(db, tmp_path):
+    other = DatabaseManager(str(db._db_path))
+    assert other._pool is db._pool is get_pool(db._db_path)
+    assert DatabaseManager(str(tmp_path / "second.db"))._pool is not db._pool
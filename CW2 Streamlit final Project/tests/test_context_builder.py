@@ -0,0 +1,78 @@
+"""Tests for the token-budgeted prompt context builder"""
+import pandas as pd
+import pytest
+from services.context_builder import ContextBuilder, estimate_tokens, fit_history, rows_from_frame
+
+
+def incident(title, severity="Low", status="open", date="2025-01-01"):
+    return {"title": title, "severity": severity, "status": status, "date": date}
+
+
+def test_estimate_tokens_counts_words_and_punctuation():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("VPN down!") == 3
+    #Long words cost one token per extra six characters
+    assert estimate_tokens("authentication") == 3
+
+
+def test_fit_history_keeps_the_newest_messages_in_budget():
+    history = [{"role": "user", "content": f"message {i} " + "word " * 20} for i in range(12)]
+    #Each message costs 23 tokens plus 4 for its framing
+    assert fit_history(history, budget_tokens=3 * 27) == history[-3:]
+    assert fit_history(history, budget_tokens=3 * 27 - 1) == history[-2:]
+    assert fit_history(history, budget_tokens=10_000) == history[-10:]
+    assert fit_history(history, budget_tokens=1) == []
+
+
+def test_rows_are_ranked_by_level_status_and_recency():
+    packed = ContextBuilder().pack("incident", [
+        incident("Old low"),
+        incident("Closed critical", "Critical", "closed"),
+        incident("Open critical", "Critical"),
+        incident("New low", date="2025-03-01"),
+    ])
+    titles = [line.split(". ", 1)[1].split(" |")[0] for line in packed["text"].splitlines()]
+    assert titles == ["Open critical", "Closed critical", "New low", "Old low"]
+    assert packed["text"].splitlines()[0] == "1. Open critical | Severity: Critical | Status: open | Date: 2025-01-01"
+    assert (packed["rows"], packed["included"], packed["merged"], packed["omitted"]) == (4, 4, 0, 0)
+
+
+def test_near_duplicates_are_merged_with_a_count():
+    rows = [incident(f"Failed login from host {i}", "High", date=f"2025-01-{i:02d}") for i in range(1, 6)]
+    packed = ContextBuilder().pack("incident", rows + [incident("Printer jam")])
+    lines = packed["text"].splitlines()
+    assert lines[0] == "1. Failed login from host 5 | Severity: High | Status: open | Date: 2025-01-05 (x5 similar)"
+    assert len(lines) == 2
+    assert (packed["included"], packed["merged"]) == (6, 4)
+
+
+def test_overflow_is_summarized_within_the_budget():
+    #Titles differ by letters, not digits, so none of them merge
+    words = [first + second for first in "abcdefghij" for second in "abcdefghijklmnopqrstuvwx"]
+    rows = [incident(f"Incident about {word} systems", "Medium", date=f"2025-02-{i % 28 + 1:02d}")
+            for i, word in enumerate(words)]
+    builder = ContextBuilder(budget_tokens=400)
+    packed = builder.pack("incident", rows)
+    assert packed["tokens"] <= builder.budget_tokens
+    assert packed["omitted"] > 0
+    assert packed["included"] + packed["omitted"] == 240
+    summary = packed["text"].splitlines()[-1]
+    assert summary.startswith(f"... plus {packed['omitted']} more incidents not listed")
+    assert f"severity Medium: {packed['omitted']}; status open: {packed['omitted']}" in summary
+    #The most recent rows were listed, so the omitted ones are the oldest
+    assert "dates 2025-02-01 to 2025-02-27" in summary
+
+
+def test_datasets_and_frames():
+    frame = pd.DataFrame({"Name": ["Logs", "Intel"], "Source": ["SIEM", "MITRE"],
+                          "Category": ["Logs", "Threat Intel"], "Size_MB": [10, 500]})
+    rows = rows_from_frame(frame, {"Name": "name", "Source": "source", "Category": "category", "Size_MB": "size"})
+    packed = ContextBuilder().pack("dataset", rows)
+    #Larger datasets rank first
+    assert packed["text"].splitlines() == [
+        "1. Intel | Source: MITRE | Category: Threat Intel | Size: 500MB",
+        "2. Logs | Source: SIEM | Category: Logs | Size: 10MB",
+    ]
+    assert ContextBuilder().format_row("ticket", {"title": "VPN", "created_date": pd.NaT}).endswith("Created: N/A")
+    with pytest.raises(ValueError):
+        ContextBuilder().pack("alert", rows)
@@ -0,0 +1,173 @@
+"""Tests for DatabaseManager transactions, batched writes, row streaming and DataFrame loads"""
+import sqlite3
+import pandas as pd
+import pytest
+
+INCIDENT = ("Phishing", "High", "open", "2025-01-01")
+
+
+def external_count(db, table="cyber_incidents"):
+    """Row count as another connection (or process) sees it."""
+    with sqlite3.connect(db._db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+@pytest.fixture
+def changes(db):
+    seen = []
+    listener = lambda table, op, row_id: seen.append((table, op, row_id))
+    db.add_change_listener(listener)
+    yield seen
+    db.remove_change_listener(listener)
+
+
+def test_transaction_commits_once_and_reports_rows(db, changes):
+    with db.transaction() as report:
+        first = db.insert_incident(*INCIDENT)
+        db.insert_ticket("VPN down", "High", "open", "2025-01-01")
+        db.update_incident(first, "Phishing wave", "Critical", "open", "2025-01-01")
+        #Nothing is visible outside, and listeners wait for the commit
+        assert external_count(db) == 0
+        assert changes == []
+    assert report["rows"] == 3
+    assert report["seconds"] > 0
+    assert external_count(db) == external_count(db, "it_tickets") == 1
+    assert changes == [("cyber_incidents", "insert", first), ("it_tickets", "insert", 1),
+                       ("cyber_incidents", "update", first)]
+    #The pinned connection went back to the pool
+    assert db._connection is None and db._tx_depth == 0
+
+
+def test_failed_transaction_rolls_back_everything(db, changes):
+    with pytest.raises(ValueError):
+        with db.transaction():
+            db.insert_incident(*INCIDENT)
+            with db.transaction():
+                db.insert_incident(*INCIDENT)
+            raise ValueError("abort")
+    assert external_count(db) == 0
+    assert db.get_all_incidents() == []
+    assert changes == []
+    assert db._connection is None and db._tx_depth == 0
+
+
+def test_nested_blocks_join_the_outer_transaction(db):
+    with db.transaction() as outer:
+        db.insert_incident(*INCIDENT)
+        with db.transaction() as inner:
+            assert inner is outer
+            db.insert_incident(*INCIDENT)
+        #Leaving the inner block does not commit
+        assert external_count(db) == 0
+    assert outer["rows"] == 2
+    assert external_count(db) == 2
+
+
+def test_transaction_keeps_a_connection_pinned_by_the_caller(db):
+    db.connect()
+    pinned = db._connection
+    with db.transaction():
+        db.insert_incident(*INCIDENT)
+    assert db._connection is pinned
+    db.close()
+
+
+def test_bulk_inserts_report_rows_and_notify_once(db, changes):
+    report = db.bulk_insert_incidents(INCIDENT for _ in range(500))
+    assert report["rows"] == 500
+    assert report["rows_per_sec"] > 0
+    assert external_count(db) == 500
+    assert changes == [("cyber_incidents", "bulk", None)]
+    assert db.bulk_insert_datasets([])["rows"] == 0
+
+
+def test_bulk_insert_inside_a_transaction_commits_with_it(db):
+    with pytest.raises(sqlite3.OperationalError):
+        with db.transaction():
+            db.bulk_insert_tickets([("Printer", "Low", "open", "2025-01-01")] * 10)
+            #A later failing statement rolls back the whole block, including the bulk insert
+            db.execute_query("INSERT INTO no_such_table VALUES (1)")
+    assert external_count(db, "it_tickets") == 0
+
+
+def test_cached_reads_see_the_commit(db):
+    assert db.get_all_incidents() == []
+    with db.transaction():
+        db.insert_incident(*INCIDENT)
+        #Reads inside the transaction bypass the shared cache
+        assert len(db.get_all_incidents()) == 1
+    assert len(db.get_all_incidents()) == 1
+
+
+def test_iter_rows_streams_dicts_tuples_and_records(db):
+    db.bulk_insert_incidents((f"Incident {i}", "Low", "open", "2025-01-01") for i in range(1, 1201))
+    sql = "SELECT id, title FROM cyber_incidents ORDER BY id"
+    dicts = list(db.iter_rows(sql, batch_size=500))
+    assert dicts == db.fetch_all(sql)
+    assert dicts[-1] == {"id": 1200, "title": "Incident 1200"}
+    tuples = list(db.iter_rows(sql, row_type="tuple"))
+    assert type(tuples[0]) is tuple
+    assert tuples == [(row["id"], row["title"]) for row in dicts]
+    records = list(db.iter_rows(sql + " LIMIT 2", row_type="record"))
+    assert (records[1].id, records[1].title) == (2, "Incident 2")
+    #Column names that are not identifiers still make a record type
+    record = next(db.iter_rows("SELECT COUNT(*), 1 AS id FROM cyber_incidents", row_type="record"))
+    assert tuple(record) == (1200, 1)
+
+
+def test_iter_rows_holds_the_connection_until_closed(db):
+    db.bulk_insert_incidents(INCIDENT for _ in range(10))
+    rows = db.iter_rows("SELECT * FROM cyber_incidents", batch_size=2)
+    next(rows)
+    assert db.pool_stats()["in_use"] == 1
+    rows.close()
+    assert db.pool_stats()["in_use"] == 0
+    assert list(db.iter_rows("SELECT * FROM cyber_incidents WHERE id < 0")) == []
+    assert db.pool_stats()["in_use"] == 0
+
+
+def test_iter_rows_rejects_unknown_row_types(db):
+    with pytest.raises(ValueError):
+        next(db.iter_rows("SELECT 1", row_type="frame"))
+
+
+def test_fetch_frame_types_the_named_columns(db):
+    db.bulk_insert_incidents([("Phishing", "High", "open", "2025-01-31"), ("Malware", "Low", "closed", "not a date")])
+    frame = db.fetch_frame("SELECT id, severity, occurred_on, date FROM cyber_incidents ORDER BY id",
+                           columns=["ID", "Severity", "Date", "Raw"], categorical=["Severity"], dates=["Raw"])
+    assert list(frame.columns) == ["ID", "Severity", "Date", "Raw"]
+    assert isinstance(frame["Severity"].dtype, pd.CategoricalDtype)
+    assert frame["Raw"].tolist()[0] == pd.Timestamp("2025-01-31")
+    #Unparseable dates become NaT rather than failing the load
+    assert pd.isna(frame["Raw"].iloc[1])
+    assert frame["Date"].iloc[1] is None
+    assert db.fetch_frame("SELECT id AS n FROM cyber_incidents WHERE id < 0").columns.tolist() == ["n"]
+
+
+def test_preset_frames_use_the_page_layouts(db):
+    db.bulk_insert_incidents([("Phishing", "High", "open", "2025-01-01"), ("Breach", "Critical", "open", "2025-01-02"),
+                              ("Odd", "Unknown", "open", "2025-01-03")])
+    frame = db.get_incidents_frame()
+    assert list(frame.columns) == ["ID", "Title", "Severity", "Status", "Date", "Severity_Level"]
+    assert frame["Date"].dtype == "datetime64[ns]"
+    assert dict(zip(frame["Title"], frame["Severity_Level"])) == {"Phishing": 3, "Breach": 4, "Odd": 0}
+    #Inside a transaction the table is read directly, uncommitted rows included
+    with db.transaction():
+        db.insert_ticket("VPN down", "High", "open", "2025-01-01")
+        tickets = db.get_tickets_frame()
+        assert tickets["Title"].tolist() == ["VPN down"]
+        assert isinstance(tickets["Priority"].dtype, pd.CategoricalDtype)
+    assert db.get_datasets_frame().empty
+
+
+def test_preview_frame_is_limited_ordered_and_copied(db):
+    db.bulk_insert_datasets([(f"Set {i}", "SIEM", "Logs", size) for i, size in enumerate([5, 50, 20, 40])])
+    preview = db.get_preview_frame("datasets_metadata", limit=2, order_by="size")
+    assert preview["Size_MB"].tolist() == [50, 40]
+    preview["Size_MB"] = 0
+    assert db.get_preview_frame("datasets_metadata", limit=2, order_by="size")["Size_MB"].tolist() == [50, 40]
+    assert db.get_preview_frame("datasets_metadata", limit=10)["ID"].tolist() == [4, 3, 2, 1]
+    with pytest.raises(ValueError):
+        db.get_preview_frame("users")
+    with pytest.raises(ValueError):
+        db.get_preview_frame("datasets_metadata", order_by="name")
@@ -0,0 +1,74 @@
+"""Tests for the __slots__ entities and the columnar entity collections"""
+import numpy as np
+import pytest
+from models.entity_collections import DatasetCollection, IncidentCollection, TicketCollection
+from models.security_incident import SecurityIncident
+
+ROWS = [
+    {"id": 1, "title": "Phishing", "severity": "High", "status": "open", "date": "2025-01-01"},
+    {"id": 2, "title": "Malware", "severity": "Low", "status": "closed", "date": "2025-01-02"},
+    {"id": 3, "title": "Breach", "severity": "High", "status": None, "date": "2025-01-03"},
+]
+
+
+@pytest.fixture
+def incidents():
+    return IncidentCollection.from_rows(ROWS)
+
+
+def test_entities_have_no_instance_dict():
+    incident = SecurityIncident(1, "Phishing", "High", "open", "2025-01-01")
+    assert not hasattr(incident, "__dict__")
+    with pytest.raises(AttributeError):
+        incident.extra = True
+
+
+def test_rows_round_trip_through_the_columns(incidents):
+    assert len(incidents) == 3
+    built = incidents[0]
+    assert isinstance(built, SecurityIncident)
+    assert (built.get_id(), built.get_title(), built.get_severity(), built.get_status()) == (1, "Phishing", "High", "open")
+    #Missing values come back empty, as the old per-row objects had them
+    assert incidents[-1].get_status() == ""
+    assert incidents[2].get_description() == ""
+    assert [incident.get_id() for incident in incidents] == [1, 2, 3]
+    with pytest.raises(IndexError):
+        incidents[3]
+
+
+def test_category_columns_share_labels(incidents):
+    assert incidents._columns["severity"].dtype == np.int32
+    assert incidents._categories["severity"] == ["High", "Low"]
+    assert incidents.column("severity").tolist() == ["High", "Low", "High"]
+    assert incidents.count_by("severity") == {"High": 2, "Low": 1}
+    assert incidents.count_by("id") == {1: 1, 2: 1, 3: 1}
+
+
+def test_filters_and_slices_return_smaller_collections(incidents):
+    high = incidents.filter(severity="High")
+    assert isinstance(high, IncidentCollection)
+    assert [incident.get_title() for incident in high] == ["Phishing", "Breach"]
+    assert len(incidents.filter(severity=["Low", "Critical"], status="closed")) == 1
+    #Labels that never occur match nothing rather than failing
+    assert len(incidents.filter(severity="Critical")) == 0
+    assert [incident.get_id() for incident in incidents.filter(incidents.column("id") > 1)] == [2, 3]
+    assert [incident.get_id() for incident in incidents[1:]] == [2, 3]
+    with pytest.raises(KeyError):
+        incidents.filter(owner="alice")
+
+
+def test_numeric_sums_and_empty_collections():
+    datasets = DatasetCollection.from_rows([
+        {"id": 1, "name": "Logs", "source": "SIEM", "category": "Logs", "size": 100},
+        {"id": 2, "name": "Intel", "source": "MITRE", "category": "Threat Intel", "size": None},
+    ])
+    assert datasets.sum("size") == 100
+    assert datasets[1].get_size() == 0
+    with pytest.raises(TypeError):
+        datasets.sum("category")
+
+    empty = TicketCollection.from_rows([])
+    assert len(empty) == 0 and not empty
+    assert list(empty) == []
+    assert empty.column("priority").tolist() == []
+    assert empty.count_by("priority") == {}
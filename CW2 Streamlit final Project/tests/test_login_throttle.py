@@ -0,0 +1,161 @@
+"""Tests for the login throttle and its use in AuthManager.login_user"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from conftest import FakeHashingPool
+from services.auth_manager import MIN_ROUNDS, AuthManager, Hasher
+from services.login_throttle import LoginThrottle, get_login_throttle, resolve_source
+
+PASSWORD = "correct-horse"
+#Any well-formed bcrypt hash will do: the fake pool never checks it
+STORED_HASH = f"$2b${MIN_ROUNDS:02d}$" + "a" * 53
+
+
+@pytest.fixture
+def throttle(db, clock):
+    return LoginThrottle(db, user_limit=3, source_limit=5, window_seconds=60, clock=clock)
+
+
+@pytest.fixture
+def auth(db, throttle, monkeypatch):
+    #Match the stored cost so a good login doesn't queue a rehash
+    monkeypatch.setattr(Hasher, "rounds", MIN_ROUNDS)
+    db.add_user("alice", STORED_HASH)
+    db.add_user("bob", STORED_HASH)
+    pool = FakeHashingPool(PASSWORD)
+    return AuthManager(db, hashing_pool=pool, throttle=throttle), pool
+
+
+def test_burst_beyond_limit_is_rejected_without_bcrypt(auth, throttle):
+    manager, pool = auth
+    results = [manager.login_user("alice", "guess", "10.0.0.1") for _ in range(50)]
+    assert all(user is None for user in results)
+    assert pool.checks == 3
+    assert throttle.stats()["blocked"] == 47
+    #Even the right password is refused while locked
+    assert manager.login_user("alice", PASSWORD, "10.0.0.1") is None
+    assert pool.checks == 3
+
+
+def test_concurrent_burst_cannot_slip_past_the_check(auth):
+    manager, pool = auth
+    with ThreadPoolExecutor(max_workers=16) as sessions:
+        list(sessions.map(lambda _: manager.login_user("alice", "guess"), range(64)))
+    assert pool.checks == 3
+
+
+def test_source_limit_spans_usernames(auth, throttle):
+    manager, pool = auth
+    for i in range(5):
+        manager.login_user(f"ghost{i}", "guess", "10.0.0.9")
+    assert throttle.retry_after("someone-else", "10.0.0.9") > 0
+    assert manager.login_user("bob", PASSWORD, "10.0.0.9") is None
+    assert manager.login_user("bob", PASSWORD, "10.0.0.10").get_username() == "bob"
+    assert pool.checks == 1
+
+
+def test_window_slides_and_old_failures_expire(throttle, clock):
+    throttle.record_failure("alice")
+    clock.advance(30)
+    throttle.record_failure("alice")
+    throttle.record_failure("alice")
+    assert throttle.retry_after("alice") == pytest.approx(30)
+    #The first failure leaves the window; the two later ones still count
+    clock.advance(30)
+    assert throttle.retry_after("alice") == 0
+    throttle.record_failure("alice")
+    assert throttle.retry_after("alice") == pytest.approx(30)
+    clock.advance(61)
+    assert throttle.begin("alice") is not None
+
+
+def test_success_resets_the_user_counter_but_not_the_source(auth, throttle):
+    manager, pool = auth
+    for _ in range(2):
+        manager.login_user("alice", "guess", "10.0.0.1")
+    assert manager.login_user("alice", PASSWORD, "10.0.0.1") is not None
+    for _ in range(2):
+        manager.login_user("alice", "guess", "10.0.0.1")
+    #Two fresh failures are under the user limit of 3 again
+    assert throttle.retry_after("alice") == 0
+    #The source kept its four failures; the success gave its own slot back
+    assert manager.login_user("bob", "guess", "10.0.0.1") is None
+    assert throttle.retry_after("carol", "10.0.0.1") > 0
+
+
+def test_errors_release_the_reserved_slot(auth, throttle, monkeypatch):
+    manager, pool = auth
+
+    def queue_full(password, hashed):
+        raise TimeoutError("queue full")
+
+    monkeypatch.setattr(pool, "check_password", queue_full)
+    for _ in range(10):
+        assert manager.login_user("alice", PASSWORD) is None
+    assert throttle.retry_after("alice") == 0
+    assert throttle.stats()["failures"] == 0
+
+
+def test_flush_persists_failures_and_resets(db, throttle, clock):
+    throttle.record_failure("alice", "10.0.0.1")
+    throttle.record_failure("bob")
+    assert db.fetch_one("SELECT COUNT(*) AS n FROM login_failures")["n"] == 0
+    assert throttle.flush() == 3
+    rows = db.fetch_all("SELECT key, failed_at FROM login_failures ORDER BY key")
+    assert [row["key"] for row in rows] == ["source:10.0.0.1", "user:alice", "user:bob"]
+    assert all(row["failed_at"] == clock.now for row in rows)
+
+    throttle.record_success("alice")
+    keys = {row["key"] for row in db.fetch_all("SELECT key FROM login_failures")}
+    assert keys == {"source:10.0.0.1", "user:bob"}
+
+
+def test_lockout_is_written_at_once(db, throttle, clock):
+    for _ in range(2):
+        throttle.record_failure("alice")
+    assert db.fetch_one("SELECT COUNT(*) AS n FROM login_failures")["n"] == 0
+    #The failure that locks the key flushes, so a restart or another process sees the lockout
+    throttle.record_failure("alice")
+    assert db.fetch_one("SELECT COUNT(*) AS n FROM login_failures")["n"] == 3
+    assert LoginThrottle(db, user_limit=3, window_seconds=60, clock=clock).retry_after("alice") > 0
+
+
+def test_lone_failure_is_flushed_by_the_timer(db, clock):
+    throttle = LoginThrottle(db, user_limit=3, flush_interval=0.05, clock=clock)
+    throttle.record_failure("alice")
+    deadline = time.monotonic() + 5
+    while throttle.stats()["pending"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert db.fetch_one("SELECT COUNT(*) AS n FROM login_failures")["n"] == 1
+    assert throttle.stats()["flushes"] == 1
+
+
+def test_persisted_window_is_reloaded(db, throttle, clock):
+    for _ in range(3):
+        throttle.record_failure("alice")
+    throttle.flush()
+    reloaded = LoginThrottle(db, user_limit=3, window_seconds=60, clock=clock)
+    assert reloaded.retry_after("alice") == pytest.approx(60)
+    clock.advance(60)
+    assert LoginThrottle(db, user_limit=3, window_seconds=60, clock=clock).retry_after("alice") == 0
+
+
+def test_forwarded_headers_only_count_from_a_trusted_proxy():
+    spoofed = {"X-Forwarded-For": "1.2.3.4", "X-Real-Ip": "5.6.7.8"}
+    assert resolve_source("203.0.113.7", spoofed, trusted_proxies=()) == "203.0.113.7"
+    chain = {"X-Forwarded-For": "1.2.3.4, 198.51.100.2, 10.0.0.3"}
+    #Client-supplied hops on the left are ignored; trusted proxy hops on the right are skipped
+    assert resolve_source("10.0.0.2", chain, trusted_proxies={"10.0.0.2", "10.0.0.3"}) == "198.51.100.2"
+    assert resolve_source("10.0.0.2", {"X-Real-Ip": "198.51.100.2"}, trusted_proxies={"10.0.0.2"}) == "198.51.100.2"
+    assert resolve_source(None, spoofed, trusted_proxies=()) is None
+
+
+def test_registry_writes_through_its_own_manager(db):
+    shared = get_login_throttle(db)
+    assert shared._db is not db
+    #A session pinning a connection (as transaction() does) must not carry the throttle's writes
+    db.connect()
+    shared.record_failure("alice")
+    shared.flush()
+    assert db._connection.in_transaction is False
+    assert db.fetch_one("SELECT COUNT(*) AS n FROM login_failures")["n"] == 1
@@ -0,0 +1,12 @@
+"""Tests for the versioned schema migrations run by DatabaseManager"""
+from services.database_manager import DatabaseManager
+from services.migrations import MIGRATIONS, MigrationRunner
+
+
+def test_constructor_reports_the_migrations_it_applied(tmp_path):
+    path = str(tmp_path / "fresh.db")
+    first = DatabaseManager(path)
+    assert first.applied_migrations == [version for version, _, _ in MIGRATIONS]
+    #Later managers on the same file find the schema current
+    assert DatabaseManager(path).applied_migrations == []
+    assert MigrationRunner(first).pending() == []
@@ -0,0 +1,68 @@
+"""Tests for the shared query result cache and its invalidation"""
+import sqlite3
+from services.query_cache import ALL_TABLES, QueryCache
+
+
+def cache_put(cache, key, value, tables):
+    return cache.put(key, value, tables, cache.generation(tables))
+
+
+def test_hits_misses_and_lru_bound():
+    cache = QueryCache(max_entries=2)
+    assert cache.get("a") == (False, None)
+    cache_put(cache, "a", 1, ["t1"])
+    cache_put(cache, "b", 2, ["t1"])
+    assert cache.get("a") == (True, 1)
+    #"b" is now the least recently used entry
+    cache_put(cache, "c", 3, ["t2"])
+    assert cache.get("b") == (False, None)
+    assert cache.get("c") == (True, 3)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (2, 2, 1, 2)
+
+
+def test_invalidation_is_per_table():
+    cache = QueryCache()
+    cache_put(cache, "incidents", 1, ["cyber_incidents"])
+    cache_put(cache, "tickets", 2, ["it_tickets"])
+    cache_put(cache, "both", 3, ["cyber_incidents", "it_tickets"])
+    cache.invalidate(["it_tickets"])
+    assert [cache.get(key)[0] for key in ("incidents", "tickets", "both")] == [True, False, False]
+    cache.invalidate([ALL_TABLES])
+    assert cache.get("incidents") == (False, None)
+
+
+def test_results_read_before_a_write_are_not_stored():
+    cache = QueryCache()
+    generation = cache.generation(["users"])
+    cache.invalidate(["users"])
+    assert cache.put("users", [], ["users"], generation) is False
+    assert cache.get("users") == (False, None)
+
+
+def test_writes_from_other_processes_invalidate_their_tables(db):
+    db.bulk_insert_incidents([("Incident", "Low", "open", "2025-01-01")])
+    db.add_user("alice", "hash")
+    assert len(db.get_all_incidents()) == 1
+    assert len(db.get_all_tickets()) == 0
+    assert [user["username"] for user in db.get_all_users()] == ["alice"]
+    before = db.cache_stats()["hits"]
+    db.get_all_tickets()
+    assert db.cache_stats()["hits"] == before + 1
+
+    #A plain connection stands in for provision_users.py or a second server process
+    with sqlite3.connect(db._db_path) as conn:
+        conn.execute("INSERT INTO cyber_incidents (title, severity, status, date) "
+                     "VALUES ('External', 'High', 'open', '2025-02-01')")
+        conn.execute("INSERT INTO users (username, password_hash, role) VALUES ('bob', 'hash', 'user')")
+    assert len(db.get_all_incidents()) == 2
+    assert {user["username"] for user in db.get_all_users()} == {"alice", "bob"}
+    assert db.get_statistics()["users"]["total"] == 2
+    #Tables nobody wrote keep their cached results
+    before = db.cache_stats()["hits"]
+    db.get_all_tickets()
+    assert db.cache_stats()["hits"] == before + 1
+
+    with sqlite3.connect(db._db_path) as conn:
+        conn.execute("UPDATE users SET role = 'admin' WHERE username = 'bob'")
+    assert {user["username"]: user["role"] for user in db.get_all_users()}["bob"] == "admin"
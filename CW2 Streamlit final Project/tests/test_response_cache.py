@@ -0,0 +1,69 @@
+"""Tests for the SQLite-backed AI response cache"""
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from services.response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(db, clock):
+    return ResponseCache(db, ttl_seconds=60, max_entries=3, clock=clock)
+
+
+def test_hits_and_misses(cache):
+    assert cache.get("k1") is None
+    cache.put("k1", "answer", "model-a")
+    assert cache.get("k1") == "answer"
+    assert cache.get("k1") == "answer"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["stores"], stats["entries"]) == (2, 1, 1, 1)
+
+
+def test_entries_expire_after_the_ttl(db, cache, clock):
+    cache.put("k1", "answer", "model-a")
+    clock.advance(59)
+    assert cache.get("k1") == "answer"
+    clock.advance(1)
+    assert cache.get("k1") is None
+    #The expired row is deleted by the lookup that found it
+    assert cache.stats()["entries"] == 0
+    cache.put("k2", "answer", "model-a")
+    clock.advance(61)
+    assert cache.purge_expired() == 1
+
+
+def test_least_recently_used_entries_are_evicted(cache, clock):
+    for key in ("k1", "k2", "k3"):
+        cache.put(key, key.upper(), "model-a")
+        clock.advance(1)
+    #Reading k1 makes k2 the least recently used
+    assert cache.get("k1") == "K1"
+    clock.advance(1)
+    cache.put("k4", "K4", "model-a")
+    assert cache.stats()["entries"] == 3
+    assert [cache.get(key) for key in ("k1", "k2", "k3", "k4")] == ["K1", None, "K3", "K4"]
+
+
+def test_key_depends_on_model_system_prompt_and_temperature():
+    base = ResponseCache.make_key("model-a", "You are an analyst.", 0.3, "Summarize incidents")
+    assert ResponseCache.make_key("model-b", "You are an analyst.", 0.3, "Summarize incidents") != base
+    assert ResponseCache.make_key("model-a", "You are a poet.", 0.3, "Summarize incidents") != base
+    assert ResponseCache.make_key("model-a", "You are an analyst.", 0.7, "Summarize incidents") != base
+    assert ResponseCache.make_key("model-a", "You are an analyst.", 0.3, "Summarize tickets") != base
+    #Whitespace that doesn't change the question doesn't change the key
+    assert ResponseCache.make_key("model-a", "You are  an analyst. ", 0.3, "Summarize   incidents") == base
+
+
+def test_concurrent_calls_leave_the_callers_manager_alone(db):
+    cache = ResponseCache(db, max_entries=100)
+
+    def use(i):
+        cache.put(f"k{i % 80}", f"answer {i}", "model-a")
+        return cache.get(f"k{i % 80}")
+
+    with ThreadPoolExecutor(max_workers=16) as workers:
+        results = list(workers.map(use, range(200)))
+    assert all(result is not None for result in results)
+    assert cache.stats()["entries"] == 80
+    #The page's manager was never used for the cache, so its transaction state is untouched
+    assert db._tx_depth == 0 and db._connection is None
+    db.execute_query("INSERT INTO cyber_incidents (title, severity, status, date) VALUES ('x', 'Low', 'open', '2025-01-01')")
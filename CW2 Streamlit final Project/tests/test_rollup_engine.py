@@ -0,0 +1,87 @@
+"""Tests for the trigger-maintained trend rollups"""
+import sqlite3
+import pytest
+from services.rollup_engine import RollupEngine
+
+
+def counts(rows, by=None):
+    return {(row["bucket"], row[by]) if by else row["bucket"]: row["count"] for row in rows}
+
+
+def source_counts(db, expression, where=""):
+    """The same series counted straight from cyber_incidents."""
+    rows = db.fetch_all(f"SELECT {expression} AS bucket, COUNT(*) AS n FROM cyber_incidents "
+                        f"WHERE bucket IS NOT NULL {where} GROUP BY 1")
+    return {row["bucket"]: row["n"] for row in rows}
+
+
+@pytest.fixture
+def seeded(db):
+    db.bulk_insert_incidents([
+        ("Phishing", "High", "open", "2025-01-06"),
+        ("Malware", "Low", "closed", "2025-01-12"),
+        ("Breach", "High", "open", "2025-01-13"),
+        ("Scan", "Medium", "open", "2025-02-03"),
+        ("Undated", "Low", "open", "soon"),
+    ])
+    return db
+
+
+def test_buckets_per_grain(seeded):
+    assert counts(seeded.get_incident_trend("month")) == {"2025-01-01": 3, "2025-02-01": 1}
+    #Weeks start on Monday: the 6th and the 12th (a Sunday) share a bucket
+    assert counts(seeded.get_incident_trend("week")) == {"2025-01-06": 2, "2025-01-13": 1, "2025-02-03": 1}
+    assert len(seeded.get_incident_trend("day")) == 4
+    assert counts(seeded.get_incident_trend("week")) == source_counts(seeded, "date(date, 'weekday 0', '-6 days')")
+
+
+def test_breakdowns_filters_and_ranges(seeded):
+    assert counts(seeded.get_incident_trend("month", by="severity"), "severity") == {
+        ("2025-01-01", "High"): 2, ("2025-01-01", "Low"): 1, ("2025-02-01", "Medium"): 1,
+    }
+    assert counts(seeded.get_incident_trend("month", status=["open"])) == {"2025-01-01": 2, "2025-02-01": 1}
+    assert counts(seeded.get_incident_trend("day", start="2025-01-12", end="2025-01-13")) == {
+        "2025-01-12": 1, "2025-01-13": 1,
+    }
+    with pytest.raises(ValueError):
+        seeded.get_incident_trend("year")
+    with pytest.raises(ValueError):
+        seeded.get_incident_trend(by="priority")
+    with pytest.raises(ValueError):
+        RollupEngine(seeded).trend("ticket_rollups", filters={"severity": ["High"]})
+
+
+def test_updates_and_deletes_move_counts_between_buckets(seeded):
+    seeded.update_incident(1, "Phishing", "Critical", "closed", "2025-02-10")
+    seeded.delete_incident(2)
+    assert counts(seeded.get_incident_trend("month")) == {"2025-01-01": 1, "2025-02-01": 2}
+    assert counts(seeded.get_incident_trend("month", by="status"), "status") == {
+        ("2025-01-01", "open"): 1, ("2025-02-01", "closed"): 1, ("2025-02-01", "open"): 1,
+    }
+    #Emptied buckets are left out rather than reported as zero
+    assert "2025-01-06" not in counts(seeded.get_incident_trend("week"))
+    assert counts(seeded.get_incident_trend("day")) == source_counts(seeded, "date(date)")
+
+
+def test_writes_from_another_process_are_counted(seeded):
+    with sqlite3.connect(seeded._db_path) as conn:
+        conn.execute("INSERT INTO it_tickets (title, priority, status, created_date) "
+                     "VALUES ('VPN down', 'High', 'open', '2025-03-04')")
+        conn.execute("UPDATE cyber_incidents SET date = '2025-03-01' WHERE id = 4")
+    assert counts(seeded.get_ticket_trend("month", by="priority"), "priority") == {("2025-03-01", "High"): 1}
+    assert counts(seeded.get_incident_trend("month")) == {"2025-01-01": 3, "2025-03-01": 1}
+
+
+def test_deferred_load_and_rebuild_match_the_triggers(seeded):
+    engine = RollupEngine(seeded)
+    expected = counts(seeded.get_incident_trend("week", by="severity"), "severity")
+    with engine.deferred():
+        seeded.bulk_insert_incidents([("Bulk", "Low", "open", "2025-01-07")] * 50)
+        #Triggers are off until the block ends
+        assert sum(row["count"] for row in engine.trend("incident_rollups", "week")) == 4
+    expected[("2025-01-06", "Low")] += 50
+    assert counts(seeded.get_incident_trend("week", by="severity"), "severity") == expected
+
+    seeded.execute_query("DELETE FROM incident_rollups")
+    seeded.rebuild_rollups()
+    assert counts(seeded.get_incident_trend("week", by="severity"), "severity") == expected
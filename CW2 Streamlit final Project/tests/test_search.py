@@ -0,0 +1,69 @@
+"""Tests for the FTS5 keyword search and its sync triggers"""
+import sqlite3
+import pytest
+
+
+@pytest.fixture
+def seeded(db):
+    db.insert_incident("Phishing email targeting finance", "High", "open", "2025-01-01")
+    db.insert_incident("Malware on a finance laptop", "Low", "closed", "2025-01-02")
+    db.insert_ticket("Phishing report button missing", "Low", "open", "2025-01-03")
+    db.insert_dataset("Phishing URL feed", "OpenPhish", "Threat Intel", 20)
+    db.add_user("phil", "$2b$12$" + "a" * 53, "analyst")
+    return db
+
+
+def found(results):
+    return [(result["domain"], result["id"]) for result in results]
+
+
+def test_prefix_terms_match_across_domains(seeded):
+    results = seeded.search("phish")
+    assert sorted(found(results)) == [("dataset", 1), ("incident", 1), ("ticket", 1)]
+    #Every word must match
+    assert found(seeded.search("phishing finance")) == [("incident", 1)]
+    assert found(seeded.search("phi", domains=["user"])) == [("user", 1)]
+
+
+def test_results_are_ranked_and_highlighted(seeded):
+    results = seeded.search("finance")
+    assert [result["id"] for result in results] == [1, 2]
+    assert results[0]["score"] >= results[1]["score"]
+    assert results[0]["highlight"] == "Phishing email targeting **finance**"
+    #Matches in the detail column come back as a snippet
+    detail = seeded.search("threat intel")[0]
+    assert (detail["domain"], detail["title"]) == ("dataset", "Phishing URL feed")
+    assert "**Threat** **Intel**" in detail["snippet"]
+
+
+def test_domains_limit_and_empty_queries(seeded):
+    assert sorted(found(seeded.search("phishing", domains=["ticket", "dataset"]))) == [("dataset", 1), ("ticket", 1)]
+    assert len(seeded.search("phishing", limit=1)) == 1
+    assert seeded.search("phishing", domains=[]) == []
+    assert seeded.search("  ?! ") == []
+    assert seeded.search("phishing", limit=0) == []
+    with pytest.raises(ValueError):
+        seeded.search("phishing", domains=["alerts"])
+
+
+def test_fts_operators_are_matched_as_plain_text(seeded):
+    #Unquoted, these would be FTS5 syntax errors, groups or column filters
+    assert found(seeded.search('phishing" finance')) == [("incident", 1)]
+    assert found(seeded.search("(finance) email*")) == [("incident", 1)]
+    assert seeded.search("NEAR(phishing finance)") == []
+    assert seeded.search("title:finance") == []
+
+
+def test_triggers_keep_the_index_in_sync(seeded):
+    seeded.update_incident(2, "Ransomware on a finance laptop", "Critical", "open", "2025-01-02")
+    seeded.delete_ticket(1)
+    assert found(seeded.search("ransomware")) == [("incident", 2)]
+    assert found(seeded.search("malware")) == []
+    assert found(seeded.search("report button")) == []
+    #Writes from another connection are indexed by the same triggers
+    with sqlite3.connect(seeded._db_path) as conn:
+        conn.execute("INSERT INTO it_tickets (title, priority, status, created_date) "
+                     "VALUES ('Ransomware note on printer', 'High', 'open', '2025-02-01')")
+        conn.execute("UPDATE users SET role = 'admin' WHERE username = 'phil'")
+    assert sorted(found(seeded.search("ransomware"))) == [("incident", 2), ("ticket", 2)]
+    assert found(seeded.search("admin", domains=["user"])) == [("user", 1)]
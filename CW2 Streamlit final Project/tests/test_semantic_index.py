@@ -0,0 +1,57 @@
+"""Tests for the semantic search index and its change log sync"""
+import sqlite3
+import pytest
+from services.semantic_index import SemanticIndex, get_semantic_index
+
+
+def ids(results, kind="incident"):
+    return {result["id"] for result in results if result["kind"] == kind}
+
+
+@pytest.fixture
+def index(db):
+    db.bulk_insert_incidents([
+        ("Phishing email targeting finance", "High", "open", "2025-01-01"),
+        ("Malware found on laptop", "Medium", "open", "2025-01-02"),
+        ("Unauthorized login attempt on VPN", "High", "open", "2025-01-03"),
+    ])
+    index = SemanticIndex(db)
+    index.build()
+    return index
+
+
+def test_search_ranks_matching_titles(index):
+    results = index.search("phishing emails")
+    assert results[0]["id"] == 1
+    assert results[0]["text"] == "Phishing email targeting finance"
+
+
+def test_writes_from_another_process_are_indexed(db, index):
+    #A plain connection stands in for setup_db.py or a second server process
+    with sqlite3.connect(db._db_path) as conn:
+        conn.execute("INSERT INTO cyber_incidents (title, severity, status, date) "
+                     "VALUES ('Ransomware on file server', 'Critical', 'open', '2025-02-01')")
+        conn.execute("UPDATE cyber_incidents SET title = 'Printer jam in lobby' WHERE id = 2")
+        conn.execute("DELETE FROM cyber_incidents WHERE id = 3")
+    assert ids(index.search("ransomware")) == {4}
+    assert ids(index.search("malware laptop")) == set()
+    assert ids(index.search("printer jam")) == {2}
+    assert ids(index.search("unauthorized login")) == set()
+    assert index.stats()["rows"] == 3
+
+
+def test_pruned_log_rebuilds(db, index, monkeypatch):
+    db.execute_query("UPDATE cyber_incidents SET title = 'Lost badge' WHERE id = 1")
+    monkeypatch.setattr("services.semantic_index.changed_ids", lambda *args: None)
+    assert ids(index.search("lost badge")) == {1}
+    assert index.stats()["pending_postings"] == 0
+
+
+def test_registry_reads_through_its_own_manager(db):
+    shared = get_semantic_index(db)
+    assert shared._db is not db
+    with db.transaction():
+        db.execute_query("INSERT INTO it_tickets (title, priority, status, created_date) "
+                         "VALUES ('Password reset request', 'Low', 'open', '2025-01-01')")
+        assert shared.search("password reset") == []
+    assert ids(shared.search("password reset"), "ticket") == {1}
@@ -0,0 +1,110 @@
+"""Tests for the server-side session store"""
+import hashlib
+from types import SimpleNamespace
+import pytest
+from services.session_store import TOUCH_INTERVAL_SECONDS, SessionStore, get_session_store
+
+
+@pytest.fixture
+def store(db, clock, monkeypatch):
+    #Sessions read the wall clock through the module's time import
+    monkeypatch.setattr("services.session_store.time", SimpleNamespace(time=clock))
+    return SessionStore(db, ttl_seconds=3600, idle_seconds=600)
+
+
+def stored(db):
+    return db.fetch_all("SELECT * FROM sessions")
+
+
+def test_issue_and_resolve_carry_role_claims(db, store):
+    token = store.issue(7, "alice", "editor", "2025-01-01")
+    session = store.resolve(token)
+    assert (session["user_id"], session["username"], session["role"]) == (7, "alice", "editor")
+    assert session["permissions"] == ("view", "edit_records")
+    #Only a digest of the token is stored
+    assert [row["token_hash"] for row in stored(db)] == [hashlib.sha256(token.encode("utf-8")).hexdigest()]
+    assert store.resolve("not-a-token") is None
+    assert store.resolve(None) is None
+    assert store.issue(8, "bob", "auditor") and store.stats()["issued"] == 2
+
+
+def test_cached_sessions_resolve_without_a_query(db, store, clock):
+    token = store.issue(1, "alice", "user")
+    clock.advance(TOUCH_INTERVAL_SECONDS / 2)
+    #Another process revoking it is noticed at the next touch, not on every resolve
+    db.execute_query("DELETE FROM sessions")
+    assert store.resolve(token) is not None
+    assert store.stats()["hits"] == 1
+    clock.advance(TOUCH_INTERVAL_SECONDS)
+    assert store.resolve(token) is None
+    assert store.stats()["cached"] == 0
+
+
+def test_touch_writes_last_seen_back(db, store, clock):
+    token = store.issue(1, "alice", "user")
+    issued_at = clock.now
+    clock.advance(TOUCH_INTERVAL_SECONDS)
+    store.resolve(token)
+    assert stored(db)[0]["last_seen"] == issued_at + TOUCH_INTERVAL_SECONDS
+    #A restarted process (empty cache) reads the table
+    restarted = SessionStore(db, ttl_seconds=3600, idle_seconds=600)
+    assert restarted.resolve(token)["username"] == "alice"
+    assert restarted.stats()["misses"] == 1
+
+
+def test_idle_and_absolute_expiry(db, store, clock):
+    idle = store.issue(1, "alice", "user")
+    clock.advance(599)
+    assert store.resolve(idle) is not None
+    clock.advance(600)
+    assert store.resolve(idle) is None
+    assert stored(db) == []
+
+    busy = store.issue(2, "bob", "user")
+    for _ in range(6):
+        clock.advance(590)
+        assert store.resolve(busy) is not None
+    clock.advance(590)
+    #Activity never extends a session past its absolute lifetime
+    assert store.resolve(busy) is None
+    assert store.stats()["expired"] == 2
+
+
+def test_revoke_revoke_user_and_role_changes(db, store):
+    first, second = store.issue(1, "alice", "user"), store.issue(1, "alice", "user")
+    other = store.issue(2, "bob", "user")
+    store.update_role(1, "admin")
+    assert "manage_users" in store.resolve(first)["permissions"]
+    assert {row["role"] for row in stored(db) if row["user_id"] == 1} == {"admin"}
+
+    store.revoke(first)
+    assert store.resolve(first) is None
+    assert store.resolve(second) is not None
+    store.revoke_user(1)
+    assert store.resolve(second) is None
+    assert store.resolve(other)["role"] == "user"
+    assert [row["username"] for row in stored(db)] == ["bob"]
+
+
+def test_lru_evicts_but_the_table_still_resolves(db, clock, monkeypatch):
+    monkeypatch.setattr("services.session_store.time", SimpleNamespace(time=clock))
+    store = SessionStore(db, max_entries=2)
+    tokens = [store.issue(i, f"user{i}", "user") for i in range(3)]
+    assert store.stats()["evictions"] == 1
+    assert store.resolve(tokens[0])["username"] == "user0"
+    assert (store.stats()["misses"], store.stats()["cached"]) == (1, 2)
+
+
+def test_purge_removes_expired_rows(db, store, clock):
+    store.issue(1, "alice", "user")
+    clock.advance(300)
+    store.issue(2, "bob", "user")
+    clock.advance(400)
+    assert store.purge_expired() == 1
+    assert [row["username"] for row in stored(db)] == ["bob"]
+
+
+def test_registry_writes_through_its_own_manager(db):
+    shared = get_session_store(db)
+    assert shared._db is not db
+    assert get_session_store(db) is shared
@@ -0,0 +1,34 @@
+"""Tests for the shared table snapshots and their registry"""
+import sqlite3
+from services.database_manager import FRAME_PRESETS, DatabaseManager
+from services.snapshot_manager import get_snapshot_manager
+
+INSERT = "INSERT INTO cyber_incidents (title, severity, status, date) VALUES (?, 'High', 'open', '2025-01-01')"
+
+
+def test_registry_reads_through_its_own_manager(db):
+    shared = get_snapshot_manager(db, FRAME_PRESETS)
+    assert shared._db is not db
+    other = DatabaseManager(str(db._db_path))
+    assert other._snapshots is shared
+    with db.transaction():
+        db.execute_query(INSERT, ("Uncommitted",))
+        #Another session must not read through this session's open transaction
+        assert len(other.get_incidents_frame()) == 0
+    assert list(other.get_incidents_frame()["Title"]) == ["Uncommitted"]
+
+
+def test_writes_from_another_process_are_synced(db):
+    db.bulk_insert_incidents([(f"Incident {i}", "Low", "open", "2025-01-01") for i in range(20)])
+    assert len(db.get_incidents_frame()) == 20
+    #A plain connection stands in for setup_db.py or a second server process
+    with sqlite3.connect(db._db_path) as conn:
+        conn.execute(INSERT, ("External",))
+        conn.execute("UPDATE cyber_incidents SET status = 'closed' WHERE id = 3")
+        conn.execute("DELETE FROM cyber_incidents WHERE id = 4")
+    frame = db.get_incidents_frame()
+    assert db._snapshots.last_sync_metrics["cyber_incidents"]["mode"] == "delta"
+    assert len(frame) == 20
+    assert "External" in set(frame["Title"])
+    assert frame.set_index("ID").loc[3, "Status"] == "closed"
+    assert 4 not in set(frame["ID"])
@@ -0,0 +1,122 @@
+"""Tests for the dashboard statistics query and its trigger-maintained counters"""
+import sqlite3
+import pytest
+from services.statistics_engine import COUNTER_NAMES, StatisticsEngine
+
+
+@pytest.fixture
+def seeded(db):
+    db.bulk_insert_incidents([
+        ("Phishing", "High", "open", "2025-01-01"),
+        ("Malware", "Medium", "in progress", "2025-01-02"),
+        ("Old scan", "Low", "closed", "2025-01-03"),
+    ])
+    db.bulk_insert_datasets([("Logs", "SIEM", "Logs", 100), ("Intel", "MITRE", "Threat Intel", 40)])
+    db.bulk_insert_tickets([("VPN down", "High", "open", "2025-01-01"), ("Printer", "Low", "resolved", "2025-01-02")])
+    db.add_user("alice", "$2b$12$" + "a" * 53)
+    return db
+
+
+class CountingDb:
+    """Wraps a DatabaseManager and counts the statements the engine runs."""
+
+    def __init__(self, db):
+        self._db = db
+        self.statements = []
+
+    def fetch_one(self, sql, params=()):
+        self.statements.append(sql)
+        return self._db.fetch_one(sql, params)
+
+    def fetch_all(self, sql, params=()):
+        self.statements.append(sql)
+        return self._db.fetch_all(sql, params)
+
+
+def test_fallback_is_a_single_query(seeded):
+    spy = CountingDb(seeded)
+    stats = StatisticsEngine(spy).get_statistics()
+    #One failed counter read (no stats_counters table), then one aggregate query
+    assert len(spy.statements) == 2
+    assert stats == {
+        "incidents": {"total": 3, "open": 2},
+        "datasets": {"total": 2, "total_size": 140},
+        "tickets": {"total": 2, "open": 1},
+        "users": {"total": 1},
+    }
+
+
+def test_empty_tables_count_zero(db):
+    assert StatisticsEngine(db).compute() == {name: 0 for name in COUNTER_NAMES}
+
+
+def test_counters_follow_inserts_updates_and_deletes(seeded):
+    engine = StatisticsEngine(seeded)
+    engine.enable_counters()
+    assert engine.read_counters() == engine.compute()
+
+    seeded.insert_incident("Ransomware", "Critical", "open", "2025-02-01")
+    seeded.update_incident(3, "Old scan", "Low", "in progress", "2025-01-03")
+    seeded.update_incident(1, "Phishing", "High", "resolved", "2025-01-01")
+    seeded.delete_incident(2)
+    seeded.update_dataset(1, "Logs", "SIEM", "Logs", 250)
+    seeded.delete_dataset(2)
+    seeded.insert_ticket("Laptop", "Medium", "in progress", "2025-02-01")
+    seeded.update_ticket(2, "Printer", "Low", "open", "2025-01-02")
+    seeded.delete_ticket(1)
+    user_id = seeded.add_user("bob", "$2b$12$" + "b" * 53)
+    seeded.delete_user(user_id)
+    seeded.add_user("carol", "$2b$12$" + "c" * 53)
+
+    counters = engine.read_counters()
+    assert counters == engine.compute()
+    assert (counters["incidents_total"], counters["incidents_open"]) == (3, 2)
+    assert (counters["datasets_total"], counters["datasets_total_size"]) == (1, 250)
+    assert (counters["tickets_total"], counters["tickets_open"]) == (2, 2)
+    assert counters["users_total"] == 2
+
+
+def test_counters_follow_writes_from_another_process(seeded):
+    engine = StatisticsEngine(seeded)
+    engine.enable_counters()
+    #The triggers live in the database, so a plain connection keeps them in step too
+    with sqlite3.connect(seeded._db_path) as conn:
+        conn.execute("INSERT INTO cyber_incidents (title, severity, status, date) "
+                     "VALUES ('External', 'High', 'open', '2025-03-01')")
+        conn.execute("UPDATE it_tickets SET status = 'closed'")
+        conn.execute("DELETE FROM datasets_metadata WHERE size < 50")
+    assert engine.read_counters() == engine.compute()
+    assert seeded.get_statistics()["incidents"] == {"total": 4, "open": 3}
+    assert seeded.get_statistics()["tickets"]["open"] == 0
+
+
+def test_counters_are_read_without_scanning(seeded):
+    StatisticsEngine(seeded).enable_counters()
+    spy = CountingDb(seeded)
+    stats = StatisticsEngine(spy).get_statistics()
+    assert spy.statements == ["SELECT name, value FROM stats_counters"]
+    assert stats["datasets"]["total_size"] == 140
+
+
+def test_missing_counter_falls_back_and_rebuild_repairs_drift(seeded):
+    engine = StatisticsEngine(seeded)
+    engine.enable_counters()
+    seeded.execute_query("UPDATE stats_counters SET value = 99 WHERE name = 'tickets_total'")
+    assert engine.get_statistics()["tickets"]["total"] == 99
+    engine.rebuild_counters()
+    assert engine.get_statistics()["tickets"]["total"] == 2
+
+    seeded.execute_query("DELETE FROM stats_counters WHERE name = 'users_total'")
+    with pytest.raises(LookupError):
+        engine.read_counters()
+    assert engine.get_statistics()["users"]["total"] == 1
+
+
+def test_disable_counters_returns_to_the_aggregate_query(seeded):
+    engine = StatisticsEngine(seeded)
+    engine.enable_counters()
+    engine.disable_counters()
+    seeded.insert_incident("After disable", "Low", "open", "2025-04-01")
+    with pytest.raises(sqlite3.OperationalError):
+        engine.read_counters()
+    assert engine.get_statistics()["incidents"] == {"total": 4, "open": 3}
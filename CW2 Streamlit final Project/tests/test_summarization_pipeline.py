@@ -0,0 +1,48 @@
+"""Tests for SummarizationPipeline checkpoint reuse and invalidation"""
+import pytest
+from services.summarization_pipeline import SummarizationPipeline
+
+
+class FakeAssistant:
+    """AsyncAIAssistant stand-in that answers every prompt and counts calls."""
+
+    model = "fake-model"
+
+    def __init__(self):
+        self.calls = 0
+
+    def run_many(self, prompts, context="", temperature=0.7, max_tokens=500, use_cache=False):
+        self.calls += len(prompts)
+        return [{"index": i, "prompt": prompt, "response": f"summary {self.calls}-{i}", "error": None}
+                for i, prompt in enumerate(prompts)]
+
+
+@pytest.fixture
+def pipeline(db, tmp_path):
+    db.bulk_insert_incidents([
+        (f"Incident {i}", "High" if i % 2 else "Low", "open", f"2025-01-{i % 28 + 1:02d}")
+        for i in range(120)
+    ])
+    return SummarizationPipeline(db, FakeAssistant(), max_chunks=3, checkpoint_dir=tmp_path / "checkpoints")
+
+
+def test_unchanged_table_reuses_the_checkpoint(pipeline):
+    first = pipeline.summarize_table("incident")
+    calls = pipeline._assistant.calls
+    assert calls > 0
+    assert pipeline.summarize_table("incident") == first
+    assert pipeline._assistant.calls == calls
+
+
+@pytest.mark.parametrize("change", [
+    #Edits keep COUNT(*) and MAX(id) the same, so only the change log marker catches them
+    "UPDATE cyber_incidents SET status = 'closed' WHERE id = 5",
+    "UPDATE cyber_incidents SET severity = 'Critical' WHERE id = 60",
+    "DELETE FROM cyber_incidents WHERE id = 7",
+])
+def test_edits_invalidate_the_checkpoint(db, pipeline, change):
+    pipeline.summarize_table("incident")
+    calls = pipeline._assistant.calls
+    db.execute_query(change)
+    pipeline.summarize_table("incident")
+    assert pipeline._assistant.calls > calls
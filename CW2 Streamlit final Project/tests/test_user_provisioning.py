@@ -0,0 +1,100 @@
+"""Tests for bulk user provisioning and its input readers"""
+import json
+import bcrypt
+import pytest
+from services.auth_manager import HashingPool
+from services.user_provisioning import UserProvisioner, read_records
+
+#A complete cost-4 hash, stored as given when provided pre-hashed
+PREHASHED = bcrypt.hashpw(b"already-hashed", bcrypt.gensalt(4)).decode("utf-8")
+
+
+@pytest.fixture
+def pool():
+    pool = HashingPool(workers=2, max_pending=2)
+    yield pool
+    pool.shutdown()
+
+
+def provisioner(db, pool, batch_size=1000):
+    return UserProvisioner(db, hashing_pool=pool, batch_size=batch_size, rounds=4)
+
+
+def usernames(db):
+    return {row["username"] for row in db.fetch_all("SELECT username FROM users")}
+
+
+def test_file_duplicates_and_existing_usernames_are_counted_apart(db, pool):
+    db.add_user("alice", PREHASHED)
+    report = provisioner(db, pool).provision([
+        {"username": "alice", "password": "secret-1"},
+        {"username": "bob", "password": "secret-2"},
+        {"username": "bob", "password": "secret-3"},
+        {"username": "carol", "password": "secret-4", "role": "admin"},
+    ])
+    assert (report["read"], report["created"], report["skipped_existing"], report["duplicates"]) == (4, 2, 1, 1)
+    assert usernames(db) == {"alice", "bob", "carol"}
+    #The first occurrence wins
+    assert bcrypt.checkpw(b"secret-2", db.get_user("bob")["password_hash"].encode("utf-8"))
+    assert db.get_user("carol")["role"] == "admin"
+
+
+def test_prehashed_values_pass_through_and_malformed_ones_are_reported(db, pool):
+    report = provisioner(db, pool).provision([
+        {"username": "dave", "password_hash": PREHASHED},
+        {"username": "erin", "password_hash": PREHASHED[:-1]},
+        {"username": "frank", "password": "$2 is how my password starts"},
+        {"username": "grace", "password": "plain-password"},
+    ])
+    assert (report["prehashed"], report["hashed"], report["malformed_hashes"], report["invalid"]) == (1, 1, 2, 0)
+    assert db.get_user("dave")["password_hash"] == PREHASHED
+    assert usernames(db) == {"dave", "grace"}
+
+
+def test_short_passwords_and_missing_fields_are_invalid(db, pool):
+    report = provisioner(db, pool).provision([
+        {"username": "heidi", "password": "short"},
+        {"username": "", "password": "long-enough"},
+        {"username": "ivan"},
+        {"username": "judy", "password": "long-enough"},
+    ])
+    assert (report["invalid"], report["malformed_hashes"], report["created"]) == (3, 0, 1)
+
+
+@pytest.mark.parametrize("count, batches", [(5, 3), (4, 2), (1, 1), (0, 0)])
+def test_batches_commit_in_order(db, pool, count, batches):
+    committed = []
+
+    def on_batch(report):
+        committed.append((report["created"], report["hashed"], usernames(db)))
+
+    records = [{"username": f"user{i}", "password": f"password-{i}"} for i in range(count)]
+    report = provisioner(db, pool, batch_size=2).provision(records, on_batch=on_batch)
+    assert report["batches"] == batches
+    #Batches commit in input order, and each is written only after the next one was queued
+    assert [created for created, _, _ in committed] == [min(2 * n, count) for n in range(1, batches + 1)]
+    assert [hashed for _, hashed, _ in committed] == [min(2 * n + 2, count) for n in range(1, batches + 1)]
+    for created, _, names in committed:
+        assert names == {f"user{i}" for i in range(created)}
+
+
+def test_read_records_csv_and_jsonl(tmp_path, db, pool):
+    #The Week 8 users.txt layout, with spaces after the commas
+    csv_file = tmp_path / "users.txt"
+    csv_file.write_text(f"username, password_hash, role\nkate, {PREHASHED}, analyst\nleo, long-enough,\n")
+    jsonl_file = tmp_path / "users.jsonl"
+    jsonl_file.write_text(json.dumps({"username": "mia", "password": "long-enough"}) + "\n\n"
+                          + json.dumps({"username": "kate", "password": "other-one"}) + "\n")
+
+    assert [record["username"] for record in read_records(csv_file)] == ["kate", "leo"]
+    report = provisioner(db, pool).provision(read_records(csv_file))
+    assert (report["created"], report["prehashed"], report["hashed"]) == (2, 1, 1)
+    assert db.get_user("kate")["role"] == "analyst"
+    assert db.get_user("leo")["role"] == "user"
+
+    report = provisioner(db, pool).provision(read_records(jsonl_file))
+    assert (report["read"], report["created"], report["skipped_existing"]) == (2, 1, 1)
+
+    with pytest.raises(ValueError):
+        list(read_records(tmp_path / "users.xlsx"))
+    assert [record["username"] for record in read_records(jsonl_file, "jsonl")] == ["mia", "kate"]
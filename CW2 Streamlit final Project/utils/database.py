@@ -2,6 +2,7 @@
 import sqlite3
 from pathlib import Path
 from typing import Optional, Dict, Any
+from services.statistics_engine import STATISTICS_SQL, nest_statistics
 
 #paths and database initialization
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -181,36 +182,10 @@ def get_statistics(conn: sqlite3.Connection) -> Dict[str, Any]:
     """Get statistics for dashboard - returns nested structure"""
     cursor = conn.cursor()
     
-    # Incident statistics
-    cursor.execute("SELECT COUNT(*) as total FROM cyber_incidents")
-    incidents_total = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) as open FROM cyber_incidents WHERE status IN ('open', 'in progress')")
-    incidents_open = cursor.fetchone()[0]
-    
-    # Dataset statistics
-    cursor.execute("SELECT COUNT(*) as total FROM datasets_metadata")
-    datasets_total = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT SUM(size) as total_size FROM datasets_metadata")
-    result = cursor.fetchone()[0]
-    datasets_size = result if result else 0
-    
-    # Ticket statistics
-    cursor.execute("SELECT COUNT(*) as total FROM it_tickets")
-    tickets_total = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) as open FROM it_tickets WHERE status IN ('open', 'in progress')")
-    tickets_open = cursor.fetchone()[0]
-    
-    # User statistics
-    cursor.execute("SELECT COUNT(*) as total FROM users")
-    users_total = cursor.fetchone()[0]
+    # All counters in one round trip
+    cursor.execute(STATISTICS_SQL)
+    row = cursor.fetchone()
+    flat = dict(zip([col[0] for col in cursor.description], row))
     
     # Return NESTED structure
-    return {
-        "incidents": {"total": incidents_total, "open": incidents_open},
-        "datasets": {"total": datasets_total, "total_size": datasets_size},
-        "tickets": {"total": tickets_total, "open": tickets_open},
-        "users": {"total": users_total}
-    }
\ No newline at end of file
+    return nest_statistics(flat)
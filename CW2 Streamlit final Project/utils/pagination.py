@@ -0,0 +1,86 @@
+"""Keyset pagination helpers shared by the Streamlit pages"""
+from typing import Any, Callable, Dict, Optional
+import streamlit as st
+
+PAGE_SIZE_OPTIONS = [25, 50, 100, 250]
+
+
+def load_page(key: str, fetch: Callable[..., Dict[str, Any]], page_size: int, **filters) -> Dict[str, Any]:
+    """Fetch the current page for a table, starting over when the filters change."""
+    cursor_key = f"{key}_cursors"
+    filter_key = f"{key}_filters"
+    total_key = f"{key}_total"
+    
+    signature = (page_size, sorted((name, repr(value)) for name, value in filters.items()))
+    if st.session_state.get(filter_key) != signature or cursor_key not in st.session_state:
+        st.session_state[filter_key] = signature
+        st.session_state[cursor_key] = [None]
+        st.session_state.pop(total_key, None)
+    
+    cursors = st.session_state[cursor_key]
+    #Only count rows on the first page; later pages reuse the hint
+    first_page = len(cursors) == 1
+    page = fetch(
+        after_id=cursors[-1],
+        limit=page_size,
+        include_total=first_page or total_key not in st.session_state,
+        **filters
+    )
+    if page["total"] is not None:
+        st.session_state[total_key] = page["total"]
+    page["total"] = st.session_state.get(total_key)
+    page["page_number"] = len(cursors)
+    return page
+
+
+def page_widget_key(key: str, name: str) -> str:
+    """Key for a widget tied to the rows of the current page, so it starts fresh on every page."""
+    return f"{key}_{name}_{st.session_state[f'{key}_cursors'][-1]}"
+
+
+def select_entity(key: str, noun: str, action: str, collection, get_row: Callable[[int], Optional[Dict[str, Any]]],
+                  describe: Callable[[Any], str]) -> Optional[Any]:
+    """Pick an entity from the current page's collection, or any row by its ID.
+    
+    The list only holds the loaded page, so rows on other pages (or hidden by the filters)
+    are reached by typing their ID, which get_row looks up; a typed ID takes precedence.
+    """
+    selected = None
+    if collection:
+        options = {entity.get_id(): entity for entity in collection}
+        selected_id = st.selectbox(f"Select {noun} to {action.lower()} (current page)", list(options),
+                                   format_func=lambda entity_id: describe(options[entity_id]), key=f"{key}_select")
+        selected = options.get(selected_id)
+    else:
+        st.info(f"No {noun}s on this page; enter an ID below to pick one from any page.")
+    
+    row_id = st.number_input(f"Or enter the ID of any {noun}", min_value=0, value=0, step=1, key=f"{key}_id",
+                             help="Leave at 0 to use the list above")
+    if not row_id:
+        return selected
+    row = get_row(int(row_id))
+    if row is None:
+        st.warning(f"No {noun} with ID {int(row_id)}.")
+        return None
+    return type(collection).from_rows([row])[0]
+
+
+def render_pager(key: str, page: Dict[str, Any]) -> None:
+    """Show Previous/Next buttons and a position caption for a loaded page."""
+    cursors = st.session_state[f"{key}_cursors"]
+    col_prev, col_info, col_next = st.columns([1, 3, 1])
+    
+    with col_prev:
+        if st.button("⬅️ Previous", key=f"{key}_prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    
+    with col_info:
+        total = page.get("total")
+        total_text = f" of {total:,}" if total is not None else ""
+        st.caption(f"Page {page['page_number']} · {len(page['rows'])} rows shown{total_text}")
+    
+    with col_next:
+        if st.button("Next ➡️", key=f"{key}_next", disabled=not page["has_more"]):
+            cursors.append(page["next_after_id"])
+            st.rerun()
@@ -0,0 +1,80 @@
+"""Login session helpers shared by the Streamlit pages"""
+from typing import Any, Dict, Optional
+import streamlit as st
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit.web.server.browser_websocket_handler import BrowserWebSocketHandler
+from services.database_manager import DatabaseManager
+from services.login_throttle import resolve_source
+from services.session_store import SessionStore, get_session_store
+
+
+def session_store() -> SessionStore:
+    """The shared session store for the app database (no queries to get it)."""
+    return get_session_store(DatabaseManager())
+
+
+def client_source() -> Optional[str]:
+    """Address of the browser (or of its trusted proxy's client) for login throttling."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None
+    client = runtime.get_instance().get_client(ctx.session_id)
+    if not isinstance(client, BrowserWebSocketHandler):
+        #Not a browser connection (e.g. AppTest): only the per-username limit applies
+        return None
+    return resolve_source(client.request.remote_ip, dict(client.request.headers))
+
+
+def _clear() -> None:
+    """Reset the login fields of st.session_state."""
+    st.session_state.logged_in = False
+    st.session_state.username = ""
+    st.session_state.user_role = "user"
+    st.session_state.user_obj = None
+    st.session_state.session_token = None
+
+
+def start_session(username: str, role: str, user=None) -> None:
+    """Issue a session token for a successful login and record it in st.session_state."""
+    member_since = user.get_created_at() if user is not None else None
+    user_id = user.get_id() if user is not None else None
+    st.session_state.session_token = session_store().issue(user_id, username, role, member_since)
+    st.session_state.logged_in = True
+    st.session_state.username = username
+    st.session_state.user_role = role
+    st.session_state.user_obj = user
+
+
+def current_session() -> Optional[Dict[str, Any]]:
+    """Identity and role claims of the signed-in user, or None (expired sessions are logged out)."""
+    session = session_store().resolve(st.session_state.get("session_token"))
+    if session is None:
+        if st.session_state.get("logged_in"):
+            _clear()
+            st.session_state.session_expired = True
+        return None
+    #Keep the plain fields the pages read in step with the claims (e.g. after a role change)
+    st.session_state.logged_in = True
+    st.session_state.username = session["username"]
+    st.session_state.user_role = session["role"]
+    return session
+
+
+def require_login() -> Dict[str, Any]:
+    """Return the current session, or show the login prompt and stop the page."""
+    session = current_session()
+    if session is None:
+        if st.session_state.pop("session_expired", False):
+            st.warning("Your session has expired. Please log in again.")
+        st.error("You must be logged in to view this page")
+        if st.button("Go to login"):
+            st.switch_page("pages/1_🔐_Login.py")
+        st.stop()
+    return session
+
+
+def end_session() -> None:
+    """Log out: revoke the token and clear st.session_state."""
+    session_store().revoke(st.session_state.get("session_token"))
+    _clear()